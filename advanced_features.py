@@ -1,5 +1,14 @@
+import functools
+import io
+import json
 import os
 import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
 from typing import Dict, List, Optional, Tuple
 
 
@@ -54,30 +63,68 @@ def interpret_advanced_nl_request(text: str) -> Optional[Dict[str, str]]:
     return None
 
 
+# Parsed .env lines keyed by path, reused while the file's mtime/size are unchanged
+_env_file_cache: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+_env_file_lock = threading.Lock()
+
+
+def _env_file_signature(env_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(env_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 def update_env_file(key: str, value: str, env_path: str = '.env') -> None:
     """Update or add a key-value pair in .env file."""
-    if os.path.exists(env_path):
-        with open(env_path, 'r') as env_file:
-            lines = env_file.readlines()
-    else:
-        lines = []
+    # /setconfig runs in worker threads and the dashboard's Flask thread; serialize the read-modify-write
+    with _env_file_lock:
+        signature = _env_file_signature(env_path)
+        cached = _env_file_cache.get(env_path)
+        if signature is None:
+            lines = []
+        elif cached and cached[0] == signature:
+            lines = list(cached[1])
+        else:
+            with open(env_path, 'r') as env_file:
+                lines = env_file.readlines()
+
+        key_found = False
+        for idx, line in enumerate(lines):
+            if line.strip().startswith(f"{key}="):
+                lines[idx] = f"{key}={value}\n"
+                key_found = True
+                break
 
-    key_found = False
-    for idx, line in enumerate(lines):
-        if line.strip().startswith(f"{key}="):
-            lines[idx] = f"{key}={value}\n"
-            key_found = True
-            break
+        if not key_found:
+            lines.append(f"{key}={value}\n")
 
-    if not key_found:
-        lines.append(f"{key}={value}\n")
+        # Write to a sibling temp file and swap it in so readers never see a partial .env
+        env_dir = os.path.dirname(os.path.abspath(env_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.env.', suffix='.tmp', dir=env_dir)
+        try:
+            with os.fdopen(fd, 'w') as env_file:
+                env_file.writelines(lines)
+            if signature is not None:
+                shutil.copymode(env_path, tmp_path)
+            os.replace(tmp_path, env_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
 
-    with open(env_path, 'w') as env_file:
-        env_file.writelines(lines)
+        _env_file_cache[env_path] = (_env_file_signature(env_path), lines)
 
 
 def list_directory_summary(path: str, project_dir: str, max_items: int = 50) -> Tuple[bool, str, List[str], List[str]]:
     """Validate and list a directory; returns (ok, message, dirs, files)."""
+    ok, message, dirs, file_entries = scan_directory(path, project_dir)
+    return ok, message, dirs[:max_items], [entry.name for entry in file_entries[:max_items]]
+
+
+def scan_directory(path: str, project_dir: str) -> Tuple[bool, str, List[str], List[os.DirEntry]]:
+    """Validate and read a directory in one os.scandir pass; returns (ok, message, dirs, file_entries), sorted by name."""
     abs_path = os.path.abspath(path)
     if not abs_path.startswith(project_dir):
         return False, "❌ Access denied: Can only list files within project directory.", [], []
@@ -88,10 +135,24 @@ def list_directory_summary(path: str, project_dir: str, max_items: int = 50) ->
     if not os.path.isdir(path):
         return False, f"❌ Not a directory: {path}", [], []
 
-    items = sorted(os.listdir(path))
-    dirs = [item for item in items if os.path.isdir(os.path.join(path, item))][:max_items]
-    files = [item for item in items if os.path.isfile(os.path.join(path, item))][:max_items]
-    return True, "", dirs, files
+    dirs: List[str] = []
+    file_entries: List[os.DirEntry] = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.is_file():
+                file_entries.append(entry)
+    dirs.sort()
+    file_entries.sort(key=lambda entry: entry.name)
+    return True, "", dirs, file_entries
+
+
+def list_directory_with_sizes(path: str, project_dir: str, max_items: int = 50) -> Tuple[bool, str, List[str], List[Tuple[str, int]], int, int]:
+    """Like list_directory_summary, but files are (name, size) pairs and the full dir/file counts are returned too."""
+    ok, message, dirs, file_entries = scan_directory(path, project_dir)
+    files = [(entry.name, entry.stat().st_size) for entry in file_entries[:max_items]]
+    return ok, message, dirs[:max_items], files, len(dirs), len(file_entries)
 
 
 def read_file_preview(path: str, project_dir: str, preview_chars: int = 3500) -> Tuple[bool, str, str, bool]:
@@ -110,19 +171,125 @@ def read_file_preview(path: str, project_dir: str, preview_chars: int = 3500) ->
     return True, "", preview, len(content) > preview_chars
 
 
-def search_codebase(search_term: str, root: str = '.') -> List[str]:
-    """Search text across codebase files (safe local traversal)."""
-    matches: List[str] = []
+SEARCH_SKIP_DIRS = frozenset(['.git', 'env', 'venv', '__pycache__', 'node_modules'])
+SEARCH_FILE_EXTENSIONS = ('.py', '.js', '.md', '.txt', '.json')
+SEARCH_FINGERPRINT_TTL = 5.0
+
+# Codebase fingerprints keyed by root as (computed_at, fingerprint), rechecked at most every SEARCH_FINGERPRINT_TTL seconds
+_search_fingerprint_cache: Dict[str, Tuple[float, int]] = {}
+
+
+def _iter_searchable_files(root: str):
     for current_root, dirs, files in os.walk(root):
-        dirs[:] = [d for d in dirs if d not in ['.git', 'env', 'venv', '__pycache__', 'node_modules']]
+        dirs[:] = [d for d in dirs if d not in SEARCH_SKIP_DIRS]
         for file_name in files:
-            if file_name.endswith(('.py', '.js', '.md', '.txt', '.json')):
-                file_path = os.path.join(current_root, file_name)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file_obj:
-                        for line_num, line in enumerate(file_obj, 1):
-                            if search_term.lower() in line.lower():
-                                matches.append(f"{file_path}:{line_num}:{line.strip()}")
-                except Exception:
-                    continue
-    return matches
+            if file_name.endswith(SEARCH_FILE_EXTENSIONS):
+                yield os.path.join(current_root, file_name)
+
+
+def _codebase_fingerprint(root: str) -> int:
+    """Return a hash of (path, mtime_ns, size) over the searchable files under root, so renames and swaps count as changes."""
+    now = time.monotonic()
+    cached = _search_fingerprint_cache.get(root)
+    if cached and now - cached[0] < SEARCH_FINGERPRINT_TTL:
+        return cached[1]
+
+    entries = []
+    for file_path in _iter_searchable_files(root):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        entries.append((file_path, stat.st_mtime_ns, stat.st_size))
+    entries.sort()
+    fingerprint = hash(tuple(entries))
+    _search_fingerprint_cache[root] = (now, fingerprint)
+    return fingerprint
+
+
+@functools.lru_cache(maxsize=128)
+def _search_codebase_cached(search_term: str, root: str, fingerprint: int) -> Tuple[str, ...]:
+    pattern = re.compile(re.escape(search_term), re.IGNORECASE)
+    matches: List[str] = []
+    for file_path in _iter_searchable_files(root):
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file_obj:
+                for line_num, line in enumerate(file_obj, 1):
+                    if pattern.search(line):
+                        matches.append(f"{file_path}:{line_num}:{line.strip()}")
+        except Exception:
+            continue
+    return tuple(matches)
+
+
+def search_codebase(search_term: str, root: str = '.') -> List[str]:
+    """Search text across codebase files (safe local traversal); results are cached until the files change."""
+    return list(_search_codebase_cached(search_term, root, _codebase_fingerprint(root)))
+
+
+def invalidate_search_cache() -> None:
+    """Forget cached search results, e.g. after the bot writes a file."""
+    _search_fingerprint_cache.clear()
+    _search_codebase_cached.cache_clear()
+
+
+# Builtins exposed to /exec code
+RESTRICTED_EXEC_BUILTINS = {
+    'print': print,
+    'len': len,
+    'range': range,
+    'str': str,
+    'int': int,
+    'float': float,
+    'list': list,
+    'dict': dict,
+    'tuple': tuple,
+    'set': set,
+    'bool': bool,
+    'sum': sum,
+    'min': min,
+    'max': max,
+    'abs': abs,
+    'round': round,
+    'sorted': sorted,
+    'enumerate': enumerate,
+    'zip': zip,
+    'map': map,
+    'filter': filter,
+}
+
+
+class ChunkedTextBuffer(io.TextIOBase):
+    """Write-only text stream that keeps writes as a list and joins them once in getvalue()."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[str] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        return len(text)
+
+    def getvalue(self) -> str:
+        return ''.join(self._chunks)
+
+
+def run_restricted_code(code: str) -> Dict[str, str]:
+    """Exec code with RESTRICTED_EXEC_BUILTINS; returns {'output': ...} or {'error_type': ..., 'error': ...}."""
+    output_buffer = ChunkedTextBuffer()
+    try:
+        with redirect_stdout(output_buffer):
+            exec(code, {'__builtins__': dict(RESTRICTED_EXEC_BUILTINS)})
+    except Exception as exc:
+        return {'error_type': type(exc).__name__, 'error': str(exc)}
+    return {'output': output_buffer.getvalue()}
+
+
+def restricted_exec_main() -> None:
+    """Entry point for the /exec child interpreter: code on stdin, JSON outcome on stdout."""
+    code = sys.stdin.read()
+    outcome = run_restricted_code(code)
+    sys.stdout.write(json.dumps(outcome))
@@ -1,6 +1,7 @@
 # bot.py
 import argparse
 import asyncio
+import functools
 import getpass
 import html
 import importlib
@@ -11,27 +12,38 @@ import os
 import platform
 import re
 import shlex
+import string
 import subprocess
 import sys
 import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 
 import advanced_features
 import config
 import database
 import openai
-import psutil
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
 
 import requests
-from apscheduler.schedulers.background import BackgroundScheduler
+from markupsafe import escape as markup_escape
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.schedulers.base import STATE_RUNNING
 from apscheduler.triggers.cron import CronTrigger
 from telegram import BotCommand, Update
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 
-from plugin_registry import get_optional_config_keys, get_plugin_api_status, get_required_config_keys, get_skill, get_skill_definitions, invoke_first_available_method, invoke_service_method, sync_skill_metadata_commands
+from plugin_registry import get_optional_config_keys, get_plugin_api_status, get_required_config_keys, get_skill, get_skill_definitions, initialize_registry, invoke_first_available_method, invoke_service_method, sync_skill_metadata_commands
 from services.nlu import UniversalNLUService
 
 # Initialize database
@@ -42,11 +54,25 @@ logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s
 logger = logging.getLogger(__name__)
 
 # Global scheduler and bot instance
-scheduler = BackgroundScheduler()
+# The scheduler is started from post_init so it binds to the Telegram application's event loop.
+scheduler = AsyncIOScheduler(job_defaults={'max_instances': 1})
 bot_instance = None
-discord_thread = None
+main_event_loop = None
+# File tools are confined to the directory the bot was started from; the bot never chdirs
+PROJECT_DIR = os.path.abspath('.')
+# Discord listener task; runs on main_event_loop alongside the Telegram application
+discord_task = None
 nlu_service = UniversalNLUService()
 
+# The bot's process handle and start time never change, so look them up once.
+BOT_PROCESS = None
+BOT_START_TIME = None
+if PSUTIL_AVAILABLE:
+    BOT_PROCESS = psutil.Process(os.getpid())
+    BOT_START_TIME = BOT_PROCESS.create_time()
+    # Prime the system CPU counter so /status can sample it without blocking.
+    psutil.cpu_percent(interval=None)
+
 
 def call_service(service_name, method_name, *args, default=None, **kwargs):
     return invoke_service_method(service_name, method_name, *args, default=default, **kwargs)
@@ -65,15 +91,18 @@ CORE_ALLOWED_CONFIG_KEYS = [
     'DASHBOARD_JWT_SECRET', 'DASHBOARD_JWT_ALGORITHM',
     'DASHBOARD_JWT_EXPIRE_HOURS', 'DASHBOARD_AUTO_REFRESH_SECONDS',
 ]
-NUMERIC_CONFIG_KEYS = {'CHAT_HISTORY_LIMIT', 'NLU_MIN_CONFIDENCE', 'RAG_TOP_K', 'RAG_CHUNK_SIZE', 'RAG_MAX_CONTEXT_CHARS', 'DASHBOARD_JWT_EXPIRE_HOURS', 'DASHBOARD_AUTO_REFRESH_SECONDS'}
-BOOLEAN_CONFIG_KEYS = {'NLU_ENABLED', 'RAG_ENABLED', 'AUTO_SYNC_SKILL_METADATA', 'SKILL_METADATA_SYNC_ONLY_MISSING'}
-FLOAT_CONFIG_KEYS = {'NLU_MIN_CONFIDENCE'}
-SENSITIVE_CONFIG_KEYS = {
+NUMERIC_CONFIG_KEYS = frozenset({'CHAT_HISTORY_LIMIT', 'NLU_MIN_CONFIDENCE', 'RAG_TOP_K', 'RAG_CHUNK_SIZE', 'RAG_MAX_CONTEXT_CHARS', 'DASHBOARD_JWT_EXPIRE_HOURS', 'DASHBOARD_AUTO_REFRESH_SECONDS'})
+BOOLEAN_CONFIG_KEYS = frozenset({'NLU_ENABLED', 'RAG_ENABLED', 'AUTO_SYNC_SKILL_METADATA', 'SKILL_METADATA_SYNC_ONLY_MISSING'})
+FLOAT_CONFIG_KEYS = frozenset({'NLU_MIN_CONFIDENCE'})
+SENSITIVE_CONFIG_KEYS = frozenset({
     'TELEGRAM_BOT_TOKEN', 'OPENAI_API_KEY', 'OPENWEATHER_API_KEY', 'NEWSAPI_KEY',
     'GMAIL_APP_PASSWORD', 'DISCORD_BOT_TOKEN', 'WHATSAPP_TWILIO_AUTH_TOKEN',
     'WHATSAPP_TWILIO_ACCOUNT_SID', 'TRELLO_API_KEY', 'TRELLO_TOKEN', 'DASHBOARD_JWT_SECRET'
-}
-REQUIRED_ONBOARD_KEYS = {'TELEGRAM_BOT_TOKEN', 'CRON_NOTIFY_USER_ID', 'AI_BACKEND'}
+})
+REQUIRED_ONBOARD_KEYS = frozenset({'TELEGRAM_BOT_TOKEN', 'CRON_NOTIFY_USER_ID', 'AI_BACKEND'})
+DISCORD_CONFIG_KEYS = frozenset({'DISCORD_BOT_TOKEN', 'DISCORD_ALLOWED_CHANNEL_IDS'})
+BOOLEAN_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+BOOLEAN_CONFIG_VALUES = BOOLEAN_TRUE_VALUES | frozenset({'false', '0', 'no', 'off'})
 
 
 def get_runtime_allowed_config_keys():
@@ -91,8 +120,19 @@ def get_runtime_allowed_config_keys():
     return merged
 
 
+# Skill definitions are loaded once per process, so the merged key set is stable.
+_runtime_allowed_config_key_set = None
+
+
+def get_runtime_allowed_config_key_set():
+    global _runtime_allowed_config_key_set
+    if _runtime_allowed_config_key_set is None:
+        _runtime_allowed_config_key_set = frozenset(get_runtime_allowed_config_keys())
+    return _runtime_allowed_config_key_set
+
+
 def is_runtime_allowed_config_key(key):
-    return str(key).strip().upper() in set(get_runtime_allowed_config_keys())
+    return str(key).strip().upper() in get_runtime_allowed_config_key_set()
 
 
 def _matches_skill_keywords(skill_slug: str, text: str) -> bool:
@@ -191,7 +231,7 @@ def _build_dynamic_start_help() -> str:
         "- /config : show current runtime config",
         "- /setconfig KEY VALUE : update config",
         "- /gateway list|get|set : gateway config operations",
-        "- /addjob, /listjobs, /removejob : scheduling",
+        "- /addjob, /listjobs, /removejob, /removejobs : scheduling",
         "- /run <command> : execute shell command",
         "- /tools : advanced tool commands",
         "",
@@ -291,9 +331,9 @@ def _coerce_config_value(key, value):
         return int(value)
     if normalized_key in BOOLEAN_CONFIG_KEYS:
         normalized = str(value).strip().lower()
-        if normalized not in ['true', 'false', '1', '0', 'yes', 'no', 'on', 'off']:
+        if normalized not in BOOLEAN_CONFIG_VALUES:
             raise ValueError(f"Invalid boolean value for {normalized_key}")
-        return normalized in ['true', '1', 'yes', 'on']
+        return normalized in BOOLEAN_TRUE_VALUES
     if normalized_key == 'AI_BACKEND':
         backend = str(value).strip().lower()
         if backend not in ['ollama', 'openai']:
@@ -404,7 +444,7 @@ def run_gateway_cli(args):
     if action == 'set':
         try:
             typed_value = apply_config_update(key, args.value)
-            if key in ['DISCORD_BOT_TOKEN', 'DISCORD_ALLOWED_CHANNEL_IDS']:
+            if key in DISCORD_CONFIG_KEYS:
                 ensure_discord_bridge_running()
             print(f"✅ Updated {key}={_mask_value(key, str(typed_value))}")
             return 0
@@ -418,6 +458,8 @@ def run_gateway_cli(args):
 
 def handle_cli_entrypoint():
     parser = argparse.ArgumentParser(description='PyBot runtime and configuration manager')
+    # Internal: the /exec child process of a frozen build, which has no separate Python interpreter
+    parser.add_argument('--exec-runner', action='store_true', help=argparse.SUPPRESS)
     subparsers = parser.add_subparsers(dest='command')
 
     subparsers.add_parser('onboard', help='Run first-time onboarding wizard')
@@ -435,6 +477,9 @@ def handle_cli_entrypoint():
     set_parser.add_argument('value', help='Config value')
 
     args = parser.parse_args()
+    if args.exec_runner:
+        advanced_features.restricted_exec_main()
+        return 0
     if not args.command:
         return None
 
@@ -630,7 +675,7 @@ def update_identity(new_content):
         logger.error(f"Identity update error: {e}")
         return False
 
-def ask_ollama(prompt: str, chat_history=None) -> str:
+def build_ollama_prompt(prompt: str, chat_history=None) -> str:
     # Read bot identity (cached)
     identity = read_identity()
     
@@ -664,10 +709,18 @@ def ask_ollama(prompt: str, chat_history=None) -> str:
     else:
         # Just identity + prompt
         full_prompt = f"{identity}{time_context}{response_style}\n\nUser: {prompt}\nAssistant:"
-    
+    return full_prompt
+
+# Fallback replies returned when the AI backend fails; never worth caching
+OLLAMA_ERROR_REPLY = "Sorry, I'm having trouble connecting to my brain."
+OPENAI_ERROR_REPLY = "Sorry, I'm having trouble with OpenAI."
+UNKNOWN_BACKEND_REPLY = "Unknown AI backend."
+AI_ERROR_REPLIES = frozenset({OLLAMA_ERROR_REPLY, OPENAI_ERROR_REPLY, UNKNOWN_BACKEND_REPLY})
+
+def ask_ollama(prompt: str, chat_history=None) -> str:
     payload = {
         "model": config.OLLAMA_MODEL,
-        "prompt": full_prompt,
+        "prompt": build_ollama_prompt(prompt, chat_history),
         "stream": False
     }
     try:
@@ -676,7 +729,33 @@ def ask_ollama(prompt: str, chat_history=None) -> str:
         return response.json()["response"]
     except Exception as e:
         logger.error(f"Ollama error: {e}")
-        return "Sorry, I'm having trouble connecting to my brain."
+        return OLLAMA_ERROR_REPLY
+
+def stream_ollama(prompt: str, chat_history=None):
+    """Yield the Ollama reply piece by piece as the model generates it"""
+    payload = {
+        "model": config.OLLAMA_MODEL,
+        "prompt": build_ollama_prompt(prompt, chat_history),
+        "stream": True
+    }
+    produced = False
+    try:
+        with requests.post(config.OLLAMA_URL, json=payload, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                piece = data.get("response", "")
+                if piece:
+                    produced = True
+                    yield piece
+                if data.get("done"):
+                    break
+    except Exception as e:
+        logger.error(f"Ollama error: {e}")
+        if not produced:
+            yield OLLAMA_ERROR_REPLY
 
 def ask_openai(prompt: str) -> str:
     openai.api_key = config.OPENAI_API_KEY
@@ -688,7 +767,7 @@ def ask_openai(prompt: str) -> str:
         return completion.choices[0].message.content
     except Exception as e:
         logger.error(f"OpenAI error: {e}")
-        return "Sorry, I'm having trouble with OpenAI."
+        return OPENAI_ERROR_REPLY
 
 def get_ai_response(prompt: str, user_id=None, use_rag=False) -> str:
     if use_rag:
@@ -705,14 +784,42 @@ def get_ai_response(prompt: str, user_id=None, use_rag=False) -> str:
     elif config.AI_BACKEND == "openai":
         return ask_openai(prompt)
     else:
-        return "Unknown AI backend."
+        return UNKNOWN_BACKEND_REPLY
+
+def get_ai_response_stream(prompt: str, user_id=None, use_rag=False):
+    """Like get_ai_response, but yields the reply in pieces (backends without streaming yield it whole)"""
+    if config.AI_BACKEND != "ollama":
+        yield get_ai_response(prompt, user_id, use_rag=use_rag)
+        return
+
+    if use_rag:
+        prompt = inject_rag_context(prompt)
+
+    chat_history = None
+    if user_id:
+        limit = getattr(config, 'CHAT_HISTORY_LIMIT', 5)
+        chat_history = database.get_user_chat_history(user_id, limit=limit)
+
+    yield from stream_ollama(prompt, chat_history)
 
 # ---------- Cron Job Functions ----------
 def send_telegram_message(user_id, message, parse_mode=ParseMode.MARKDOWN):
     """Send a message to a Telegram user"""
     if bot_instance:
         try:
-            asyncio.run(bot_instance.bot.send_message(chat_id=user_id, text=message, parse_mode=ParseMode.MARKDOWN if parse_mode is None else parse_mode))
+            coroutine = bot_instance.bot.send_message(chat_id=user_id, text=message, parse_mode=ParseMode.MARKDOWN if parse_mode is None else parse_mode)
+            if main_event_loop is None or not main_event_loop.is_running():
+                asyncio.run(coroutine)
+                return
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is main_event_loop:
+                main_event_loop.create_task(coroutine)
+            else:
+                # Cron work runs in a worker thread; hand the send back to the bot's loop
+                asyncio.run_coroutine_threadsafe(coroutine, main_event_loop).result(timeout=30)
         except Exception as e:
             logger.error(f"Error sending message: {e}")
 
@@ -736,6 +843,10 @@ def execute_cron_job(job_type, params):
         generate_tracking_report=generate_tracking_report,
     )
 
+async def run_cron_job(job_type, params):
+    """Scheduler entry point: run the blocking cron work off the event loop"""
+    await asyncio.to_thread(execute_cron_job, job_type, params)
+
 def run_custom_command(command, timeout=30):
     """Execute a custom shell command and return the output"""
     return call_service(
@@ -749,6 +860,8 @@ def run_custom_command(command, timeout=30):
 # ---------- Browser Automation Functions ----------
 def automate_browser(action_type, **kwargs):
     """Automate browser actions using Selenium"""
+    if action_type == "stop_playback":
+        return call_service('browser', 'stop_playback', default="❌ Browser service is not available right now.")
     return call_service(
         'browser',
         'automate',
@@ -757,47 +870,53 @@ def automate_browser(action_type, **kwargs):
         **kwargs,
     )
 
-def auto_resolve_common_queries(text):
+
+async def automate_browser_async(action_type, **kwargs):
+    """Run automate_browser on a worker thread so Selenium waits don't block the event loop"""
+    return await asyncio.to_thread(automate_browser, action_type, **kwargs)
+
+# Pattern matching for common queries that should auto-execute
+AUTO_RESOLVE_OS_NAME = platform.system()
+AUTO_RESOLVE_PATTERNS = tuple((re.compile(pattern), command) for pattern, command in {
+    # Time and Date queries - COMMENTED OUT to let LLM handle naturally
+    # r'(?:what(?:\'s| is) (?:the )?)?current (?:time|date)': 'date' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'echo %TIME% %DATE%',
+    # r'(?:what(?:\'s| is) (?:the )?)?time(?: now| is it)?': 'date +"%H:%M:%S"' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'echo %TIME%',
+    # r'(?:what(?:\'s| is) (?:the )?)?(?:today(?:\'s)?|date)(?: today)?': 'date +"%Y-%m-%d"' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'echo %DATE%',
+    
+    # User and system info
+    r'(?:what(?:\'s| is) )?(?:my )?username': 'whoami' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'echo %USERNAME%',
+    r'who am i': 'whoami',
+    r'(?:what(?:\'s| is) )?(?:my )?current (?:directory|folder|path)': 'pwd' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'cd',
+    r'where am i': 'pwd' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'cd',
+    
+    # System status
+    r'(?:system )?uptime': 'uptime' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'systeminfo | find "System Boot Time"',
+    r'(?:disk|storage) space': 'df -h' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'wmic logicaldisk get size,freespace,caption',
+    r'(?:how much )?(?:free )?(?:disk|storage)(?: space)?': 'df -h /' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'wmic logicaldisk get freespace,caption',
+    r'memory usage': 'free -h' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'systeminfo | find "Available Physical Memory"',
+    r'(?:cpu|processor) info': 'lscpu | head -20' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'wmic cpu get name',
+    
+    # Network info
+    r'(?:my )?ip address': 'hostname -I' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'ipconfig | find "IPv4"',
+    r'network (?:info|status)': 'ip addr show' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'ipconfig',
+    
+    # File operations (safe ones)
+    r'list (?:files|directories)': 'ls -lh' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'dir',
+    r'show (?:files|directories)': 'ls -la' if AUTO_RESOLVE_OS_NAME != 'Windows' else 'dir',
+}.items())
+
+def auto_resolve_common_queries(text, text_lower=None):
     """Auto-resolve common system queries with immediate command execution"""
     
-    text_lower = text.lower().strip()
-    os_name = platform.system()
-    
-    # Pattern matching for common queries that should auto-execute
-    auto_patterns = {
-        # Time and Date queries - COMMENTED OUT to let LLM handle naturally
-        # r'(?:what(?:\'s| is) (?:the )?)?current (?:time|date)': 'date' if os_name != 'Windows' else 'echo %TIME% %DATE%',
-        # r'(?:what(?:\'s| is) (?:the )?)?time(?: now| is it)?': 'date +"%H:%M:%S"' if os_name != 'Windows' else 'echo %TIME%',
-        # r'(?:what(?:\'s| is) (?:the )?)?(?:today(?:\'s)?|date)(?: today)?': 'date +"%Y-%m-%d"' if os_name != 'Windows' else 'echo %DATE%',
-        
-        # User and system info
-        r'(?:what(?:\'s| is) )?(?:my )?username': 'whoami' if os_name != 'Windows' else 'echo %USERNAME%',
-        r'who am i': 'whoami',
-        r'(?:what(?:\'s| is) )?(?:my )?current (?:directory|folder|path)': 'pwd' if os_name != 'Windows' else 'cd',
-        r'where am i': 'pwd' if os_name != 'Windows' else 'cd',
-        
-        # System status
-        r'(?:system )?uptime': 'uptime' if os_name != 'Windows' else 'systeminfo | find "System Boot Time"',
-        r'(?:disk|storage) space': 'df -h' if os_name != 'Windows' else 'wmic logicaldisk get size,freespace,caption',
-        r'(?:how much )?(?:free )?(?:disk|storage)(?: space)?': 'df -h /' if os_name != 'Windows' else 'wmic logicaldisk get freespace,caption',
-        r'memory usage': 'free -h' if os_name != 'Windows' else 'systeminfo | find "Available Physical Memory"',
-        r'(?:cpu|processor) info': 'lscpu | head -20' if os_name != 'Windows' else 'wmic cpu get name',
-        
-        # Network info
-        r'(?:my )?ip address': 'hostname -I' if os_name != 'Windows' else 'ipconfig | find "IPv4"',
-        r'network (?:info|status)': 'ip addr show' if os_name != 'Windows' else 'ipconfig',
-        
-        # File operations (safe ones)
-        r'list (?:files|directories)': 'ls -lh' if os_name != 'Windows' else 'dir',
-        r'show (?:files|directories)': 'ls -la' if os_name != 'Windows' else 'dir',
-    }
+    if text_lower is None:
+        text_lower = text.lower().strip()
     
-    for pattern, command in auto_patterns.items():
-        if re.search(pattern, text_lower):
+    for pattern, command in AUTO_RESOLVE_PATTERNS:
+        if pattern.search(text_lower):
             return {
                 "is_command_request": True,
                 "command": command,
-                "explanation": f"Getting {pattern}",
+                "explanation": f"Getting {pattern.pattern}",
                 "confidence": "high",
                 "auto_resolved": True
             }
@@ -943,6 +1062,9 @@ def build_learned_entries(rows):
     return entries
 
 LEARNED_DISPLAY_LIMIT = 5
+LEARNED_ENTRY_TEMPLATE = string.Template(
+    "$number. $status_dot [#$pattern_id] <code>$user_input</code> → $intent ($status_text, used ${success_count}x)\n"
+)
 
 def build_display_learned_entries(entries, per_type_limit=LEARNED_DISPLAY_LIMIT):
     grouped = defaultdict(list)
@@ -956,18 +1078,43 @@ def build_display_learned_entries(entries, per_type_limit=LEARNED_DISPLAY_LIMIT)
 
     return ordered_types, grouped, display_entries
 
+# Cache of the last /learned view per user so /deletelearned can reuse the numbering
+LEARNED_VIEW_CACHE_TTL = 60
+LEARNED_VIEW_CACHE_MAXSIZE = 256
+_learned_view_cache = {}
+
+
+def load_learned_view(user_id):
+    """Return (ordered_types, grouped, display_entries) for a user, reusing a recent /learned view."""
+    cached = _learned_view_cache.get(user_id)
+    if cached and time.monotonic() - cached[0] < LEARNED_VIEW_CACHE_TTL:
+        return cached[1]
+
+    learned_rows = database.get_top_learned_patterns_per_type(user_id, per_type_limit=LEARNED_DISPLAY_LIMIT)
+    view = build_display_learned_entries(build_learned_entries(learned_rows))
+    _learned_view_cache.pop(user_id, None)
+    if len(_learned_view_cache) >= LEARNED_VIEW_CACHE_MAXSIZE:
+        _learned_view_cache.pop(next(iter(_learned_view_cache)))
+    _learned_view_cache[user_id] = (time.monotonic(), view)
+    return view
+
+
+def invalidate_learned_view(user_id):
+    _learned_view_cache.pop(user_id, None)
+
 # ---------- AI Learning & Pattern Matching ----------
 def check_learned_patterns(user_id, user_message, pattern_type):
     """Check if we've learned this pattern before"""
     
     
     learned = database.get_learned_patterns(user_id, pattern_type, min_confidence=0.6)
+    message_lower = user_message.lower()
     
     for pattern_data in learned:
         _, _, user_input, detected_intent, confidence, success_count = pattern_data
         
         # Check if user message matches learned pattern (fuzzy match)
-        if user_input in user_message.lower() or user_message.lower() in user_input:
+        if user_input in message_lower or message_lower in user_input:
             # Found a learned pattern!
             logger.info(f"🧠 Learned pattern matched: '{user_input}' → {detected_intent} (confidence: {confidence}, used: {success_count} times)")
             return detected_intent
@@ -1053,6 +1200,13 @@ def get_personalized_greeting(user_id):
             return "Good evening"
 
 # ---------- Daily Briefing ----------
+BRIEFING_PATTERNS = (
+    re.compile(r'(?:give me|show me|tell me)(?: my)? (?:daily |morning )?briefing'),
+    re.compile(r'(?:what\'s|what is) (?:my )?(?:daily |morning )?(?:briefing|update)'),
+    re.compile(r'(?:morning|daily) (?:briefing|update|summary)'),
+    re.compile(r'brief me'),
+)
+
 def detect_briefing_request(text, user_id=None):
     """Detect if user wants a daily briefing"""
     
@@ -1064,15 +1218,8 @@ def detect_briefing_request(text, user_id=None):
         if learned:
             return {'action': 'briefing'}
     
-    briefing_patterns = [
-        r'(?:give me|show me|tell me)(?: my)? (?:daily |morning )?briefing',
-        r'(?:what\'s|what is) (?:my )?(?:daily |morning )?(?:briefing|update)',
-        r'(?:morning|daily) (?:briefing|update|summary)',
-        r'brief me',
-    ]
-    
-    for pattern in briefing_patterns:
-        if re.search(pattern, text_lower):
+    for pattern in BRIEFING_PATTERNS:
+        if pattern.search(text_lower):
             result = {'action': 'briefing'}
             # 📚 Learn this pattern
             if user_id:
@@ -1081,6 +1228,15 @@ def detect_briefing_request(text, user_id=None):
     
     return None
 
+STATUS_PATTERNS = (
+    re.compile(r'(?:show|give|tell)(?: me)? (?:your |the |bot )?status'),
+    re.compile(r'(?:what\'s|what is) (?:your |the |bot )?(?:status|health)'),
+    re.compile(r'(?:are you (?:working|running|ok|operational|alive))'),
+    re.compile(r'bot (?:status|health|info|information)'),
+    re.compile(r'system (?:status|info)'),
+    re.compile(r'check status'),
+)
+
 def detect_status_request(text, user_id=None):
     """Detect if user wants bot status"""
     
@@ -1092,17 +1248,8 @@ def detect_status_request(text, user_id=None):
         if learned:
             return {'action': 'status'}
     
-    status_patterns = [
-        r'(?:show|give|tell)(?: me)? (?:your |the |bot )?status',
-        r'(?:what\'s|what is) (?:your |the |bot )?(?:status|health)',
-        r'(?:are you (?:working|running|ok|operational|alive))',
-        r'bot (?:status|health|info|information)',
-        r'system (?:status|info)',
-        r'check status',
-    ]
-    
-    for pattern in status_patterns:
-        if re.search(pattern, text_lower):
+    for pattern in STATUS_PATTERNS:
+        if pattern.search(text_lower):
             result = {'action': 'status'}
             # 📚 Learn this pattern
             if user_id:
@@ -1125,7 +1272,7 @@ def generate_daily_briefing(user_id):
     )
     
     # Upcoming scheduled tasks
-    jobs = database.get_all_cron_jobs()
+    jobs = database.get_cron_job_summaries()
     enabled_jobs = [j for j in jobs if j['enabled']]
     if enabled_jobs:
         briefing += "⏰ **Today's Scheduled Tasks:**\n"
@@ -1150,15 +1297,63 @@ def generate_daily_briefing(user_id):
     
     return briefing
 
-def interpret_command_request(text, user_id=None):
+# Common conversational phrases that should NEVER be interpreted as commands
+CONVERSATIONAL_PHRASE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'^hi$', r'^hello$', r'^hey$', r'^yo$', r'^sup$',
+    r'^thanks?$', r'^thank you$', r'^thx$',
+    r'^ok$', r'^okay$', r'^cool$', r'^nice$', r'^good$', r'^great$',
+    r'^bye$', r'^goodbye$', r'^see you$',
+    r'^yes$', r'^yeah$', r'^yep$', r'^no$', r'^nope$',
+    r'^how are you', r'^what\'?s up', r'^how\'?s it going',
+    r'^good morning', r'^good afternoon', r'^good evening', r'^good night',
+    # Time and date queries - let LLM handle these naturally
+    r'what.*time', r'time.*\?', r'current time', r'tell.*time',
+    r'what.*date', r'date.*\?', r'today.*date', r'current date',
+    r'^\w{1,3}$',  # Very short words (1-3 chars) are likely not commands
+))
+DDG_SEARCH_PATTERNS = (
+    re.compile(r'^(?:search(?:\s+using)?\s+(?:duck\s*duck\s*go|duckduckgo)\s*:?\s*)(.+)$', re.IGNORECASE),
+    re.compile(r'^(?:duck\s*duck\s*go|duckduckgo)\s*:?\s*(.+)$', re.IGNORECASE),
+    re.compile(r'^search\s+for\s+(.+?)\s+(?:on|using)\s+(?:duck\s*duck\s*go|duckduckgo)$', re.IGNORECASE),
+)
+YOUTUBE_PLAY_PATTERNS = (
+    re.compile(r'^(?:open\s+)?youtube\s+(?:and\s+)?(?:play|search|find|watch)\s+(?:for\s+)?(.+)$', re.IGNORECASE),
+    re.compile(r'^(?:play|watch)\s+(.+?)\s+(?:on|in)\s+youtube$', re.IGNORECASE),
+    re.compile(r'^(?:search|find)\s+youtube\s+(?:for\s+)?(.+)$', re.IGNORECASE),
+    re.compile(r'^open\s+youtube\s+(?:and\s+)?(?:play|search|find|watch)\s+(.+)$', re.IGNORECASE),
+)
+STOP_PLAYBACK_RE = re.compile(r'^(?:stop|pause)\s+(?:the\s+)?(?:youtube|video|music|song|playback|playing)(?:\s+on\s+youtube)?$', re.IGNORECASE)
+GOOGLE_SEARCH_PATTERNS = (
+    re.compile(r'^(?:google|search for)\s+(.+)', re.IGNORECASE),
+    re.compile(r'^search\s+(.+?)\s+(?:on|in)\s+google', re.IGNORECASE),
+    re.compile(r'^look up\s+(.+?)\s+(?:on\s+)?google', re.IGNORECASE),
+)
+POLITE_WORDS_RE = re.compile(r'\b(please|pls|plz)\b')
+OPEN_DOMAIN_RE = re.compile(r'open\s+(?:https?://)?([a-z0-9\.-]+\.[a-z]{2,})')
+OPEN_URL_RE = re.compile(r'open\s+(https?://[^\s]+|[a-z0-9\.-]+\.[a-z]{2,})')
+
+def interpret_command_request(text, user_id=None, text_lower=None):
     """Use AI to interpret a natural language request and suggest a shell command"""
     os_name = platform.system()  # Linux, Windows, Darwin (macOS)
+    if text_lower is None:
+        text_lower = text.lower().strip()
     
     # First, check if this is a common query that can be auto-resolved
-    auto_result = auto_resolve_common_queries(text)
+    auto_result = auto_resolve_common_queries(text, text_lower)
     if auto_result:
         return auto_result
-    
+
+    # Stop whatever browser automation is playing (checked before the skill-keyword guard, since 'youtube' is a browser keyword)
+    if STOP_PLAYBACK_RE.match(POLITE_WORDS_RE.sub('', text_lower).strip()):
+        return {
+            "is_command_request": True,
+            "command": "BROWSER_AUTOMATION",
+            "action": "stop_playback",
+            "params": {},
+            "explanation": "Stopping browser playback",
+            "confidence": "high"
+        }
+
     # OS-specific command examples
     if os_name == "Windows":
         browser_cmd = "start chrome"
@@ -1210,9 +1405,6 @@ IMPORTANT for YouTube/web requests:
 
 Only return the JSON, nothing else."""
 
-    # Pre-process common patterns for speed and reliability
-    text_lower = text.lower().strip()
-
     # Do not treat email-skill intents as shell commands unless user explicitly asks to run a command.
     explicit_command_terms = ["run", "execute", "shell", "terminal", "command", "bash", "zsh", "cmd", "powershell"]
     if _matches_any_skill_keywords(text_lower) and not any(term in text_lower for term in explicit_command_terms):
@@ -1232,37 +1424,16 @@ Only return the JSON, nothing else."""
                 }
     
     # Immediately return False for common conversational phrases
-    # These should NEVER be interpreted as commands
-    conversational_phrases = [
-        r'^hi$', r'^hello$', r'^hey$', r'^yo$', r'^sup$',
-        r'^thanks?$', r'^thank you$', r'^thx$',
-        r'^ok$', r'^okay$', r'^cool$', r'^nice$', r'^good$', r'^great$',
-        r'^bye$', r'^goodbye$', r'^see you$',
-        r'^yes$', r'^yeah$', r'^yep$', r'^no$', r'^nope$',
-        r'^how are you', r'^what\'?s up', r'^how\'?s it going',
-        r'^good morning', r'^good afternoon', r'^good evening', r'^good night',
-        # Time and date queries - let LLM handle these naturally
-        r'what.*time', r'time.*\?', r'current time', r'tell.*time',
-        r'what.*date', r'date.*\?', r'today.*date', r'current date',
-        r'^\w{1,3}$',  # Very short words (1-3 chars) are likely not commands
-    ]
-    
-    for phrase_pattern in conversational_phrases:
-        if re.match(phrase_pattern, text_lower):
+    for phrase_pattern in CONVERSATIONAL_PHRASE_PATTERNS:
+        if phrase_pattern.match(text_lower):
             return {"is_command_request": False}
     
     # DuckDuckGo search patterns (explicit)
-    ddg_patterns = [
-        r'^(?:search(?:\s+using)?\s+(?:duck\s*duck\s*go|duckduckgo)\s*:?\s*)(.+)$',
-        r'^(?:duck\s*duck\s*go|duckduckgo)\s*:?\s*(.+)$',
-        r'^search\s+for\s+(.+?)\s+(?:on|using)\s+(?:duck\s*duck\s*go|duckduckgo)$',
-    ]
-
-    for pattern in ddg_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
+    for pattern in DDG_SEARCH_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             search_query = match.group(1).strip()
-            search_query = re.sub(r'\b(please|pls|plz)\b', '', search_query).strip(' :,-')
+            search_query = POLITE_WORDS_RE.sub('', search_query).strip(' :,-')
             if len(search_query) < 2:
                 continue
             return {
@@ -1275,19 +1446,12 @@ Only return the JSON, nothing else."""
             }
 
     # YouTube playback patterns (must explicitly mention YouTube)
-    youtube_patterns = [
-        r'^(?:open\s+)?youtube\s+(?:and\s+)?(?:play|search|find|watch)\s+(?:for\s+)?(.+)$',
-        r'^(?:play|watch)\s+(.+?)\s+(?:on|in)\s+youtube$',
-        r'^(?:search|find)\s+youtube\s+(?:for\s+)?(.+)$',
-        r'^open\s+youtube\s+(?:and\s+)?(?:play|search|find|watch)\s+(.+)$',
-    ]
-    
-    for pattern in youtube_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
+    for pattern in YOUTUBE_PLAY_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             search_query = match.group(1).strip()
             # Clean up common words
-            search_query = re.sub(r'\b(please|pls|plz)\b', '', search_query).strip()
+            search_query = POLITE_WORDS_RE.sub('', search_query).strip()
             
             return {
                 "is_command_request": True,
@@ -1299,17 +1463,11 @@ Only return the JSON, nothing else."""
             }
     
     # Google search patterns (must explicitly mention search/google)
-    google_search_patterns = [
-        r'^(?:google|search for)\s+(.+)',
-        r'^search\s+(.+?)\s+(?:on|in)\s+google',
-        r'^look up\s+(.+?)\s+(?:on\s+)?google',
-    ]
-    
-    for pattern in google_search_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
+    for pattern in GOOGLE_SEARCH_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             search_query = match.group(1).strip()
-            search_query = re.sub(r'\b(please|pls|plz)\b', '', search_query).strip()
+            search_query = POLITE_WORDS_RE.sub('', search_query).strip()
             
             # Skip conversational queries
             if len(search_query) < 3:
@@ -1327,8 +1485,8 @@ Only return the JSON, nothing else."""
             }
     
     # Web URL patterns
-    if re.search(r'open\s+(?:https?://)?([a-z0-9\.-]+\.[a-z]{2,})', text_lower):
-        match = re.search(r'open\s+(https?://[^\s]+|[a-z0-9\.-]+\.[a-z]{2,})', text_lower)
+    if OPEN_DOMAIN_RE.search(text_lower):
+        match = OPEN_URL_RE.search(text_lower)
         if match:
             url = match.group(1)
             if not url.startswith('http'):
@@ -1417,6 +1575,9 @@ def generate_sleep_report(user_id, days=7):
     """Generate a comprehensive sleep report"""
     return call_service('tracking', 'generate_sleep_report', user_id, days, default="❌ Tracking service is not available right now.")
 
+# Atomic prefixes stop at the first keyword per line, so a long unmatched message is scanned once
+TIME_QUESTION_RE = re.compile(r'^(?>.*?\btime\b).*(?:\?|what)|^(?>.*?what).*\btime\b', re.MULTILINE)
+
 def check_capability_question(text, user_id=None):
     """Check if user is asking about bot's capabilities"""
     text_lower = text.lower().strip()
@@ -1444,7 +1605,7 @@ def check_capability_question(text, user_id=None):
         return None
     
     # Catch-all for any question with "time" that we might have missed
-    if re.search(r'\btime\b.*\?|what.*\btime\b|\btime\b.*what', text_lower):
+    if TIME_QUESTION_RE.search(text_lower):
         # 📚 Learn this pattern
         if user_id:
             learn_from_interaction(user_id, text_lower, 'time', 'time_query')
@@ -1571,7 +1732,7 @@ def schedule_job(job):
                     hour_range = f"{start_hour}-23,0-{end_hour}"
                 
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     'cron',
                     hour=hour_range,
                     minute=start_minute,
@@ -1586,7 +1747,7 @@ def schedule_job(job):
                     hour_range = f"{start_hour}-23,0-{end_hour}"
                 
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     'cron',
                     hour=hour_range,
                     minute=f"*/{interval_value}",
@@ -1599,7 +1760,7 @@ def schedule_job(job):
             if "minute" in schedule:
                 minutes = int(parts[1])
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     'interval',
                     minutes=minutes,
                     args=[job['job_type'], job['params']],
@@ -1608,7 +1769,7 @@ def schedule_job(job):
             elif "hour" in schedule:
                 hours = int(parts[1])
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     'interval',
                     hours=hours,
                     args=[job['job_type'], job['params']],
@@ -1629,7 +1790,7 @@ def schedule_job(job):
                 run_date = datetime.now() + timedelta(hours=value)  # default
             
             scheduler.add_job(
-                execute_cron_job,
+                run_cron_job,
                 'date',
                 run_date=run_date,
                 args=[job['job_type'], job['params']],
@@ -1655,7 +1816,7 @@ def schedule_job(job):
                         run_date += timedelta(days=1)
                 
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     'date',
                     run_date=run_date,
                     args=[job['job_type'], job['params']],
@@ -1668,7 +1829,7 @@ def schedule_job(job):
             time_str = schedule.split("at")[1].strip()
             hour, minute = time_str.split(":")
             scheduler.add_job(
-                execute_cron_job,
+                run_cron_job,
                 'cron',
                 hour=int(hour),
                 minute=int(minute),
@@ -1680,7 +1841,7 @@ def schedule_job(job):
             parts = schedule.split()
             if len(parts) == 5:
                 scheduler.add_job(
-                    execute_cron_job,
+                    run_cron_job,
                     CronTrigger.from_crontab(schedule),
                     args=[job['job_type'], job['params']],
                     id=job['name']
@@ -1704,6 +1865,20 @@ def load_cron_jobs():
             schedule_job(job)
     logger.info(f"Loaded {len(jobs)} cron jobs")
 
+# Internal maintenance job; the id is outside the names users give cron jobs
+DB_VACUUM_JOB_ID = "_db_incremental_vacuum"
+
+async def run_db_vacuum():
+    """Return pages freed by deleted notes, items and patterns to the filesystem"""
+    try:
+        await asyncio.to_thread(database.incremental_vacuum)
+    except Exception as e:
+        logger.error(f"Incremental vacuum failed: {e}")
+
+def schedule_db_maintenance():
+    """Schedule the daily incremental vacuum"""
+    scheduler.add_job(run_db_vacuum, 'cron', hour=4, minute=0, id=DB_VACUUM_JOB_ID, replace_existing=True)
+
 def parse_cron_from_text(text):
     """Parse natural language cron job request using AI"""
     return call_service('cron_nl', 'parse_cron_from_text', text, get_ai_response, default=None)
@@ -1720,24 +1895,42 @@ def interpret_cron_management(text, user_id):
     return call_service('cron_nl', 'interpret_cron_management', text, user_id, get_ai_response, default=None)
 
 # ---------- Access Control ----------
-def is_user_allowed(user_id):
+# Allowed user IDs loaded from the database; refreshed whenever the dashboard saves them
+_allowed_user_ids = None
+
+
+def refresh_allowed_users():
+    global _allowed_user_ids
     # Get allowed users from database (comma-separated list)
-    allowed = database.get_config("allowed_users", "")
+    allowed = database.get_config("allowed_users", "") or ""
+    _allowed_user_ids = frozenset(uid.strip() for uid in allowed.split(",") if uid.strip())
+    return _allowed_user_ids
+
+
+def is_user_allowed(user_id):
+    allowed = _allowed_user_ids if _allowed_user_ids is not None else refresh_allowed_users()
     if not allowed:
         return True  # if not set, allow everyone
-    allowed_list = [uid.strip() for uid in allowed.split(",")]
-    return str(user_id) in allowed_list
+    return str(user_id) in allowed
+
+
+def authorized(handler):
+    """Reject Telegram updates from users outside the allow-list before running the handler."""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        if not is_user_allowed(update.effective_user.id):
+            await update.message.reply_text("You are not authorized to use this bot.")
+            return
+        return await handler(update, context, *args, **kwargs)
+    return wrapper
 
 # ---------- Telegram Handlers ----------
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         help_text = _build_dynamic_start_help()
         await safe_reply(update.message, help_text)
 
+@authorized
 async def plugin_command_bridge(update: Update, context: ContextTypes.DEFAULT_TYPE, command_name: str):
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     payload = invoke_first_available_method(
         'build_command_response',
         command_name,
@@ -1794,12 +1987,13 @@ async def send_html_in_chunks(message, text, chunk_size=3400):
             await message.reply_text(chunk, parse_mode=ParseMode.HTML)
 
 
+ADDJOB_QUOTED_SCHEDULE_RE = re.compile(r'\s*"([^"]*)"')
+ADDJOB_PARAM_RE = re.compile(r'(?<!\w)(\w+)=(?:"([^"]*)"|(\S+))')
+
+
+@authorized
 async def addjob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /addjob command"""
-    if not is_user_allowed(update.effective_user.id):
-        await safe_reply(update.message, "You are not authorized to use this bot.", preferred_mode=ParseMode.HTML)
-        return
-    
     help_text = call_service(
         'cron',
         'get_addjob_help_text',
@@ -1835,25 +2029,22 @@ Examples:
     
     # Parse schedule (handle quoted strings)
     full_text = " ".join(context.args[2:])
-    
+
     # Extract schedule from quotes if present
-    if '"' in full_text:
-        schedule_start = full_text.index('"') + 1
-        schedule_end = full_text.index('"', schedule_start)
-        schedule = full_text[schedule_start:schedule_end]
-        params_text = full_text[schedule_end+1:].strip()
+    quoted_schedule = ADDJOB_QUOTED_SCHEDULE_RE.match(full_text)
+    if quoted_schedule:
+        schedule = quoted_schedule.group(1)
+        params_text = full_text[quoted_schedule.end():]
     else:
         # Take next 3-5 words as schedule
         schedule = " ".join(context.args[2:5])
         params_text = " ".join(context.args[5:]) if len(context.args) > 5 else ""
-    
-    # Parse params
-    params = {}
-    if params_text:
-        for param in params_text.split():
-            if '=' in param:
-                key, value = param.split('=', 1)
-                params[key] = value.strip('"')
+
+    # Parse params (key=value or key="quoted value")
+    params = {
+        key: quoted_value if quoted_value else bare_value.strip('"')
+        for key, quoted_value, bare_value in ADDJOB_PARAM_RE.findall(params_text)
+    }
     
     # Add job to database
     success, message = database.add_cron_job(name, job_type, schedule, params)
@@ -1874,12 +2065,9 @@ Examples:
     else:
         await safe_reply(update.message, f"❌ {message}", preferred_mode=ParseMode.HTML)
 
+@authorized
 async def listjobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /listjobs command"""
-    if not is_user_allowed(update.effective_user.id):
-        await safe_reply(update.message, "You are not authorized to use this bot.", preferred_mode=ParseMode.HTML)
-        return
-    
     jobs = database.get_all_cron_jobs()
     
     if not jobs:
@@ -1905,12 +2093,9 @@ async def listjobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     result += "\nUse <code>/removejob &lt;id|name&gt;</code> to delete a job"
     await safe_reply(update.message, result, preferred_mode=ParseMode.HTML)
 
+@authorized
 async def removejob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /removejob command"""
-    if not is_user_allowed(update.effective_user.id):
-        await safe_reply(update.message, "You are not authorized to use this bot.", preferred_mode=ParseMode.HTML)
-        return
-    
     if not context.args:
         await safe_reply(update.message, "Usage: <code>/removejob &lt;job_id_or_name&gt;</code>", preferred_mode=ParseMode.HTML)
         return
@@ -1921,7 +2106,7 @@ async def removejob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if target.isdigit():
         job_id = int(target)
-        jobs = database.get_all_cron_jobs()
+        jobs = database.get_cron_job_summaries()
         matched_job = next((job for job in jobs if int(job.get('id', 0)) == job_id), None)
         if not matched_job:
             await safe_reply(update.message, f"❌ Job ID <code>{job_id}</code> not found.", preferred_mode=ParseMode.HTML)
@@ -1950,12 +2135,59 @@ async def removejob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Failed to remove cron job '{name}': {exc}", exc_info=True)
         await safe_reply(update.message, "❌ Failed to remove the job. Please try again.", preferred_mode=ParseMode.HTML)
 
+def remove_scheduled_jobs(names):
+    """Remove jobs from the scheduler with processing paused, so it wakes up once at the end."""
+    was_running = scheduler.state == STATE_RUNNING
+    if was_running:
+        scheduler.pause()
+    try:
+        for name in names:
+            try:
+                scheduler.remove_job(name)
+            except JobLookupError:
+                pass  # Job might not be scheduled
+    finally:
+        if was_running:
+            scheduler.resume()
+
+@authorized
+async def removejobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /removejobs command - remove several jobs at once"""
+    if not context.args:
+        await safe_reply(update.message, "Usage: <code>/removejobs &lt;id|name&gt; [&lt;id|name&gt; ...]</code>", preferred_mode=ParseMode.HTML)
+        return
+
+    jobs = database.get_cron_job_summaries()
+    names_by_id = {str(job['id']): job['name'] for job in jobs}
+    known_names = {job['name'] for job in jobs}
+
+    names = []
+    missing = []
+    for target in dict.fromkeys(arg.strip() for arg in context.args if arg.strip()):
+        name = names_by_id.get(target) if target.isdigit() else target
+        if name in known_names:
+            names.append(name)
+        else:
+            missing.append(target)
+
+    try:
+        remove_scheduled_jobs(names)
+        deleted = database.remove_cron_jobs(names)
+    except Exception as exc:
+        logger.error(f"Failed to remove cron jobs {names}: {exc}", exc_info=True)
+        await safe_reply(update.message, "❌ Failed to remove the jobs. Please try again.", preferred_mode=ParseMode.HTML)
+        return
+
+    lines = [f"✅ Removed {deleted} cron job(s)."]
+    if names:
+        lines.append(", ".join(f"<code>{html.escape(name)}</code>" for name in names))
+    if missing:
+        lines.append("❌ Not found: " + ", ".join(f"<code>{html.escape(target)}</code>" for target in missing))
+    await safe_reply(update.message, "\n".join(lines), preferred_mode=ParseMode.HTML)
+
+@authorized
 async def run_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /run command - execute a shell command"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if not context.args:
         await update.message.reply_text("""Usage: /run <command>
 
@@ -1976,12 +2208,9 @@ Examples:
     await update.message.reply_text(result)
 
 
+@authorized
 async def sendto_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /sendto command - send a Telegram message to another chat/user ID."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     if len(context.args) < 2:
         await update.message.reply_text(
             "Usage: /sendto <chat_id> <message>\n"
@@ -2011,58 +2240,52 @@ async def sendto_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "❌ Could not send message. The target user/group must have started or allowed this bot, and the chat_id must be correct."
         )
 
+@authorized
 async def learned_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /learned command - show what the bot has learned"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     user_id = str(update.effective_user.id)
     
     try:
-        # Run blocking database call in thread executor to avoid event loop blocking
-        loop = asyncio.get_event_loop()
-        learned_rows = await loop.run_in_executor(None, database.get_learned_patterns, user_id)
-        
-        entries = build_learned_entries(learned_rows)
-        if not entries:
+        # Always show fresh data here; the rebuilt view is cached for /deletelearned
+        invalidate_learned_view(user_id)
+        # Run blocking database call in a worker thread to avoid event loop blocking
+        ordered_types, grouped, display_entries = await asyncio.to_thread(load_learned_view, user_id)
+        if not display_entries:
             await update.message.reply_text("🎓 I haven't learned any patterns from you yet!\n\nI'll automatically learn from our successful interactions.")
             return
 
-        ordered_types, grouped, display_entries = build_display_learned_entries(entries)
-
-        result = "🎓 <b>What I've Learned About You:</b>\n\n"
+        parts = ["🎓 <b>What I've Learned About You:</b>\n\n"]
         counter = 0
         for pattern_type in ordered_types:
-            result += f"<b>{pattern_type.title()}:</b>\n"
+            parts.append(f"<b>{pattern_type.title()}:</b>\n")
             for entry in grouped[pattern_type][:LEARNED_DISPLAY_LIMIT]:
                 counter += 1
-                confidence = entry['confidence']
-                success_count = entry['success_count']
-                is_active = confidence >= 0.6
-                status_dot = "🟢" if is_active else "🔴"
-                status_text = "active" if is_active else "inactive"
-                safe_input = html.escape(entry['user_input'] or '')
-                safe_intent = html.escape(entry['detected_intent'] or '')
-                result += f"{counter}. {status_dot} [#{entry['id']}] <code>{safe_input}</code> → {safe_intent} ({status_text}, used {success_count}x)\n"
-            result += "\n"
+                is_active = entry['confidence'] >= 0.6
+                parts.append(LEARNED_ENTRY_TEMPLATE.substitute(
+                    number=counter,
+                    status_dot="🟢" if is_active else "🔴",
+                    pattern_id=entry['id'],
+                    user_input=markup_escape(entry['user_input'] or ''),
+                    intent=markup_escape(entry['detected_intent'] or ''),
+                    status_text="active" if is_active else "inactive",
+                    success_count=entry['success_count'],
+                ))
+            parts.append("\n")
+
+        parts.append("<i>I'm learning your language patterns to serve you better!</i>\n\n")
+        parts.append(f"Showing {len(display_entries)} entries (up to {LEARNED_DISPLAY_LIMIT} per category).\n")
+        parts.append("Use /deletelearned &lt;number&gt; to remove a specific pattern from this list.")
+        result = "".join(parts)
 
-        result += "<i>I'm learning your language patterns to serve you better!</i>\n\n"
-        result += f"Showing {len(display_entries)} entries (up to {LEARNED_DISPLAY_LIMIT} per category).\n"
-        result += "Use /deletelearned &lt;number&gt; to remove a specific pattern from this list."
-        
         await update.message.reply_text(result, parse_mode=ParseMode.HTML)
         
     except Exception as e:
         logger.error(f"Error showing learned patterns: {e}", exc_info=True)
         await update.message.reply_text(f"❌ Error displaying learned patterns. Check logs for details.")
 
+@authorized
 async def deletelearned_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /deletelearned command - remove a single learned pattern"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     if not context.args:
         await update.message.reply_text("Usage: /deletelearned &lt;number&gt; (See /learned for the numbered list)")
         return
@@ -2074,10 +2297,7 @@ async def deletelearned_command(update: Update, context: ContextTypes.DEFAULT_TY
         await update.message.reply_text("Please provide a valid entry number from /learned.")
         return
 
-    loop = asyncio.get_event_loop()
-    learned_rows = await loop.run_in_executor(None, database.get_learned_patterns, user_id)
-    entries = build_learned_entries(learned_rows)
-    ordered_types, grouped, display_entries = build_display_learned_entries(entries)
+    ordered_types, grouped, display_entries = await asyncio.to_thread(load_learned_view, user_id)
 
     if not display_entries:
         await update.message.reply_text("🎓 I haven't learned any patterns yet.")
@@ -2088,11 +2308,12 @@ async def deletelearned_command(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     entry = display_entries[index - 1]
-    deleted = await loop.run_in_executor(None, database.delete_learned_pattern, user_id, entry['id'])
+    deleted = await asyncio.to_thread(database.delete_learned_pattern, user_id, entry['id'])
+    invalidate_learned_view(user_id)
 
     if deleted:
-        safe_input = html.escape(entry['user_input'] or '')
-        safe_intent = html.escape(entry['detected_intent'] or '')
+        safe_input = markup_escape(entry['user_input'] or '')
+        safe_intent = markup_escape(entry['detected_intent'] or '')
         result = (
             f"✅ Removed learned pattern {index} [#{entry['id']}]:\n"
             f"<code>{safe_input}</code> → {safe_intent}"
@@ -2102,18 +2323,15 @@ async def deletelearned_command(update: Update, context: ContextTypes.DEFAULT_TY
 
     await update.message.reply_text(result, parse_mode=ParseMode.HTML)
 
+@authorized
 async def clearlearned_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /clearlearned command - clear all learned patterns"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     user_id = str(update.effective_user.id)
     
     try:
-        # Run blocking database call in thread executor
-        loop = asyncio.get_event_loop()
-        deleted_count = await loop.run_in_executor(None, database.clear_learned_patterns, user_id)
+        # Run blocking database call in a worker thread
+        deleted_count = await asyncio.to_thread(database.clear_learned_patterns, user_id)
+        invalidate_learned_view(user_id)
         
         if deleted_count > 0:
             result = f"🗑️ *Cleared {deleted_count} learned pattern(s)*\n\n"
@@ -2128,14 +2346,11 @@ async def clearlearned_command(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.error(f"Error clearing learned patterns: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@authorized
 async def config_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /config command - view current configuration"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     try:
-        runtime_keys = set(get_runtime_allowed_config_keys())
+        runtime_keys = get_runtime_allowed_config_key_set()
         result = "⚙️ <b>Current Configuration:</b>\n\n"
         
         result += "<b>🤖 AI Backend:</b>\n"
@@ -2178,12 +2393,9 @@ async def config_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error showing config: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@authorized
 async def setconfig_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /setconfig command - update configuration"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 2:
         available_keys = get_runtime_allowed_config_keys()
         key_lines = "\n".join([f"• <code>{key}</code>" for key in available_keys])
@@ -2213,9 +2425,9 @@ async def setconfig_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        typed_value = apply_config_update(key, value)
+        typed_value = await asyncio.to_thread(apply_config_update, key, value)
 
-        if key in ['DISCORD_BOT_TOKEN', 'DISCORD_ALLOWED_CHANNEL_IDS']:
+        if key in DISCORD_CONFIG_KEYS:
             ensure_discord_bridge_running()
         
         result = f"✅ <b>Configuration Updated</b>\n\n"
@@ -2232,12 +2444,9 @@ async def setconfig_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
 
+@authorized
 async def gateway_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /gateway command."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     args = context.args or []
     if not args:
         help_text = (
@@ -2283,8 +2492,8 @@ async def gateway_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         key = args[1].upper()
         value = ' '.join(args[2:])
         try:
-            typed_value = apply_config_update(key, value)
-            if key in ['DISCORD_BOT_TOKEN', 'DISCORD_ALLOWED_CHANNEL_IDS']:
+            typed_value = await asyncio.to_thread(apply_config_update, key, value)
+            if key in DISCORD_CONFIG_KEYS:
                 ensure_discord_bridge_running()
             await update.message.reply_text(
                 f"✅ <b>Gateway Updated</b>\n\n<code>{key}</code> = <code>{html.escape(_mask_value(key, str(typed_value)))}</code>",
@@ -2301,12 +2510,9 @@ async def gateway_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Unknown gateway action. Use /gateway for help.")
 
 
+@authorized
 async def onboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /onboard command - show onboarding readiness and missing keys."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     missing = get_missing_onboarding_keys()
     if not missing:
         await update.message.reply_text(
@@ -2325,12 +2531,9 @@ async def onboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     await update.message.reply_text(message, parse_mode=ParseMode.HTML)
 
+@authorized
 async def tools_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show Ai Assistant-like power features available in chat"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     help_text = """🛠️ <b>Advanced Tools (Ai Assistant-style)</b>
 
 <b>File Operations</b>
@@ -2365,23 +2568,40 @@ def parse_plan_steps(ai_text):
     """Parse plan steps from AI output."""
     return advanced_features.parse_plan_steps(ai_text)
 
+# Decoded active plans keyed by user_id as (steps, index, task); the DB stays the source of truth
+_plan_cache = {}
+
+async def load_active_plan(user_id):
+    """Return the user's active plan as (steps, index, task), or None when there is none."""
+    plan = _plan_cache.get(user_id)
+    if plan is not None:
+        return plan
+
+    profile = await asyncio.to_thread(database.get_user_profile, user_id)
+    saved_steps = profile.get('active_plan_steps')
+    if not saved_steps:
+        return None
+    saved_index = profile.get('active_plan_index')
+    saved_task = profile.get('active_plan_task')
+
+    plan = (json.loads(saved_steps), int(saved_index or 0), saved_task or '')
+    _plan_cache[user_id] = plan
+    return plan
+
+@authorized
 async def plan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Create an execution plan from a natural language task."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     user_id = str(update.effective_user.id)
 
     if len(context.args) < 1:
         # Show existing plan if available
-        saved_steps = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_steps')
-        saved_index = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_index')
-        saved_task = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_task')
-        if saved_steps and saved_task:
+        try:
+            plan = await load_active_plan(user_id)
+        except Exception:
+            plan = None
+        if plan and plan[2]:
             try:
-                steps = json.loads(saved_steps)
-                index = int(saved_index or 0)
+                steps, index, saved_task = plan
                 result = f"🗂️ <b>Current Plan</b>\n\n<b>Task:</b> {saved_task}\n\n"
                 for i, step in enumerate(steps, 1):
                     marker = "➡️" if i - 1 == index else "✅" if i - 1 < index else "▫️"
@@ -2415,9 +2635,12 @@ async def plan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Summarize results and next actions."
         ]
 
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_task', task)
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_steps', json.dumps(steps))
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_index', '0')
+    await asyncio.to_thread(database.save_user_context_bulk, user_id, {
+        'active_plan_task': task,
+        'active_plan_steps': json.dumps(steps),
+        'active_plan_index': '0',
+    })
+    _plan_cache[user_id] = (steps, 0, task)
 
     result = f"🗂️ <b>Plan Created</b>\n\n<b>Task:</b> {task}\n\n"
     for i, step in enumerate(steps, 1):
@@ -2426,87 +2649,99 @@ async def plan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.message.reply_text(result, parse_mode=ParseMode.HTML)
 
+@authorized
 async def nextstep_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Execute the next step from the active plan when possible."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     user_id = str(update.effective_user.id)
 
-    saved_steps = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_steps')
-    saved_index = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_index')
-    saved_task = await asyncio.to_thread(database.get_user_context, user_id, 'active_plan_task')
-
-    if not saved_steps:
-        await update.message.reply_text("❌ No active plan. Create one using <code>/plan &lt;task&gt;</code>.", parse_mode=ParseMode.HTML)
-        return
-
     try:
-        steps = json.loads(saved_steps)
-        index = int(saved_index or 0)
+        plan = await load_active_plan(user_id)
     except Exception:
         await update.message.reply_text("❌ Plan data is corrupted. Create a new one with /plan.")
         return
 
+    if not plan:
+        await update.message.reply_text("❌ No active plan. Create one using <code>/plan &lt;task&gt;</code>.", parse_mode=ParseMode.HTML)
+        return
+
+    steps, index, saved_task = plan
+
     if index >= len(steps):
         await update.message.reply_text("✅ Plan already completed.")
         return
 
     step = steps[index]
-    await update.message.reply_text(f"▶️ <b>Executing Step {index + 1}:</b> {step}", parse_mode=ParseMode.HTML)
+    new_index = index + 1
+    # Advance the cached plan now and persist the index in the background
+    _plan_cache[user_id] = (steps, new_index, saved_task)
+    context.application.create_task(
+        asyncio.to_thread(database.save_user_context, user_id, 'active_plan_index', str(new_index))
+    )
+    header = f"▶️ <b>Executing Step {index + 1}:</b> {html.escape(step)}"
+    if new_index < len(steps):
+        footer = f"⏭️ Next: Step {new_index + 1}. Run <code>/nextstep</code> again."
+    else:
+        footer = f"✅ Plan complete for task: {html.escape(saved_task or '')}"
 
+    # Steps handled by another command get one progress message that is edited with
+    # the footer afterwards; everything else is sent as a single combined reply.
+    step_handler = None
     interpreted = interpret_advanced_nl_request(step)
     if interpreted:
         action = interpreted.get("action")
         if action == "listfiles":
             path = interpreted.get("path", ".")
             context.args = [path] if path else []
-            await listfiles_command(update, context)
+            step_handler = listfiles_command
         elif action == "readfile":
             path = interpreted.get("path", "")
             context.args = [path] if path else []
-            await readfile_command(update, context)
+            step_handler = readfile_command
         elif action == "searchcode":
             query = interpreted.get("query", "")
             context.args = query.split() if query else []
-            await search_code_command(update, context)
+            step_handler = search_code_command
         elif action == "git":
             context.args = interpreted.get("args", [])
-            await git_command(update, context)
+            step_handler = git_command
         elif action == "config":
-            await config_command(update, context)
+            step_handler = config_command
         elif action == "setconfig":
             key = interpreted.get("key", "")
             value = interpreted.get("value", "")
             context.args = [key, value]
-            await setconfig_command(update, context)
+            step_handler = setconfig_command
         else:
-            await update.message.reply_text(f"ℹ️ Step parsed but not executable automatically: {step}")
+            body = f"ℹ️ Step parsed but not executable automatically: {html.escape(step)}"
     else:
-        await update.message.reply_text(
+        body = (
             "ℹ️ This step needs manual work:\n"
-            f"{step}\n\n"
-            "You can ask me to run a specific command after this.")
+            f"{html.escape(step)}\n\n"
+            "You can ask me to run a specific command after this."
+        )
 
-    new_index = index + 1
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_index', str(new_index))
+    if step_handler is None:
+        await update.message.reply_text(f"{header}\n\n{body}\n\n{footer}", parse_mode=ParseMode.HTML)
+        return
 
-    if new_index < len(steps):
-        await update.message.reply_text(f"⏭️ Next: Step {new_index + 1}. Run <code>/nextstep</code> again.", parse_mode=ParseMode.HTML)
-    else:
-        await update.message.reply_text(f"✅ Plan complete for task: {saved_task}")
+    progress_message = await update.message.reply_text(header, parse_mode=ParseMode.HTML)
+    await step_handler(update, context)
+    try:
+        await progress_message.edit_text(f"{header}\n\n{footer}", parse_mode=ParseMode.HTML)
+    except Exception as exc:
+        logger.debug(f"Plan progress edit failed, sending footer separately: {exc}")
+        await update.message.reply_text(footer, parse_mode=ParseMode.HTML)
 
+@authorized
 async def planreset_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Clear active plan data for the current user."""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-
     user_id = str(update.effective_user.id)
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_task', '')
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_steps', '')
-    await asyncio.to_thread(database.save_user_context, user_id, 'active_plan_index', '0')
+    await asyncio.to_thread(database.save_user_context_bulk, user_id, {
+        'active_plan_task': '',
+        'active_plan_steps': '',
+        'active_plan_index': '0',
+    })
+    _plan_cache.pop(user_id, None)
 
     await update.message.reply_text("🧹 Active plan cleared. Use <code>/plan &lt;task&gt;</code> to start a new one.", parse_mode=ParseMode.HTML)
 
@@ -2518,25 +2753,16 @@ def update_env_file(key, value, env_path='.env'):
     """Update or add a key-value pair in .env file."""
     advanced_features.update_env_file(key, value, env_path=env_path)
 
+@authorized
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /status command - show comprehensive bot status"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     # Get user ID for learning stats
     user_id = update.effective_user.id
     
-    try:
-        PSUTIL_AVAILABLE = True
-    except ImportError:
-        PSUTIL_AVAILABLE = False
-    
     # Get bot start time (approximate)
     if PSUTIL_AVAILABLE:
         try:
-            process = psutil.Process(os.getpid())
-            uptime_seconds = time.time() - process.create_time()
+            uptime_seconds = time.time() - BOT_START_TIME
             uptime = str(timedelta(seconds=int(uptime_seconds)))
         except:
             uptime = "unknown"
@@ -2550,7 +2776,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Count records in key tables
         messages_count = database.get_message_count()
-        jobs = database.get_all_cron_jobs()
+        jobs = database.get_cron_job_summaries()
         jobs_count = len(jobs)
         active_jobs = len([j for j in jobs if j['enabled']])
     except:
@@ -2569,7 +2795,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # System info
     if PSUTIL_AVAILABLE:
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.5)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             memory_percent = memory.percent
             disk = psutil.disk_usage('/')
@@ -2584,7 +2810,8 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Scheduler info
     scheduler_running = scheduler.running
-    scheduler_jobs = len(scheduler.get_jobs())
+    # Count user jobs only, not the internal database maintenance job
+    scheduler_jobs = sum(1 for job in scheduler.get_jobs() if job.id != DB_VACUUM_JOB_ID)
     
     # Learning stats
     try:
@@ -2641,11 +2868,44 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
         pass
 
 
+# Tags Telegram accepts in HTML parse mode; anything else makes the whole send fail
+TELEGRAM_HTML_TAGS = frozenset({
+    'b', 'strong', 'i', 'em', 'u', 'ins', 's', 'strike', 'del', 'a', 'code', 'pre',
+    'span', 'tg-spoiler', 'tg-emoji', 'blockquote',
+})
+# A tag, or a stray '<' / unescaped '&' that Telegram would reject
+HTML_MARKUP_RE = re.compile(
+    r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)(?:\s[^<>]*)?>|<|&(?!(?:lt|gt|amp|quot|#\d+|#x[0-9a-fA-F]+);)'
+)
+HTML_TAG_STRIP_RE = re.compile(r'<[^>]+>')
+
+def is_valid_telegram_html(text):
+    """Cheap local check that text only uses supported, properly nested Telegram HTML tags."""
+    open_tags = []
+    for match in HTML_MARKUP_RE.finditer(text):
+        tag = match.group(2)
+        if tag is None:
+            return False
+        tag = tag.lower()
+        if tag not in TELEGRAM_HTML_TAGS:
+            return False
+        if match.group(1):
+            if not open_tags or open_tags.pop() != tag:
+                return False
+        else:
+            open_tags.append(tag)
+    return not open_tags
+
 async def safe_reply(message, text, preferred_mode=None):
     """Send Telegram message with graceful parse-mode fallback."""
     if preferred_mode is None:
         return await message.reply_text(text)
 
+    # Malformed HTML would fail every parse mode, so skip straight to plain text
+    if preferred_mode == ParseMode.HTML and not is_valid_telegram_html(text):
+        logger.debug("safe_reply skipped HTML send: markup failed local validation")
+        return await message.reply_text(html.unescape(HTML_TAG_STRIP_RE.sub('', text)))
+
     try:
         return await message.reply_text(text, parse_mode=preferred_mode)
     except Exception as first_error:
@@ -2662,57 +2922,214 @@ async def safe_reply(message, text, preferred_mode=None):
         except Exception as second_error:
             logger.debug(f"safe_reply html fallback failed: {second_error}")
 
-    plain_text = re.sub(r'<[^>]+>', '', text)
+    plain_text = HTML_TAG_STRIP_RE.sub('', text)
     plain_text = plain_text.replace('*', '').replace('_', '').replace('`', '')
     return await message.reply_text(plain_text)
 
 
+# Escape &, < and > in one pass for raw command output shown inside <pre>/<code>
+escape_html_text = functools.partial(html.escape, quote=False)
+
+# Markdown patterns used by format_ai_reply_for_telegram
+FENCED_CODE_RE = re.compile(r'```\s*([\s\S]*?)\s*```')
+INLINE_CODE_RE = re.compile(r'`([^`\n]+)`')
+MARKDOWN_EMPHASIS_PATTERN = (
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|__(?P<underline>.+?)__'
+    r'|(?<!\*)\*(?!\*)(?P<italic>.+?)(?<!\*)\*(?!\*)'
+)
+MARKDOWN_EMPHASIS_RE = re.compile(MARKDOWN_EMPHASIS_PATTERN)
+# Headings, bullets and emphasis in one alternation so the text is scanned once
+MARKDOWN_RE = re.compile(
+    r'^\s*#{1,6}\s+(?P<heading>.+?)\s*$'
+    r'|(?P<bullet>^\s*[-*]\s+)'
+    r'|' + MARKDOWN_EMPHASIS_PATTERN,
+    re.MULTILINE,
+)
+# Any construct format_ai_reply_for_telegram converts needs one of these; replies without them render the same as plain text
+MARKDOWN_HINT_RE = re.compile(r'[*_`#]|^\s*-\s', re.MULTILINE)
+# Code placeholders are NUL-delimited so neither html.escape nor the markdown patterns can alter them
+CODE_PLACEHOLDER_RE = re.compile(r'\x00(\d+)\x00')
+
+def render_markdown_match(match):
+    """Replacement callback for MARKDOWN_RE and MARKDOWN_EMPHASIS_RE; emphasis inside a match is rendered too."""
+    groups = match.groupdict()
+    if groups.get('bullet') is not None:
+        return '• '
+    if groups['bold'] is not None:
+        inner, tag = groups['bold'], 'b'
+    elif groups['underline'] is not None:
+        inner, tag = groups['underline'], 'b'
+    elif groups['italic'] is not None:
+        inner, tag = groups['italic'], 'i'
+    else:
+        inner, tag = groups['heading'], 'b'
+    return f"<{tag}>{MARKDOWN_EMPHASIS_RE.sub(render_markdown_match, inner)}</{tag}>"
+
+@functools.lru_cache(maxsize=512)
 def format_ai_reply_for_telegram(text):
-    """Convert common LLM markdown to Telegram-safe HTML."""
+    """Convert common LLM markdown to Telegram-safe HTML (memoized; the output depends only on text)."""
     if not text:
         return ""
 
-    placeholders = {}
+    # NUL delimits the code placeholders below, so a literal one in the reply must not survive
+    text = text.replace("\x00", "")
+    placeholders = []
 
     def stash(match, tag):
-        key = f"__TG_PLACEHOLDER_{len(placeholders)}__"
-        content = match.group(1)
-        placeholders[key] = f"<{tag}>{html.escape(content)}</{tag}>"
-        return key
+        placeholders.append(f"<{tag}>{html.escape(match.group(1))}</{tag}>")
+        return f"\x00{len(placeholders) - 1}\x00"
 
     # Protect code blocks and inline code first
-    text = re.sub(r'```\s*([\s\S]*?)\s*```', lambda m: stash(m, "pre"), text)
-    text = re.sub(r'`([^`\n]+)`', lambda m: stash(m, "code"), text)
+    text = FENCED_CODE_RE.sub(lambda m: stash(m, "pre"), text)
+    text = INLINE_CODE_RE.sub(lambda m: stash(m, "code"), text)
 
     # Escape the rest
     text = html.escape(text)
 
-    # Headings (Telegram has no heading support, map to bold)
-    text = re.sub(r'(?m)^\s*#{1,6}\s+(.+?)\s*$', r'<b>\1</b>', text)
-
-    # Bold/italic basics
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
-    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<i>\1</i>', text)
+    # Headings map to bold (Telegram has no headings), bullets are normalized, emphasis is converted
+    text = MARKDOWN_RE.sub(render_markdown_match, text)
 
-    # Simple bullet normalization
-    text = re.sub(r'(?m)^\s*[-*]\s+', '• ', text)
-
-    # Restore code placeholders
-    for key, value in placeholders.items():
-        text = text.replace(html.escape(key), value)
-        text = text.replace(key, value)
+    # Restore code placeholders in a single pass
+    if placeholders:
+        text = CODE_PLACEHOLDER_RE.sub(lambda m: placeholders[int(m.group(1))], text)
 
     return text
 
 # ---------- Claude-like Advanced Features ----------
 
+def iter_file_chunks(filepath, max_length=3800):
+    """Yield a text file as line-aligned chunks of at most max_length characters in a single pass."""
+    buffer = []
+    length = 0
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if buffer and length + len(line) > max_length:
+                yield ''.join(buffer).rstrip('\n')
+                buffer = []
+                length = 0
+            buffer.append(line)
+            length += len(line)
+    if buffer:
+        yield ''.join(buffer).rstrip('\n')
+
+def read_file_chunks(filepath, max_length=3800):
+    """Return the chunks from iter_file_chunks as a list, for use with asyncio.to_thread."""
+    return list(iter_file_chunks(filepath, max_length=max_length))
+
+def write_text_file(filepath, content):
+    """Write text to filepath, creating parent directories as needed, and return the file size."""
+    dir_path = os.path.dirname(filepath)
+    if dir_path and not os.path.exists(dir_path):
+        os.makedirs(dir_path)
+
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+    return os.path.getsize(filepath)
+
+# Minimum spacing between parts sent to a group chat (Telegram allows ~20 messages/minute per group)
+GROUP_PART_SEND_INTERVAL = 3.0
+
+async def reply_in_parts(message, parts, parse_mode=ParseMode.HTML):
+    """Reply with several messages in order, pacing only group chats and backing off on flood control."""
+    interval = 0.0 if message.chat.type == 'private' else GROUP_PART_SEND_INTERVAL
+    next_send_at = 0.0
+    for part in parts:
+        delay = next_send_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        while True:
+            try:
+                await message.reply_text(part, parse_mode=parse_mode)
+                break
+            except RetryAfter as exc:
+                retry_after = exc.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Flood control hit while sending parts, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+        next_send_at = time.monotonic() + interval
+
+# Minimum spacing between progressive edits of a streamed AI reply in a private chat
+STREAM_EDIT_INTERVAL = 0.5
+_STREAM_END = object()
+
+async def iterate_in_thread(iterable):
+    """Drain a blocking iterator in a worker thread, yielding its items on the event loop."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in iterable:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+    worker = asyncio.ensure_future(asyncio.to_thread(pump))
+    while True:
+        item = await queue.get()
+        if item is _STREAM_END:
+            break
+        yield item
+    await worker
+
+async def stream_ai_reply(message, chunks):
+    """Show a streamed AI reply in one message: the first text is sent, later text lands in at most one edit per throttle window."""
+    interval = STREAM_EDIT_INTERVAL if message.chat.type == 'private' else GROUP_PART_SEND_INTERVAL
+    sent_message = None
+    reply = ''
+    shown = ''
+    next_edit_at = 0.0
+    async for chunk in chunks:
+        reply += chunk
+        if not reply.strip() or time.monotonic() < next_edit_at:
+            continue
+        try:
+            if sent_message is None:
+                sent_message = await message.reply_text(reply)
+            else:
+                await sent_message.edit_text(reply)
+            shown = reply
+            next_edit_at = time.monotonic() + interval
+        except RetryAfter as exc:
+            retry_after = exc.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            logger.warning(f"Flood control hit while streaming a reply, pausing edits for {retry_after}s")
+            next_edit_at = time.monotonic() + retry_after
+        except Exception as e:
+            logger.debug(f"Streaming edit skipped: {e}")
+            next_edit_at = time.monotonic() + interval
+
+    # The final update goes out even inside a throttle window, but waits out flood control
+    delay = next_edit_at - time.monotonic()
+    if delay > interval:
+        await asyncio.sleep(delay)
+
+    if sent_message is None:
+        sent_message = await safe_reply(message, reply)
+        shown = reply
+
+    # Apply Telegram-safe HTML formatting only when the reply carries markdown
+    if MARKDOWN_HINT_RE.search(reply):
+        try:
+            await sent_message.edit_text(format_ai_reply_for_telegram(reply), parse_mode=ParseMode.HTML)
+            return reply
+        except Exception as e:
+            logger.debug(f"HTML formatting skipped: {e}")
+
+    if reply != shown:
+        try:
+            await sent_message.edit_text(reply)
+        except Exception as e:
+            logger.warning(f"Final streamed edit failed: {e}")
+    return reply
+
+@authorized
 async def readfile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /readfile command - read any file in the project"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 1:
         await update.message.reply_text("📄 <b>Read File</b>\n\nUsage: <code>/readfile &lt;filepath&gt;</code>\n\nExample: <code>/readfile bot.py</code>", parse_mode=ParseMode.HTML)
         return
@@ -2720,59 +3137,39 @@ async def readfile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     filepath = ' '.join(context.args)
     
     try:
-        project_dir = os.path.abspath('.')
-        ok, message, preview, truncated = advanced_features.read_file_preview(filepath, project_dir, preview_chars=3500)
+        project_dir = PROJECT_DIR
+        ok, message, preview, truncated = await asyncio.to_thread(
+            advanced_features.read_file_preview, filepath, project_dir, preview_chars=3500
+        )
         if not ok:
             await update.message.reply_text(message)
             return
         
         # Check file size
-        file_size = os.path.getsize(filepath)
+        file_size = await asyncio.to_thread(os.path.getsize, filepath)
         if file_size > 1024 * 1024:  # 1MB limit
             await update.message.reply_text(f"❌ File too large: {file_size/1024/1024:.2f}MB (max 1MB)")
             return
         
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
         # Split into chunks if too long for Telegram (4096 char limit)
-        max_length = 3800
-        if len(content) <= max_length:
-            result = f"📄 <b>{filepath}</b>\n\n<pre>{content}</pre>"
+        chunks = await asyncio.to_thread(read_file_chunks, filepath, 3800) or ['']
+        if len(chunks) == 1:
+            result = f"📄 <b>{filepath}</b>\n\n<pre>{chunks[0]}</pre>"
             await update.message.reply_text(result, parse_mode=ParseMode.HTML)
         else:
-            lines = content.split('\n')
-            chunks = []
-            current_chunk = []
-            current_length = 0
-            
-            for line in lines:
-                if current_length + len(line) + 1 > max_length:
-                    chunks.append('\n'.join(current_chunk))
-                    current_chunk = [line]
-                    current_length = len(line)
-                else:
-                    current_chunk.append(line)
-                    current_length += len(line) + 1
-            
-            if current_chunk:
-                chunks.append('\n'.join(current_chunk))
-            
-            for i, chunk in enumerate(chunks):
-                result = f"📄 <b>{filepath}</b> (Part {i+1}/{len(chunks)})\n\n<pre>{chunk}</pre>"
-                await update.message.reply_text(result, parse_mode=ParseMode.HTML)
-                await asyncio.sleep(0.5)  # Avoid rate limiting
+            parts = [
+                f"📄 <b>{filepath}</b> (Part {i+1}/{len(chunks)})\n\n<pre>{chunk}</pre>"
+                for i, chunk in enumerate(chunks)
+            ]
+            await reply_in_parts(update.message, parts)
         
     except Exception as e:
         logger.error(f"Error reading file: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@authorized
 async def writefile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /writefile command - write content to a file"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 2:
         help_text = """📝 <b>Write File</b>
 
@@ -2791,21 +3188,15 @@ async def writefile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Security check
         abs_path = os.path.abspath(filepath)
-        project_dir = os.path.abspath('.')
+        project_dir = PROJECT_DIR
         
         if not abs_path.startswith(project_dir):
             await update.message.reply_text("❌ Access denied: Can only write files within project directory.")
             return
         
-        # Create directory if it doesn't exist
-        dir_path = os.path.dirname(filepath)
-        if dir_path and not os.path.exists(dir_path):
-            os.makedirs(dir_path)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        file_size = os.path.getsize(filepath)
+        # Create directory if needed and write off the event loop
+        file_size = await asyncio.to_thread(write_text_file, filepath, content)
+        advanced_features.invalidate_search_cache()
         result = f"✅ <b>File Written</b>\n\n"
         result += f"📄 Path: <code>{filepath}</code>\n"
         result += f"📊 Size: {file_size} bytes\n"
@@ -2818,17 +3209,24 @@ async def writefile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error writing file: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+def format_file_size(size):
+    """Format a byte count as B, KB or MB for file listings."""
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 * 1024:
+        return f"{size/1024:.1f}KB"
+    return f"{size/1024/1024:.1f}MB"
+
+@authorized
 async def listfiles_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /listfiles command - list files in directory"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     path = context.args[0] if context.args else '.'
     
     try:
-        project_dir = os.path.abspath('.')
-        ok, message, dirs, files = advanced_features.list_directory_summary(path, project_dir, max_items=50)
+        project_dir = PROJECT_DIR
+        ok, message, dirs, files, total_dirs, total_files = await asyncio.to_thread(
+            advanced_features.list_directory_with_sizes, path, project_dir, 50
+        )
         if not ok:
             await update.message.reply_text(message)
             return
@@ -2837,30 +3235,23 @@ async def listfiles_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         if dirs:
             result += "<b>📁 Directories:</b>\n"
-            for d in dirs[:50]:  # Limit to 50
+            for d in dirs:
                 result += f"  📁 {d}/\n"
-            if len(dirs) > 50:
-                result += f"  <i>... and {len(dirs)-50} more</i>\n"
+            if total_dirs > len(dirs):
+                result += f"  <i>... and {total_dirs - len(dirs)} more</i>\n"
             result += "\n"
         
         if files:
             result += "<b>📄 Files:</b>\n"
-            for f in files[:50]:  # Limit to 50
-                size = os.path.getsize(os.path.join(path, f))
-                if size < 1024:
-                    size_str = f"{size}B"
-                elif size < 1024*1024:
-                    size_str = f"{size/1024:.1f}KB"
-                else:
-                    size_str = f"{size/1024/1024:.1f}MB"
-                result += f"  📄 {f} <i>({size_str})</i>\n"
-            if len(files) > 50:
-                result += f"  <i>... and {len(files)-50} more</i>\n"
+            for f, size in files:
+                result += f"  📄 {f} <i>({format_file_size(size)})</i>\n"
+            if total_files > len(files):
+                result += f"  <i>... and {total_files - len(files)} more</i>\n"
         
         if not dirs and not files:
             result += "<i>Empty directory</i>"
         
-        result += f"\n<b>Total:</b> {len(dirs)} dirs, {len(files)} files"
+        result += f"\n<b>Total:</b> {total_dirs} dirs, {total_files} files"
         
         await update.message.reply_text(result, parse_mode=ParseMode.HTML)
         
@@ -2868,12 +3259,58 @@ async def listfiles_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error listing files: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+# /git subcommands. 'args' is None (ignored), 'append' (passed through) or 'message' (joined into -m);
+# 'check' subcommands report stderr on a non-zero exit, the others always show stdout or 'empty'.
+GIT_SUBCOMMANDS = {
+    'status': {'argv': ('git', 'status', '--short'), 'timeout': 10, 'args': None, 'check': False,
+               'title': "🔀 <b>Git Status</b>\n\n", 'empty': "✅ Working tree clean"},
+    'log': {'argv': ('git', 'log', '--oneline', '-10'), 'timeout': 10, 'args': None, 'check': False,
+            'title': "📜 <b>Recent Commits</b>\n\n", 'empty': "No commits"},
+    'diff': {'argv': ('git', 'diff', '--stat'), 'timeout': 10, 'args': None, 'check': False,
+             'title': "📊 <b>Git Diff</b>\n\n", 'empty': "No changes"},
+    'branch': {'argv': ('git', 'branch'), 'timeout': 10, 'args': None, 'check': False,
+               'title': "🌿 <b>Branches</b>\n\n", 'empty': "No branches"},
+    'add': {'argv': ('git', 'add'), 'timeout': 10, 'args': 'append', 'check': True,
+            'title': "✅ <b>Files staged:</b> ", 'empty': "", 'missing_args': "❌ Please specify file(s) to add"},
+    'commit': {'argv': ('git', 'commit'), 'timeout': 10, 'args': 'message', 'check': True,
+               'title': "✅ <b>Committed:</b>\n", 'empty': "", 'missing_args': "❌ Please provide commit message"},
+    'push': {'argv': ('git', 'push'), 'timeout': 30, 'args': None, 'check': True,
+             'title': "✅ <b>Pushed to remote</b>\n", 'empty': "Success"},
+    'pull': {'argv': ('git', 'pull'), 'timeout': 30, 'args': None, 'check': True,
+             'title': "✅ <b>Pulled from remote</b>\n", 'empty': ""},
+}
+
+async def run_subprocess(argv, timeout, input_data=None):
+    """Run argv without blocking the event loop and return (returncode, stdout, stderr).
+
+    Raises asyncio.TimeoutError (after killing the process) when it does not finish within timeout seconds.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.PIPE if input_data is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(input_data), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode(errors='replace'), stderr.decode(errors='replace')
+
+def format_git_response(spec, git_args, returncode, stdout, stderr):
+    """Format the reply for a /git subcommand run."""
+    if spec['check'] and returncode != 0:
+        return f"❌ Error:\n<pre>{escape_html_text(stderr or '')}</pre>"
+    if spec['args'] == 'append':
+        return f"{spec['title']}{escape_html_text(' '.join(git_args))}"
+    output = (stdout or '').strip() or spec['empty']
+    return f"{spec['title']}<pre>{escape_html_text(output)}</pre>"
+
+@authorized
 async def git_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /git command - git operations"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 1:
         help_text = """🔀 <b>Git Operations</b>
 
@@ -2895,67 +3332,23 @@ async def git_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     git_args = context.args[1:] if len(context.args) > 1 else []
     
     try:
-        if git_cmd == 'status':
-            result = subprocess.run(['git', 'status', '--short'], capture_output=True, text=True, timeout=10)
-            output = result.stdout.strip() if result.stdout else "✅ Working tree clean"
-            response = f"🔀 <b>Git Status</b>\n\n<pre>{output}</pre>"
-            
-        elif git_cmd == 'log':
-            result = subprocess.run(['git', 'log', '--oneline', '-10'], capture_output=True, text=True, timeout=10)
-            output = result.stdout.strip() if result.stdout else "No commits"
-            response = f"📜 <b>Recent Commits</b>\n\n<pre>{output}</pre>"
-            
-        elif git_cmd == 'diff':
-            result = subprocess.run(['git', 'diff', '--stat'], capture_output=True, text=True, timeout=10)
-            output = result.stdout.strip() if result.stdout else "No changes"
-            response = f"📊 <b>Git Diff</b>\n\n<pre>{output}</pre>"
-            
-        elif git_cmd == 'add':
-            if not git_args:
-                response = "❌ Please specify file(s) to add"
-            else:
-                result = subprocess.run(['git', 'add'] + git_args, capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    response = f"✅ <b>Files staged:</b> {' '.join(git_args)}"
-                else:
-                    response = f"❌ Error:\n<pre>{result.stderr}</pre>"
-                    
-        elif git_cmd == 'commit':
-            if not git_args:
-                response = "❌ Please provide commit message"
-            else:
-                commit_msg = ' '.join(git_args)
-                result = subprocess.run(['git', 'commit', '-m', commit_msg], capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    response = f"✅ <b>Committed:</b>\n<pre>{result.stdout}</pre>"
-                else:
-                    response = f"❌ Error:\n<pre>{result.stderr}</pre>"
-                    
-        elif git_cmd == 'push':
-            result = subprocess.run(['git', 'push'], capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                response = f"✅ <b>Pushed to remote</b>\n<pre>{result.stdout or 'Success'}</pre>"
-            else:
-                response = f"❌ Error:\n<pre>{result.stderr}</pre>"
-                
-        elif git_cmd == 'pull':
-            result = subprocess.run(['git', 'pull'], capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                response = f"✅ <b>Pulled from remote</b>\n<pre>{result.stdout}</pre>"
-            else:
-                response = f"❌ Error:\n<pre>{result.stderr}</pre>"
-                
-        elif git_cmd == 'branch':
-            result = subprocess.run(['git', 'branch'], capture_output=True, text=True, timeout=10)
-            output = result.stdout.strip() if result.stdout else "No branches"
-            response = f"🌿 <b>Branches</b>\n\n<pre>{output}</pre>"
-            
-        else:
+        spec = GIT_SUBCOMMANDS.get(git_cmd)
+        if spec is None:
             response = f"❌ Unknown git command: {git_cmd}\n\nUse /git without arguments to see available commands."
+        elif spec['args'] and not git_args:
+            response = spec['missing_args']
+        else:
+            argv = list(spec['argv'])
+            if spec['args'] == 'append':
+                argv += git_args
+            elif spec['args'] == 'message':
+                argv += ['-m', ' '.join(git_args)]
+            returncode, stdout, stderr = await run_subprocess(argv, spec['timeout'])
+            response = format_git_response(spec, git_args, returncode, stdout, stderr)
         
         await update.message.reply_text(response, parse_mode=ParseMode.HTML)
         
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         await update.message.reply_text("❌ Command timed out")
     except FileNotFoundError:
         await update.message.reply_text("❌ Git not found on system")
@@ -2963,12 +3356,21 @@ async def git_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Git command error: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+# Hard wall-clock limit for /exec; user code runs in a separate interpreter that is killed on timeout
+EXEC_TIMEOUT_SECONDS = 5
+# A PyInstaller build's sys.executable is the bot itself, so it re-enters through the hidden --exec-runner flag
+if getattr(sys, 'frozen', False):
+    EXEC_RUNNER_ARGV = (sys.executable, '--exec-runner')
+else:
+    EXEC_RUNNER_ARGV = (
+        sys.executable, '-c',
+        f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(advanced_features.__file__))!r}); "
+        "import advanced_features; advanced_features.restricted_exec_main()",
+    )
+
+@authorized
 async def execcode_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /exec command - execute Python code"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 1:
         help_text = """💻 <b>Execute Python Code</b>
 
@@ -2985,63 +3387,30 @@ async def execcode_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     code = ' '.join(context.args)
     
     try:
-        # Create isolated environment with restricted builtins
-        restricted_globals = {
-            '__builtins__': {
-                'print': print,
-                'len': len,
-                'range': range,
-                'str': str,
-                'int': int,
-                'float': float,
-                'list': list,
-                'dict': dict,
-                'tuple': tuple,
-                'set': set,
-                'bool': bool,
-                'sum': sum,
-                'min': min,
-                'max': max,
-                'abs': abs,
-                'round': round,
-                'sorted': sorted,
-                'enumerate': enumerate,
-                'zip': zip,
-                'map': map,
-                'filter': filter,
-            }
-        }
-        
-        # Capture output
-        import io
-        from contextlib import redirect_stdout
-        
-        output_buffer = io.StringIO()
-        
-        # Run code with timeout
-        with redirect_stdout(output_buffer):
-            exec(code, restricted_globals)
-        
-        output = output_buffer.getvalue()
-        
-        if output:
-            result = f"✅ <b>Code Executed</b>\n\n<b>Output:</b>\n<pre>{output}</pre>"
-        else:
-            result = "✅ <b>Code executed successfully</b> (no output)"
-        
-        await update.message.reply_text(result, parse_mode=ParseMode.HTML)
-        
-    except SyntaxError as e:
-        await update.message.reply_text(f"❌ <b>Syntax Error:</b>\n<pre>{str(e)}</pre>", parse_mode=ParseMode.HTML)
+        _, stdout, _ = await run_subprocess(
+            EXEC_RUNNER_ARGV, EXEC_TIMEOUT_SECONDS, input_data=code.encode('utf-8')
+        )
+        outcome = json.loads(stdout)
+    except asyncio.TimeoutError:
+        await update.message.reply_text(f"❌ <b>Timed out:</b> code did not finish within {EXEC_TIMEOUT_SECONDS}s", parse_mode=ParseMode.HTML)
+        return
     except Exception as e:
-        await update.message.reply_text(f"❌ <b>Error:</b>\n<pre>{str(e)}</pre>", parse_mode=ParseMode.HTML)
+        logger.error(f"Exec runner error: {e}")
+        await update.message.reply_text(f"❌ <b>Error:</b>\n<pre>{escape_html_text(str(e))}</pre>", parse_mode=ParseMode.HTML)
+        return
+
+    if outcome.get('error_type') == 'SyntaxError':
+        await update.message.reply_text(f"❌ <b>Syntax Error:</b>\n<pre>{escape_html_text(outcome['error'])}</pre>", parse_mode=ParseMode.HTML)
+    elif outcome.get('error_type'):
+        await update.message.reply_text(f"❌ <b>Error:</b>\n<pre>{escape_html_text(outcome['error'])}</pre>", parse_mode=ParseMode.HTML)
+    elif outcome.get('output'):
+        await update.message.reply_text(f"✅ <b>Code Executed</b>\n\n<b>Output:</b>\n<pre>{escape_html_text(outcome['output'])}</pre>", parse_mode=ParseMode.HTML)
+    else:
+        await update.message.reply_text("✅ <b>Code executed successfully</b> (no output)", parse_mode=ParseMode.HTML)
 
+@authorized
 async def search_code_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /searchcode command - search for text in project files"""
-    if not is_user_allowed(update.effective_user.id):
-        await update.message.reply_text("You are not authorized to use this bot.")
-        return
-    
     if len(context.args) < 1:
         await update.message.reply_text("🔍 <b>Search Code</b>\n\nUsage: <code>/searchcode &lt;search_term&gt;</code>", parse_mode=ParseMode.HTML)
         return
@@ -3069,6 +3438,252 @@ async def search_code_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         logger.error(f"Code search error: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+# ---------- Message Routes ----------
+# Each route pairs detect(text, user_id, nlu_intent, detections) with an async
+# respond(update, context, detection, user_id) that sends the reply and returns the text to store
+# (None to store nothing). `detections` is a per-message memo for detectors consulted by more than one route.
+
+def cached_detection(detections, detector, text, user_id):
+    """Run a detector at most once per message, reusing its result from the detections memo."""
+    if detector not in detections:
+        detections[detector] = detector(text, user_id)
+    return detections[detector]
+
+def detect_shopping_route(text, user_id, nlu_intent, detections):
+    return detect_shopping_request(text, user_id)
+
+async def respond_shopping(update, context, detection, user_id):
+    action = detection.get('action')
+    if action == 'add':
+        result = handle_shopping_add(detection.get('items'), user_id)
+    elif action == 'list':
+        result = handle_shopping_list(user_id)
+    elif action == 'clear':
+        result = handle_shopping_clear(user_id)
+    else:
+        result = "❌ Unknown shopping list action"
+    await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+    return result
+
+def detect_timer_route(text, user_id, nlu_intent, detections):
+    return detect_timer_request(text, user_id)
+
+async def respond_timer(update, context, detection, user_id):
+    action = detection.get('action')
+    if action == 'create':
+        result = handle_timer_create(detection.get('duration'), user_id)
+    elif action == 'list':
+        result = handle_timer_list(user_id)
+    else:
+        result = "❌ Unknown timer action"
+    await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+    return result
+
+def detect_capability_route(text, user_id, nlu_intent, detections):
+    # Checked before calculations so identity questions are not treated as math
+    return check_capability_question(text, user_id)
+
+async def respond_capability(update, context, detection, user_id):
+    if detection == "USER_ID_REQUEST":
+        # Special case: user asking for their Telegram ID
+        result = f"👤 Your Telegram User ID: `{user_id}`\n\nYou can use this ID to configure bot access."
+    else:
+        result = detection
+    await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
+    return result
+
+def detect_calculation_route(text, user_id, nlu_intent, detections):
+    return detect_calculation_request(text)
+
+async def respond_calculation(update, context, detection, user_id):
+    await update.message.reply_text("🔢 Calculating...")
+    result = handle_calculation(update.message.text)
+    await update.message.reply_text(result)
+    return result
+
+def detect_wikipedia_route(text, user_id, nlu_intent, detections):
+    if nlu_intent == 'wikipedia':
+        detection = {'action': 'wiki', 'query': text}
+    else:
+        detection = detect_wikipedia_request(text, user_id)
+    if detection and nlu_intent != 'search' and not cached_detection(detections, detect_search_request, text, user_id):
+        return detection
+    return None
+
+async def respond_wikipedia(update, context, detection, user_id):
+    query = detection.get('query')
+    await update.message.reply_text(f"📚 Searching Wikipedia for '{query}'...")
+    result = search_wikipedia(query)
+    await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
+    return result
+
+def detect_search_route(text, user_id, nlu_intent, detections):
+    if nlu_intent == 'search':
+        return {'action': 'search', 'query': text}
+    return cached_detection(detections, detect_search_request, text, user_id)
+
+async def respond_search(update, context, detection, user_id):
+    query = detection.get('query')
+    await update.message.reply_text(f"🔍 Searching for '{query}'...")
+    result = search_web(query)
+    await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
+    return result
+
+def detect_news_route(text, user_id, nlu_intent, detections):
+    if nlu_intent == 'news':
+        return {'action': 'news', 'topic': None}
+    return detect_news_request(text, user_id)
+
+async def respond_news(update, context, detection, user_id):
+    topic = detection.get('topic')
+    await update.message.reply_text(f"📰 Fetching news{' about ' + topic if topic else ''}...")
+    result = get_news(topic)
+    await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
+    return result
+
+def detect_status_route(text, user_id, nlu_intent, detections):
+    if nlu_intent == 'status':
+        return {'action': 'status'}
+    return detect_status_request(text, user_id)
+
+async def respond_status(update, context, detection, user_id):
+    await status_command(update, context)
+    return None
+
+def detect_briefing_route(text, user_id, nlu_intent, detections):
+    if nlu_intent == 'briefing':
+        return {'action': 'briefing'}
+    return detect_briefing_request(text, user_id)
+
+async def respond_briefing(update, context, detection, user_id):
+    await update.message.reply_text("📋 Preparing your daily briefing...")
+    result = generate_daily_briefing(user_id)
+    await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
+    return result
+
+def detect_identity_route(text, user_id, nlu_intent, detections):
+    identity_request = interpret_identity_request(text)
+    if identity_request and identity_request.get("action") in ("show_identity", "update_identity"):
+        return identity_request
+    return None
+
+async def respond_identity(update, context, detection, user_id):
+    if detection.get("action") == "show_identity":
+        current_identity = read_identity()
+        await update.message.reply_text(f"🤖 Current Bot Identity:\n\n{current_identity}", parse_mode=ParseMode.MARKDOWN)
+        return current_identity
+
+    await update.message.reply_text("🔄 Updating my identity based on your request...")
+
+    # Use AI to process the identity update with conversation context
+    new_identity = process_identity_update(update.message.text, user_id)
+    if new_identity and update_identity(new_identity):
+        response = f"✅ Identity updated successfully!\n\n{new_identity}"
+        await update.message.reply_text(response, parse_mode=ParseMode.MARKDOWN)
+        return response
+
+    error_msg = "❌ Failed to update identity. Please try again."
+    await update.message.reply_text(error_msg)
+    return error_msg
+
+# Order matters: capability questions precede calculations and Wikipedia defers to explicit searches.
+# The third element lists substrings every regex trigger of that detector contains; a message with
+# none of them skips the detector unless NLU picked an intent or a learned pattern may match.
+# None means the detector always runs.
+MESSAGE_ROUTES = (
+    (detect_shopping_route, respond_shopping, ('list', 'buy')),
+    (detect_timer_route, respond_timer, ('timer', 'countdown')),
+    (detect_capability_route, respond_capability, None),
+    (detect_calculation_route, respond_calculation, ('calculate', 'compute', 'convert', 'how many', *'0123456789')),
+    (detect_wikipedia_route, respond_wikipedia, ('wikipedia', 'tell me about', 'what', 'who')),
+    (detect_search_route, respond_search, ('search', 'google', 'look up', 'find', 'what', 'who', 'where', 'when', 'how', 'why')),
+    (detect_news_route, respond_news, ('news', 'headlines')),
+    (detect_status_route, respond_status, ('status', 'health', 'are you', 'bot info', 'system info')),
+    (detect_briefing_route, respond_briefing, ('brief', 'update', 'summary')),
+    (detect_identity_route, respond_identity, (
+        'identity', 'personality', 'name', 'trait', 'style', 'yourself',
+        'professional', 'casual', 'friendly', 'formal', 'funny', 'serious',
+    )),
+)
+# Learned pattern types consulted by the keyword-gated detectors above
+MESSAGE_ROUTE_LEARNED_TYPES = ('shopping', 'timer', 'wikipedia', 'search', 'news', 'status', 'briefing')
+
+async def analyze_message_nlu(text):
+    """Return the message's (intent hint, embedding), either may be None; the encode runs in a worker thread."""
+    if not nlu_service or not nlu_service.enabled:
+        return None, None
+    try:
+        return (await asyncio.to_thread(nlu_service.analyze, [text]))[0]
+    except Exception as e:
+        logger.debug(f"NLU pass failed: {e}")
+        return None, None
+
+# Semantic cache for AI fallback replies. Entries are grouped by a context hash covering the user's
+# last turn, the identity file, the RAG index and the model, so a similar question only reuses a
+# reply given in the same conversational context.
+AI_RESPONSE_CACHE_MAX_CONTEXTS = 10000
+AI_RESPONSE_CACHE_PER_CONTEXT = 20
+AI_RESPONSE_CACHE_TTL = 60 * 60
+AI_RESPONSE_CACHE_MIN_SIMILARITY = 0.92
+# Replies to these depend on the clock or on fresh data, so they are never cached
+TIME_SENSITIVE_RE = re.compile(r'\b(?:time|date|day|today|tonight|tomorrow|yesterday|now|current|latest|weather|news)\b')
+_ai_response_cache = OrderedDict()
+_last_turn_hashes = {}
+
+def remember_last_turn(user_id, message, reply):
+    _last_turn_hashes[str(user_id)] = hash((message, reply))
+
+def ai_response_context_hash(user_id):
+    key = str(user_id)
+    if key not in _last_turn_hashes:
+        history = database.get_user_chat_history(user_id, limit=1)
+        _last_turn_hashes[key] = hash(tuple(history[-1])) if history else None
+    # Replies are built from this user's own history, so their cache entries are never shared
+    return hash((
+        key, _last_turn_hashes[key], _identity_mtime, _rag_cache.get('signature'),
+        config.AI_BACKEND, config.OLLAMA_MODEL, config.OPENAI_MODEL,
+    ))
+
+def get_cached_ai_response(vector, context_hash):
+    """Return a fresh cached reply whose question embedding is close enough to vector, or None."""
+    entries = _ai_response_cache.get(context_hash)
+    if not entries:
+        return None
+
+    now = time.monotonic()
+    entries[:] = [entry for entry in entries if entry[2] > now]
+    for cached_vector, reply, _ in entries:
+        if nlu_service.similarity(vector, cached_vector) >= AI_RESPONSE_CACHE_MIN_SIMILARITY:
+            _ai_response_cache.move_to_end(context_hash)
+            return reply
+    return None
+
+def cache_ai_response(vector, context_hash, reply):
+    entries = _ai_response_cache.setdefault(context_hash, [])
+    entries.append((vector, reply, time.monotonic() + AI_RESPONSE_CACHE_TTL))
+    del entries[:-AI_RESPONSE_CACHE_PER_CONTEXT]
+    _ai_response_cache.move_to_end(context_hash)
+    while len(_ai_response_cache) > AI_RESPONSE_CACHE_MAX_CONTEXTS:
+        _ai_response_cache.popitem(last=False)
+
+def queue_message_save(platform, user_id, user_name, message, reply):
+    """Hand a conversation row to database.py's batched writer thread; safe to call from any thread."""
+    if platform == "telegram":
+        remember_last_turn(user_id, message, reply)
+    database.save_message(platform, user_id, user_name, message, reply)
+
+async def reply_and_queue_save(message, reply, user_id, user_name, user_message, parse_mode=None):
+    """Queue the conversation row before sending so the batched write overlaps the Telegram round-trip."""
+    queue_message_save("telegram", user_id, user_name, user_message, reply)
+    await message.reply_text(reply, parse_mode=parse_mode)
+
+# Natural-language routing patterns used by handle_message
+PLAN_REQUEST_PREFIXES = ("plan:", "make a plan for ", "create a plan for ")
+PLAN_PREFIX_RE = re.compile(r'^(?:make|create) a plan for\s+', re.IGNORECASE)
+NEXT_STEP_PHRASES = frozenset(["next step", "run next step", "execute next step"])
+RESET_PLAN_PHRASES = frozenset(["reset plan", "clear plan", "cancel plan", "plan reset"])
+COMMAND_KEYWORDS_RE = re.compile(r'run command|execute command|run the command|execute this', re.IGNORECASE)
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     user_id = str(user.id)
@@ -3081,8 +3696,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     logger.info(f"Message from {user_name} ({user_id}): {user_message}")
+    msg_lower = user_message.lower().strip()
 
-    nlu_hint = nlu_service.detect_intent(user_message) if nlu_service else None
+    nlu_hint, message_vector = await analyze_message_nlu(user_message)
     nlu_intent = (nlu_hint or {}).get('intent')
     nlu_confidence = (nlu_hint or {}).get('confidence')
     if nlu_intent:
@@ -3095,16 +3711,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.warning(f"Typing indicator failed, continuing: {exc}")
 
     # Ai Assistant-like planning workflow via natural language
-    msg_lower = user_message.lower().strip()
-    if msg_lower.startswith("plan:") or msg_lower.startswith("make a plan for ") or msg_lower.startswith("create a plan for "):
-        task = user_message.split(':', 1)[1].strip() if ':' in user_message else re.sub(r'^(make|create) a plan for\s+', '', user_message, flags=re.IGNORECASE).strip()
+    if msg_lower.startswith(PLAN_REQUEST_PREFIXES):
+        task = user_message.split(':', 1)[1].strip() if ':' in user_message else PLAN_PREFIX_RE.sub('', user_message).strip()
         context.args = task.split() if task else []
         await plan_command(update, context)
         return
-    if msg_lower in ["next step", "run next step", "execute next step"]:
+    if msg_lower in NEXT_STEP_PHRASES:
         await nextstep_command(update, context)
         return
-    if msg_lower in ["reset plan", "clear plan", "cancel plan", "plan reset"]:
+    if msg_lower in RESET_PLAN_PHRASES:
         await planreset_command(update, context)
         return
 
@@ -3116,7 +3731,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             if action == "listfiles":
                 path = advanced_request.get("path", ".")
-                project_dir = os.path.abspath('.')
+                project_dir = PROJECT_DIR
                 ok, message, dirs, files = advanced_features.list_directory_summary(path, project_dir, max_items=40)
                 if not ok:
                     result = message
@@ -3128,49 +3743,45 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         result += "<b>Files:</b>\n" + "\n".join([f"📄 {f}" for f in files[:40]])
                     if not dirs and not files:
                         result += "<i>Empty directory</i>"
-                await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+                await reply_and_queue_save(update.message, result, user_id, user_name, user_message, parse_mode=ParseMode.HTML)
                 learn_command_like_success(user_id, user_message, "advanced:listfiles", result)
-                database.save_message("telegram", user_id, user_name, user_message, result)
                 return
 
             if action == "readfile":
                 path = advanced_request.get("path")
-                project_dir = os.path.abspath('.')
+                project_dir = PROJECT_DIR
                 ok, message, preview, truncated = advanced_features.read_file_preview(path, project_dir, preview_chars=3500)
                 if not ok:
                     result = message
                 else:
-                    safe_preview = preview.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                    safe_preview = escape_html_text(preview)
                     result = f"📄 <b>{path}</b>\n\n<pre>{safe_preview}</pre>"
                     if truncated:
                         result += "\n<i>Output truncated. Use /readfile for full chunked output.</i>"
-                await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+                await reply_and_queue_save(update.message, result, user_id, user_name, user_message, parse_mode=ParseMode.HTML)
                 learn_command_like_success(user_id, user_message, "advanced:readfile", result)
-                database.save_message("telegram", user_id, user_name, user_message, result)
                 return
 
             if action == "searchcode":
                 query = advanced_request.get("query", "")
                 matches = advanced_features.search_codebase(query)
                 if matches:
-                    safe_matches = "\n".join(matches[:20]).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                    safe_matches = escape_html_text("\n".join(matches[:20]))
                     result = f"🔍 <b>Found {len(matches)} matches:</b>\n\n<pre>{safe_matches}</pre>"
                 else:
                     result = f"❌ No matches found for: <code>{query}</code>"
-                await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+                await reply_and_queue_save(update.message, result, user_id, user_name, user_message, parse_mode=ParseMode.HTML)
                 learn_command_like_success(user_id, user_message, "advanced:searchcode", result)
-                database.save_message("telegram", user_id, user_name, user_message, result)
                 return
 
             if action == "git":
                 args = advanced_request.get("args", [])
-                result_run = subprocess.run(['git'] + args, capture_output=True, text=True, timeout=20)
-                output = (result_run.stdout or result_run.stderr or "No output").strip()
-                safe_output = output.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                _, git_stdout, git_stderr = await run_subprocess(['git'] + args, 20)
+                output = (git_stdout or git_stderr or "No output").strip()
+                safe_output = escape_html_text(output)
                 result = f"🔀 <b>Git {' '.join(args)}</b>\n\n<pre>{safe_output[:3500]}</pre>"
-                await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+                await reply_and_queue_save(update.message, result, user_id, user_name, user_message, parse_mode=ParseMode.HTML)
                 learn_command_like_success(user_id, user_message, f"command_exec:git {' '.join(args)}", output)
-                database.save_message("telegram", user_id, user_name, user_message, result)
                 return
 
             if action == "config":
@@ -3184,15 +3795,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     await update.message.reply_text(f"❌ Invalid config key: {key}")
                     return
                 try:
-                    typed_value = apply_config_update(key, value)
+                    typed_value = await asyncio.to_thread(apply_config_update, key, value)
 
-                    if key in ['DISCORD_BOT_TOKEN', 'DISCORD_ALLOWED_CHANNEL_IDS']:
+                    if key in DISCORD_CONFIG_KEYS:
                         ensure_discord_bridge_running()
 
                     result = f"✅ <b>Configuration Updated</b>\n\n<code>{key}</code> = <code>{typed_value}</code>"
-                    await update.message.reply_text(result, parse_mode=ParseMode.HTML)
+                    await reply_and_queue_save(update.message, result, user_id, user_name, user_message, parse_mode=ParseMode.HTML)
                     learn_command_like_success(user_id, user_message, f"advanced:setconfig:{key}", result)
-                    database.save_message("telegram", user_id, user_name, user_message, result)
                 except ValueError:
                     await update.message.reply_text("❌ Invalid value type for CHAT_HISTORY_LIMIT.")
                 return
@@ -3202,10 +3812,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(f"❌ Tool execution error: {str(e)}")
             return
 
-    # Check if this is an explicit command execution request with keywords
-    command_keywords = ["run command", "execute command", "run the command", "execute this"]
-    msg_lower = user_message.lower()
-
     trello_request = call_service('trello', 'detect_request', user_message, default=None)
     if trello_request:
         trello_result = call_service(
@@ -3217,31 +3823,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             save_user_context=lambda uid, key, value: database.save_user_context(uid, key, value),
             default="❌ Trello service is not available right now.",
         )
-        await update.message.reply_text(trello_result)
-        database.save_message("telegram", user_id, user_name, user_message, trello_result)
+        await reply_and_queue_save(update.message, trello_result, user_id, user_name, user_message)
         return
     
-    if any(keyword in msg_lower for keyword in command_keywords):
-        # Extract the command
-        for keyword in command_keywords:
-            if keyword in msg_lower:
-                # Get everything after the keyword
-                command = user_message[msg_lower.index(keyword) + len(keyword):].strip()
-                # Remove common punctuation
-                command = command.strip(':').strip()
-                
-                if command:
-                    result = run_custom_command(command)
-                    await update.message.reply_text(result)
-                    learn_command_like_success(user_id, user_message, f"command_exec:{command}", result)
-                    database.save_message("telegram", user_id, user_name, user_message, result)
-                    return
-                else:
-                    await update.message.reply_text("Please specify a command to run.\nExample: run command ls -la")
-                    return
+    # Check if this is an explicit command execution request with keywords
+    command_match = COMMAND_KEYWORDS_RE.search(user_message)
+    if command_match:
+        # Get everything after the keyword, minus common punctuation
+        command = user_message[command_match.end():].strip()
+        command = command.strip(':').strip()
+
+        if command:
+            result = run_custom_command(command)
+            await reply_and_queue_save(update.message, result, user_id, user_name, user_message)
+            learn_command_like_success(user_id, user_message, f"command_exec:{command}", result)
+            return
+        else:
+            await update.message.reply_text("Please specify a command to run.\nExample: run command ls -la")
+            return
 
     # Use AI to interpret if this is a command request (smart detection)
-    interpretation = interpret_command_request(user_message, user_id)
+    interpretation = interpret_command_request(user_message, user_id, text_lower=msg_lower)
     
     if interpretation.get("is_command_request") and interpretation.get("confidence") in ["high", "medium"]:
         command = interpretation.get("command", "")
@@ -3256,23 +3858,19 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.message.reply_text(f"🤖 {explanation}...")
                 learn_command_like_success(user_id, user_message, f"browser_auto:{action}", explanation)
                 
-                # Run browser automation in background thread to avoid blocking
+                # Launching the browser and waiting on pages takes seconds, so reply from a
+                # background task instead of holding up this update
+                async def run_automation():
+                    await update.message.reply_text(await automate_browser_async(action, **params))
 
-                def run_automation():
-                    result = automate_browser(action, **params)
-                    # Send result back to user
-                    asyncio.run(update.message.reply_text(result))
-                
-                thread = threading.Thread(target=run_automation)
-                thread.start()
-                database.save_message("telegram", user_id, user_name, user_message, explanation)
+                context.application.create_task(run_automation())
+                queue_message_save("telegram", user_id, user_name, user_message, explanation)
                 return
             else:
                 # Regular command execution
                 result = run_custom_command(command)
-                await update.message.reply_text(result)
+                await reply_and_queue_save(update.message, result, user_id, user_name, user_message)
                 learn_command_like_success(user_id, user_message, f"command_exec:{command}", result)
-                database.save_message("telegram", user_id, user_name, user_message, result)
                 return
 
     # Check if this is a cron job management request (edit, delete, enable, disable, list)
@@ -3280,8 +3878,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         mgmt_result = manage_cron_job_nl(user_message, user_id)
         
         if mgmt_result:
-            await update.message.reply_text(mgmt_result)
-            database.save_message("telegram", user_id, user_name, user_message, mgmt_result)
+            await reply_and_queue_save(update.message, mgmt_result, user_id, user_name, user_message)
             return
 
     # Check if this is a cron job creation request
@@ -3291,15 +3888,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         if cron_result:
             # It was a cron job request
-            await update.message.reply_text(cron_result, parse_mode=ParseMode.MARKDOWN)
-            database.save_message("telegram", user_id, user_name, user_message, cron_result)
+            await reply_and_queue_save(update.message, cron_result, user_id, user_name, user_message, parse_mode=ParseMode.MARKDOWN)
             return
 
     # Check if this is a tracking/reporting request (sleep, exercise, study, etc.)
     tracking_result = detect_tracking_request(user_message, user_id)
     if tracking_result:
-        await update.message.reply_text(tracking_result)
-        database.save_message("telegram", user_id, user_name, user_message, tracking_result)
+        await reply_and_queue_save(update.message, tracking_result, user_id, user_name, user_message)
         return
 
     plugin_outcome = invoke_first_available_method(
@@ -3309,6 +3904,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         nlu_intent=nlu_intent,
         get_user_context=lambda uid, key: database.get_user_context(uid, key),
         save_user_context=lambda uid, key, value: database.save_user_context(uid, key, value),
+        save_user_context_bulk=lambda uid, values: database.save_user_context_bulk(uid, values),
         check_learned_patterns=check_learned_patterns,
         learn_from_interaction=learn_from_interaction,
         ask_ollama=ask_ollama,
@@ -3318,184 +3914,58 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         plugin_reply = plugin_outcome.get('reply', '')
         parse_mode_key = plugin_outcome.get('parse_mode', 'MARKDOWN')
         parse_mode = getattr(ParseMode, parse_mode_key, ParseMode.MARKDOWN)
-        await update.message.reply_text(plugin_reply, parse_mode=parse_mode)
-        database.save_message("telegram", user_id, user_name, user_message, plugin_reply)
+        await reply_and_queue_save(update.message, plugin_reply, user_id, user_name, user_message, parse_mode=parse_mode)
         return
 
     # NOTE: Reminders are now handled as one-time cron jobs
-    # Check if this is a shopping list request
-    shopping_detection = detect_shopping_request(user_message, user_id)
-    if shopping_detection:
-        action = shopping_detection.get('action')
-        if action == 'add':
-            items_text = shopping_detection.get('items')
-            result = handle_shopping_add(items_text, user_id)
-        elif action == 'list':
-            result = handle_shopping_list(user_id)
-        elif action == 'clear':
-            result = handle_shopping_clear(user_id)
-        else:
-            result = "❌ Unknown shopping list action"
-        
-        await update.message.reply_text(result, parse_mode=ParseMode.HTML)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if this is a timer request
-    timer_detection = detect_timer_request(user_message, user_id)
-    if timer_detection:
-        action = timer_detection.get('action')
-        if action == 'create':
-            duration = timer_detection.get('duration')
-            result = handle_timer_create(duration, user_id)
-        elif action == 'list':
-            result = handle_timer_list(user_id)
-        else:
-            result = "❌ Unknown timer action"
-        
-        await update.message.reply_text(result, parse_mode=ParseMode.HTML)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if asking about bot capabilities or identity (BEFORE calculations)
-    capability_response = check_capability_question(user_message, user_id)
-    if capability_response:
-        if capability_response == "USER_ID_REQUEST":
-            # Special case: user asking for their Telegram ID
-            result = f"👤 Your Telegram User ID: `{user_id}`\n\nYou can use this ID to configure bot access."
-            await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
-            database.save_message("telegram", user_id, user_name, user_message, result)
-            return
-        else:
-            await update.message.reply_text(capability_response, parse_mode=ParseMode.MARKDOWN)
-            database.save_message("telegram", user_id, user_name, user_message, capability_response)
-            return
-
-    # Check if this is a calculation or unit conversion request
-    calc_detection = detect_calculation_request(user_message)
-    if calc_detection:
-        await update.message.reply_text("🔢 Calculating...")
-        result = handle_calculation(user_message)
-        await update.message.reply_text(result)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if this is a Wikipedia request
-    wiki_detection = None
-    if nlu_intent == 'wikipedia':
-        wiki_detection = {'action': 'wiki', 'query': user_message}
-    if not wiki_detection:
-        wiki_detection = detect_wikipedia_request(user_message, user_id)
-    if wiki_detection and nlu_intent != 'search' and not detect_search_request(user_message, user_id):
-        query = wiki_detection.get('query')
-        await update.message.reply_text(f"📚 Searching Wikipedia for '{query}'...")
-        result = search_wikipedia(query)
-        await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if this is a web search request
-    search_detection = None
-    if nlu_intent == 'search':
-        search_detection = {'action': 'search', 'query': user_message}
-    if not search_detection:
-        search_detection = detect_search_request(user_message, user_id)
-    if search_detection:
-        query = search_detection.get('query')
-        await update.message.reply_text(f"🔍 Searching for '{query}'...")
-        result = search_web(query)
-        await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if this is a news request
-    news_detection = None
-    if nlu_intent == 'news':
-        news_detection = {'action': 'news', 'topic': None}
-    if not news_detection:
-        news_detection = detect_news_request(user_message, user_id)
-    if news_detection:
-        topic = news_detection.get('topic')
-        msg = f"📰 Fetching news{' about ' + topic if topic else ''}..."
-        await update.message.reply_text(msg)
-        result = get_news(topic)
-        await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
-        database.save_message("telegram", user_id, user_name, user_message, result)
-        return
-
-    # Check if this is a status request
-    status_detection = None
-    if nlu_intent == 'status':
-        status_detection = {'action': 'status'}
-    if not status_detection:
-        status_detection = detect_status_request(user_message, user_id)
-    if status_detection:
-        await status_command(update, context)
-        return
-
-    # Check if this is a daily briefing request
-    briefing_detection = None
-    if nlu_intent == 'briefing':
-        briefing_detection = {'action': 'briefing'}
-    if not briefing_detection:
-        briefing_detection = detect_briefing_request(user_message, user_id)
-    if briefing_detection:
-        await update.message.reply_text("📋 Preparing your daily briefing...")
-        result = generate_daily_briefing(user_id)
-        await update.message.reply_text(result, parse_mode=ParseMode.MARKDOWN)
-        database.save_message("telegram", user_id, user_name, user_message, result)
+    # Feature detectors run in MESSAGE_ROUTES order; the first match replies and ends handling
+    detections = {}
+    learned_route_match = None
+    for detect, respond, keywords in MESSAGE_ROUTES:
+        if keywords and not nlu_intent and not any(keyword in msg_lower for keyword in keywords):
+            # One learned-pattern lookup stands in for the per-type checks of every skipped detector
+            if learned_route_match is None:
+                learned_route_match = database.has_matching_learned_pattern(user_id, msg_lower, MESSAGE_ROUTE_LEARNED_TYPES)
+            if not learned_route_match:
+                continue
+        detection = detect(user_message, user_id, nlu_intent, detections)
+        if not detection:
+            continue
+        reply = await respond(update, context, detection, user_id)
+        if reply is not None:
+            queue_message_save("telegram", user_id, user_name, user_message, reply)
         return
 
-    # Check if this is an identity-related request
-    identity_request = interpret_identity_request(user_message)
-    if identity_request:
-        action = identity_request.get("action")
-        
-        if action == "show_identity":
-            current_identity = read_identity()
-            await update.message.reply_text(f"🤖 Current Bot Identity:\n\n{current_identity}", parse_mode=ParseMode.MARKDOWN)
-            database.save_message("telegram", user_id, user_name, user_message, current_identity)
-            return
-        
-        elif action == "update_identity":
-            await update.message.reply_text("🔄 Updating my identity based on your request...")
-            
-            # Use AI to process the identity update with conversation context
-            new_identity = process_identity_update(user_message, user_id)
-            
-            if new_identity and update_identity(new_identity):
-                response = f"✅ Identity updated successfully!\n\n{new_identity}"
-                await update.message.reply_text(response, parse_mode=ParseMode.MARKDOWN)
-                database.save_message("telegram", user_id, user_name, user_message, response)
+    # A near-identical question asked in the same context reuses the earlier reply
+    context_hash = None
+    if message_vector is not None and not TIME_SENSITIVE_RE.search(msg_lower):
+        # The first lookup for a user reads their last turn from SQLite, so keep it off the event loop
+        context_hash = await asyncio.to_thread(ai_response_context_hash, user_id)
+        cached_reply = get_cached_ai_response(message_vector, context_hash)
+        if cached_reply is not None:
+            if MARKDOWN_HINT_RE.search(cached_reply):
+                await safe_reply(update.message, format_ai_reply_for_telegram(cached_reply), preferred_mode=ParseMode.HTML)
             else:
-                error_msg = "❌ Failed to update identity. Please try again."
-                await update.message.reply_text(error_msg)
-                database.save_message("telegram", user_id, user_name, user_message, error_msg)
+                await safe_reply(update.message, cached_reply)
+            queue_message_save("telegram", user_id, user_name, user_message, cached_reply)
             return
 
-    # Regular AI response with chat history context
-    ai_reply = get_ai_response(user_message, user_id, use_rag=True)
-    formatted_ai_reply = format_ai_reply_for_telegram(ai_reply)
-
-    # Send plain text first, then try to apply Telegram-safe HTML formatting
-    sent_message = await safe_reply(update.message, ai_reply)
-    
-    # Try to edit with HTML formatting
-    try:
-        await sent_message.edit_text(formatted_ai_reply, parse_mode=ParseMode.HTML)
-    except Exception as e:
-        # If formatting fails, message stays as plain text (already sent)
-        logger.debug(f"HTML formatting skipped: {e}")
-
-    # Save to database
-    database.save_message("telegram", user_id, user_name, user_message, ai_reply)
+    # Regular AI response with chat history context, streamed into a single message as it is generated
+    ai_chunks = iterate_in_thread(get_ai_response_stream(user_message, user_id, use_rag=True))
+    ai_reply = await stream_ai_reply(update.message, ai_chunks)
+    if context_hash is not None and ai_reply.strip() and ai_reply not in AI_ERROR_REPLIES:
+        cache_ai_response(message_vector, context_hash, ai_reply)
+    queue_message_save("telegram", user_id, user_name, user_message, ai_reply)
 
 
 def _chunk_text(text, max_length=1900):
+    """Yield the reply lazily in max_length slices; a reply that fits is yielded as-is without copying."""
     content = (text or "").strip()
-    if not content:
-        return [""]
-    return [content[index:index + max_length] for index in range(0, len(content), max_length)]
+    if len(content) <= max_length:
+        yield content
+        return
+    for index in range(0, len(content), max_length):
+        yield content[index:index + max_length]
 
 
 def _parse_allowed_channel_ids(raw_value):
@@ -3525,7 +3995,7 @@ def process_external_message(platform_name, user_id, user_name, user_message):
         action = identity_request.get("action")
         if action == "show_identity":
             response = read_identity()
-            database.save_message(platform_name, user_id, user_name, user_message, response)
+            queue_message_save(platform_name, user_id, user_name, user_message, response)
             return response
         if action == "update_identity":
             new_identity = process_identity_update(user_message, user_id)
@@ -3533,21 +4003,21 @@ def process_external_message(platform_name, user_id, user_name, user_message):
                 response = f"Identity updated successfully.\n\n{new_identity}"
             else:
                 response = "Failed to update identity. Please try again."
-            database.save_message(platform_name, user_id, user_name, user_message, response)
+            queue_message_save(platform_name, user_id, user_name, user_message, response)
             return response
 
     tracking_response = detect_tracking_request(user_message, user_id)
     if tracking_response:
-        database.save_message(platform_name, user_id, user_name, user_message, tracking_response)
+        queue_message_save(platform_name, user_id, user_name, user_message, tracking_response)
         return tracking_response
 
     ai_reply = get_ai_response(user_message, user_id, use_rag=True)
-    database.save_message(platform_name, user_id, user_name, user_message, ai_reply)
+    queue_message_save(platform_name, user_id, user_name, user_message, ai_reply)
     return ai_reply
 
 
-def start_discord_bot():
-    """Start Discord listener if DISCORD_BOT_TOKEN is configured."""
+async def run_discord_bot():
+    """Run the Discord listener on the current event loop if DISCORD_BOT_TOKEN is configured."""
     if not config.DISCORD_BOT_TOKEN:
         logger.info("DISCORD_BOT_TOKEN not set. Discord bridge disabled.")
         return
@@ -3582,33 +4052,52 @@ def start_discord_bot():
         discord_user_id = str(message.author.id)
         discord_user_name = message.author.display_name or message.author.name or "Unknown"
 
-        response_text = process_external_message("discord", discord_user_id, discord_user_name, incoming_text)
+        # The shared pipeline makes blocking AI/DB calls, so keep it off the shared event loop
+        response_text = await asyncio.to_thread(
+            process_external_message, "discord", discord_user_id, discord_user_name, incoming_text
+        )
         for chunk in _chunk_text(response_text, max_length=1900):
             await message.channel.send(chunk)
 
     try:
-        asyncio.run(client.start(config.DISCORD_BOT_TOKEN))
+        async with client:
+            await client.start(config.DISCORD_BOT_TOKEN)
     except Exception as error:
         logger.error(f"Discord bridge stopped due to error: {error}", exc_info=True)
 
 
-def ensure_discord_bridge_running():
-    """Start Discord bridge thread if token exists and thread is not running."""
-    global discord_thread
+def start_discord_task():
+    """Create the Discord bridge task on the running loop unless one is already active."""
+    global discord_task
+    if discord_task is None or discord_task.done():
+        discord_task = asyncio.get_running_loop().create_task(run_discord_bot())
 
+def ensure_discord_bridge_running():
+    """Start the Discord bridge on the Telegram event loop if a token exists and it is not running."""
     if not config.DISCORD_BOT_TOKEN:
         return False
 
-    if discord_thread and discord_thread.is_alive():
+    if discord_task and not discord_task.done():
         return True
 
-    discord_thread = threading.Thread(target=start_discord_bot, daemon=True)
-    discord_thread.start()
-    logger.info("Discord bridge thread started from dynamic config update")
+    if main_event_loop is None or not main_event_loop.is_running():
+        logger.info("Discord bridge will start with the bot's event loop")
+        return False
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is main_event_loop:
+        start_discord_task()
+    else:
+        main_event_loop.call_soon_threadsafe(start_discord_task)
+    logger.info("Discord bridge started on the main event loop")
     return True
 
 # ---------- Flask Web UI ----------
-from flask import Flask, Response, render_template_string, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify
 
 app = Flask(__name__)
 
@@ -3653,10 +4142,17 @@ def verify_dashboard_token(token):
         return False
 
     try:
-        jwt_module.decode(token, config.DASHBOARD_JWT_SECRET, algorithms=[config.DASHBOARD_JWT_ALGORITHM])
-        return True
+        expires_at = decode_dashboard_token_expiry(token, config.DASHBOARD_JWT_SECRET, config.DASHBOARD_JWT_ALGORITHM)
     except Exception:
         return False
+    return expires_at is None or time.time() < expires_at
+
+
+@functools.lru_cache(maxsize=1024)
+def decode_dashboard_token_expiry(token, secret, algorithm):
+    """Verify a dashboard JWT signature once per token/secret and return its exp claim (None if absent)."""
+    payload = get_jwt_module().decode(token, secret, algorithms=[algorithm])
+    return payload.get("exp")
 
 
 def get_dashboard_token_from_request():
@@ -3672,15 +4168,10 @@ def dashboard_auth_failed():
         401,
     )
 
-@app.route('/')
-def dashboard():
-    token = get_dashboard_token_from_request()
-    if not verify_dashboard_token(token):
-        return dashboard_auth_failed()
+DASHBOARD_MESSAGE_LIMIT = 20
 
-    messages = database.get_recent_messages(20)
-    # Simple HTML template (inline for simplicity)
-    html = '''
+# Inline dashboard templates, parsed once at import instead of on every request
+DASHBOARD_TEMPLATE = app.jinja_env.from_string('''
     <!doctype html>
     <title>MyPyBot Dashboard</title>
     <h1>🤖 MyPyBot Gateway</h1>
@@ -3695,11 +4186,11 @@ def dashboard():
         </tr>
         {% for msg in messages %}
         <tr>
-            <td>{{ msg[0] }}</td>
-            <td>{{ msg[1] }}</td>
-            <td>{{ msg[2] }}</td>
-            <td>{{ msg[3][:50] }}{% if msg[3]|length > 50 %}...{% endif %}</td>
-            <td>{{ msg[4] }}</td>
+            <td>{{ msg['platform'] }}</td>
+            <td>{{ msg['user'] }}</td>
+            <td>{{ msg['message'] }}</td>
+            <td>{{ msg['reply'][:50] }}{% if msg['reply']|length > 50 %}...{% endif %}</td>
+            <td>{{ msg['timestamp'] }}</td>
         </tr>
         {% endfor %}
     </table>
@@ -3707,27 +4198,39 @@ def dashboard():
         <script>
             const token = "{{ token }}";
             const refreshMs = {{ refresh_ms }};
+            const maxRows = {{ max_rows }};
+            let lastId = {{ messages[0]['id'] if messages else 0 }};
+
+            function escapeHtml(value) {
+                const div = document.createElement('div');
+                div.textContent = value || "";
+                return div.innerHTML;
+            }
 
             async function refreshMessages() {
                 try {
-                    const response = await fetch(`/api/messages?token=${encodeURIComponent(token)}`);
+                    // Only rows newer than the newest one shown are fetched and prepended
+                    const response = await fetch(`/api/messages?token=${encodeURIComponent(token)}&since=${lastId}`);
                     if (!response.ok) return;
                     const data = await response.json();
+                    if (!data.messages.length) return;
+                    lastId = data.messages[0].id;
                     const rows = data.messages.map(msg => {
                         const reply = msg.reply && msg.reply.length > 50 ? msg.reply.slice(0, 50) + "..." : (msg.reply || "");
                         return `<tr>
-                            <td>${msg.platform || ""}</td>
-                            <td>${msg.user || ""}</td>
-                            <td>${msg.message || ""}</td>
-                            <td>${reply}</td>
-                            <td>${msg.timestamp || ""}</td>
+                            <td>${escapeHtml(msg.platform)}</td>
+                            <td>${escapeHtml(msg.user)}</td>
+                            <td>${escapeHtml(msg.message)}</td>
+                            <td>${escapeHtml(reply)}</td>
+                            <td>${escapeHtml(msg.timestamp)}</td>
                         </tr>`;
                     }).join('');
                     const table = document.querySelector('table');
-                    const header = table.querySelector('tr');
-                    table.innerHTML = '';
-                    table.appendChild(header);
-                    table.insertAdjacentHTML('beforeend', rows);
+                    table.querySelector('tr').insertAdjacentHTML('afterend', rows);
+                    const tableRows = table.querySelectorAll('tr');
+                    for (let i = tableRows.length - 1; i > maxRows; i--) {
+                        tableRows[i].remove();
+                    }
                 } catch (e) {
                     console.error('Dashboard refresh failed', e);
                 }
@@ -3735,12 +4238,40 @@ def dashboard():
 
             setInterval(refreshMessages, refreshMs);
         </script>
-    '''
-    return render_template_string(
-        html,
+    ''')
+
+CONFIG_TEMPLATE = app.jinja_env.from_string('''
+    <!doctype html>
+    <title>Configuration</title>
+    <h1>⚙️ Configuration</h1>
+    <form method="post" action="/config{% if token %}?token={{ token }}{% endif %}">
+        <label>Allowed User IDs (comma-separated):</label><br>
+        <input type="text" name="allowed_users" value="{{ allowed_users }}" size="50"><br><br>
+        <label>AI Backend:</label><br>
+        <select name="ai_backend">
+            <option value="ollama" {% if ai_backend == 'ollama' %}selected{% endif %}>Ollama</option>
+            <option value="openai" {% if ai_backend == 'openai' %}selected{% endif %}>OpenAI</option>
+        </select><br><br>
+        <label>Ollama Model:</label><br>
+        <input type="text" name="ollama_model" value="{{ ollama_model }}"><br><br>
+        <input type="submit" value="Save">
+    </form>
+    <p><a href="/{% if token %}?token={{ token }}{% endif %}">Back to Dashboard</a></p>
+    ''')
+
+@app.route('/')
+def dashboard():
+    token = get_dashboard_token_from_request()
+    if not verify_dashboard_token(token):
+        return dashboard_auth_failed()
+
+    messages = database.get_recent_messages(DASHBOARD_MESSAGE_LIMIT)
+    return render_template(
+        DASHBOARD_TEMPLATE,
         messages=messages,
         token=token or "",
         refresh_ms=max(1000, config.DASHBOARD_AUTO_REFRESH_SECONDS * 1000),
+        max_rows=DASHBOARD_MESSAGE_LIMIT,
     )
 
 
@@ -3750,19 +4281,19 @@ def api_messages():
     if not verify_dashboard_token(token):
         return jsonify({"error": "unauthorized"}), 401
 
-    messages = database.get_recent_messages(20)
-    data = []
-    for msg in messages:
-        data.append({
-            "platform": msg[0],
-            "user": msg[1],
-            "message": msg[2],
-            "reply": msg[3],
-            "timestamp": msg[4],
-        })
-    return jsonify({"messages": data})
+    since = request.args.get("since", type=int)
+    if since is None:
+        messages = database.get_recent_messages(DASHBOARD_MESSAGE_LIMIT)
+    else:
+        messages = database.get_messages_since(since, DASHBOARD_MESSAGE_LIMIT)
+    return jsonify({"messages": [dict(row) for row in messages]})
 
 
+# Pre-encoded TwiML envelope; only the escaped reply is encoded per request
+TWIML_EMPTY_RESPONSE = b'<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
+TWIML_MESSAGE_OPEN = b'<?xml version="1.0" encoding="UTF-8"?><Response><Message>'
+TWIML_MESSAGE_CLOSE = b'</Message></Response>'
+
 @app.route('/webhook/whatsapp', methods=['POST'])
 def whatsapp_webhook():
     """Twilio WhatsApp webhook endpoint."""
@@ -3775,15 +4306,10 @@ def whatsapp_webhook():
     user_name = (request.form.get('ProfileName') or '').strip() or 'WhatsApp User'
 
     if not user_message:
-        twiml = "<?xml version=\"1.0\" encoding=\"UTF-8\"?><Response></Response>"
-        return Response(twiml, mimetype='application/xml')
+        return Response(TWIML_EMPTY_RESPONSE, mimetype='application/xml')
 
     response_text = process_external_message("whatsapp", user_id, user_name, user_message)
-    safe_text = html.escape(response_text, quote=False)
-    twiml = (
-        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
-        f"<Response><Message>{safe_text}</Message></Response>"
-    )
+    twiml = TWIML_MESSAGE_OPEN + escape_html_text(response_text).encode('utf-8') + TWIML_MESSAGE_CLOSE
     return Response(twiml, mimetype='application/xml')
 
 @app.route('/config', methods=['GET', 'POST'])
@@ -3798,6 +4324,7 @@ def config_page():
         ai_backend = request.form.get('ai_backend', 'ollama')
         ollama_model = request.form.get('ollama_model', 'llama3.2')
         database.set_config('allowed_users', allowed_users)
+        refresh_allowed_users()
         database.set_config('ai_backend', ai_backend)
         database.set_config('ollama_model', ollama_model)
         if token:
@@ -3809,26 +4336,8 @@ def config_page():
     ai_backend = database.get_config('ai_backend', config.AI_BACKEND)
     ollama_model = database.get_config('ollama_model', config.OLLAMA_MODEL)
 
-    html = '''
-    <!doctype html>
-    <title>Configuration</title>
-    <h1>⚙️ Configuration</h1>
-    <form method="post" action="/config{% if token %}?token={{ token }}{% endif %}">
-        <label>Allowed User IDs (comma-separated):</label><br>
-        <input type="text" name="allowed_users" value="{{ allowed_users }}" size="50"><br><br>
-        <label>AI Backend:</label><br>
-        <select name="ai_backend">
-            <option value="ollama" {% if ai_backend == 'ollama' %}selected{% endif %}>Ollama</option>
-            <option value="openai" {% if ai_backend == 'openai' %}selected{% endif %}>OpenAI</option>
-        </select><br><br>
-        <label>Ollama Model:</label><br>
-        <input type="text" name="ollama_model" value="{{ ollama_model }}"><br><br>
-        <input type="submit" value="Save">
-    </form>
-    <p><a href="/{% if token %}?token={{ token }}{% endif %}">Back to Dashboard</a></p>
-    '''
-    return render_template_string(
-        html,
+    return render_template(
+        CONFIG_TEMPLATE,
         allowed_users=allowed_users,
         ai_backend=ai_backend,
         ollama_model=ollama_model,
@@ -3897,6 +4406,7 @@ async def setup_bot_commands(application):
         BotCommand("addjob", "Add a scheduled task manually"),
         BotCommand("listjobs", "List all scheduled tasks and reminders"),
         BotCommand("removejob", "Remove a scheduled task (use: /removejob <name>)"),
+        BotCommand("removejobs", "Remove several scheduled tasks at once"),
         BotCommand("run", "Execute a system command (use: /run <command>)"),
         BotCommand("sendto", "Send Telegram message to chat_id"),
     ]
@@ -3904,27 +4414,38 @@ async def setup_bot_commands(application):
     logger.info("Bot commands menu registered with Telegram")
 
 # ---------- Main ----------
+def install_uvloop_policy():
+    """Use uvloop for every event loop the bot creates when it is installed."""
+    if sys.platform == 'win32':
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed; using the default asyncio event loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("uvloop event loop policy installed")
+    return True
+
+
 def main():
-    global bot_instance, discord_thread
+    global bot_instance
+
+    install_uvloop_policy()
 
     if not ensure_runtime_onboarding():
         logger.error("Onboarding/config validation failed. Exiting.")
         return
 
     maybe_sync_skill_metadata_on_startup()
+    # Read skill metadata before the first update or web request arrives
+    initialize_registry()
     
     # Start Flask in a background thread
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
     logger.info("Web UI started at http://127.0.0.1:3000")
 
-    if config.DISCORD_BOT_TOKEN:
-        discord_thread = threading.Thread(target=start_discord_bot, daemon=True)
-        discord_thread.start()
-        logger.info("Discord bridge thread started")
-    else:
-        logger.info("Discord bridge not started (DISCORD_BOT_TOKEN missing)")
-
     # Start Telegram bot
     app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
     bot_instance = app  # Store global reference for cron jobs
@@ -3959,23 +4480,55 @@ def main():
     app.add_handler(CommandHandler("addjob", addjob_command))
     app.add_handler(CommandHandler("listjobs", listjobs_command))
     app.add_handler(CommandHandler("removejob", removejob_command))
+    app.add_handler(CommandHandler("removejobs", removejobs_command))
     app.add_handler(CommandHandler("run", run_command))
     app.add_handler(CommandHandler("sendto", sendto_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_error_handler(error_handler)
 
-    # Start scheduler and load cron jobs
-    scheduler.start()
-    load_cron_jobs()
-    logger.info("Scheduler started and cron jobs loaded")
-
     logger.info("Bot started. Polling for messages...")
     
     # Initialize and set up commands before polling
     async def post_init(application):
-        await setup_bot_commands(application)
+        global main_event_loop
+        main_event_loop = asyncio.get_running_loop()
+
+        # Start the scheduler on the application's loop
+        scheduler.start()
+        schedule_db_maintenance()
+
+        if config.DISCORD_BOT_TOKEN:
+            ensure_discord_bridge_running()
+        else:
+            logger.info("Discord bridge not started (DISCORD_BOT_TOKEN missing)")
+
+        # Load cron jobs in a worker thread while the command menu request is in flight;
+        # AsyncIOScheduler hands add_job wakeups back to its loop thread-safely
+        await asyncio.gather(
+            setup_bot_commands(application),
+            asyncio.to_thread(load_cron_jobs),
+        )
+        logger.info("Scheduler started and cron jobs loaded")
+
+    async def post_shutdown(application):
+        global discord_task
+        # Disconnect the Discord bridge; cancelling it exits the client's context and closes it
+        bridge_task, discord_task = discord_task, None
+        if bridge_task is not None:
+            bridge_task.cancel()
+            try:
+                await bridge_task
+            except asyncio.CancelledError:
+                pass
+
+        # Let the writer thread commit anything still queued
+        await asyncio.to_thread(database.flush_messages)
+
+        # Release the pooled SQLite connections once the last writer has flushed
+        database.close_all()
     
     app.post_init = post_init
+    app.post_shutdown = post_shutdown
     app.run_polling()
 
 if __name__ == "__main__":
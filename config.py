@@ -4,78 +4,105 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+
+def _load_config_cache():
+    """Return the .env values compiled by scripts/make_config_cache.py, or None if disabled, missing or stale"""
+    if os.environ.get("USE_CONFIG_CACHE") != "1":
+        return None
+    try:
+        import config_cache
+    except ImportError:
+        return None
+    # An .env edited after the cache was generated wins, so setup/setconfig changes are never masked
+    if os.path.exists(ENV_FILE) and os.path.getmtime(ENV_FILE) > os.path.getmtime(config_cache.__file__):
+        return None
+    return config_cache.ENV
+
+
+# Load environment variables from .env file (or its precompiled cache); existing variables take precedence
+_config_cache = _load_config_cache()
+if _config_cache is None:
+    load_dotenv()
+else:
+    for _key, _value in _config_cache.items():
+        os.environ.setdefault(_key, _value)
+
+# Read every setting from one snapshot of the environment
+_env = dict(os.environ)
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+
+def _bool(key, default):
+    return _env.get(key, default).strip().lower() in _TRUE_VALUES
+
 
 # Telegram Bot Token (get from @BotFather)
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_BOT_TOKEN = _env.get("TELEGRAM_BOT_TOKEN", "")
 
 # Discord Configuration
-DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN", "")
-DISCORD_ALLOWED_CHANNEL_IDS = os.getenv("DISCORD_ALLOWED_CHANNEL_IDS", "")
+DISCORD_BOT_TOKEN = _env.get("DISCORD_BOT_TOKEN", "")
+DISCORD_ALLOWED_CHANNEL_IDS = _env.get("DISCORD_ALLOWED_CHANNEL_IDS", "")
 
 # WhatsApp (Twilio) Configuration
-WHATSAPP_TWILIO_ACCOUNT_SID = os.getenv("WHATSAPP_TWILIO_ACCOUNT_SID", "")
-WHATSAPP_TWILIO_AUTH_TOKEN = os.getenv("WHATSAPP_TWILIO_AUTH_TOKEN", "")
-WHATSAPP_TWILIO_NUMBER = os.getenv("WHATSAPP_TWILIO_NUMBER", "")
-WHATSAPP_WEBHOOK_VERIFY_TOKEN = os.getenv("WHATSAPP_WEBHOOK_VERIFY_TOKEN", "")
+WHATSAPP_TWILIO_ACCOUNT_SID = _env.get("WHATSAPP_TWILIO_ACCOUNT_SID", "")
+WHATSAPP_TWILIO_AUTH_TOKEN = _env.get("WHATSAPP_TWILIO_AUTH_TOKEN", "")
+WHATSAPP_TWILIO_NUMBER = _env.get("WHATSAPP_TWILIO_NUMBER", "")
+WHATSAPP_WEBHOOK_VERIFY_TOKEN = _env.get("WHATSAPP_WEBHOOK_VERIFY_TOKEN", "")
 
 # AI Backend: "ollama" or "openai"
-AI_BACKEND = os.getenv("AI_BACKEND", "ollama")
+AI_BACKEND = _env.get("AI_BACKEND", "ollama")
 
 # Ollama Configuration
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434/api/generate")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+OLLAMA_URL = _env.get("OLLAMA_URL", "http://127.0.0.1:11434/api/generate")
+OLLAMA_MODEL = _env.get("OLLAMA_MODEL", "llama3.2")
 
 # Performance Settings
-CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "5"))  # Number of previous messages to remember
+CHAT_HISTORY_LIMIT = int(_env.get("CHAT_HISTORY_LIMIT", "5"))  # Number of previous messages to remember
 
 # Skill metadata auto-sync settings
-raw_auto_sync_skill_metadata = os.getenv("AUTO_SYNC_SKILL_METADATA", "true").strip().lower()
-AUTO_SYNC_SKILL_METADATA = raw_auto_sync_skill_metadata in ["1", "true", "yes", "on"]
-raw_skill_metadata_sync_only_missing = os.getenv("SKILL_METADATA_SYNC_ONLY_MISSING", "false").strip().lower()
-SKILL_METADATA_SYNC_ONLY_MISSING = raw_skill_metadata_sync_only_missing in ["1", "true", "yes", "on"]
+AUTO_SYNC_SKILL_METADATA = _bool("AUTO_SYNC_SKILL_METADATA", "true")
+SKILL_METADATA_SYNC_ONLY_MISSING = _bool("SKILL_METADATA_SYNC_ONLY_MISSING", "false")
 
 # Universal NLU Configuration (semantic intent fallback)
-raw_nlu_enabled = os.getenv("NLU_ENABLED", "true").strip().lower()
-NLU_ENABLED = raw_nlu_enabled in ["1", "true", "yes", "on"]
-NLU_MODEL = os.getenv("NLU_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-NLU_MIN_CONFIDENCE = float(os.getenv("NLU_MIN_CONFIDENCE", "0.22"))
+NLU_ENABLED = _bool("NLU_ENABLED", "true")
+NLU_MODEL = _env.get("NLU_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+NLU_MIN_CONFIDENCE = float(_env.get("NLU_MIN_CONFIDENCE", "0.22"))
 
 # RAG Configuration
-raw_rag_enabled = os.getenv("RAG_ENABLED", "true").strip().lower()
-RAG_ENABLED = raw_rag_enabled in ["1", "true", "yes", "on"]
-RAG_KB_DIR = os.getenv("RAG_KB_DIR", "knowledge")
-RAG_CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "700"))
-RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
-RAG_MAX_CONTEXT_CHARS = int(os.getenv("RAG_MAX_CONTEXT_CHARS", "2000"))
+RAG_ENABLED = _bool("RAG_ENABLED", "true")
+RAG_KB_DIR = _env.get("RAG_KB_DIR", "knowledge")
+RAG_CHUNK_SIZE = int(_env.get("RAG_CHUNK_SIZE", "700"))
+RAG_TOP_K = int(_env.get("RAG_TOP_K", "3"))
+RAG_MAX_CONTEXT_CHARS = int(_env.get("RAG_MAX_CONTEXT_CHARS", "2000"))
 
 # OpenAI Configuration (if using OpenAI backend)
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_API_KEY = _env.get("OPENAI_API_KEY", "")
+OPENAI_MODEL = _env.get("OPENAI_MODEL", "gpt-3.5-turbo")
 
 # Gmail Configuration
-GMAIL_EMAIL = os.getenv("GMAIL_EMAIL", "")
-GMAIL_APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD", "")  # Get from Google Account Settings > Security > App passwords
+GMAIL_EMAIL = _env.get("GMAIL_EMAIL", "")
+GMAIL_APP_PASSWORD = _env.get("GMAIL_APP_PASSWORD", "")  # Get from Google Account Settings > Security > App passwords
 
 # Cron Job Configuration
 # Your Telegram user ID (for sending cron notifications)
-CRON_NOTIFY_USER_ID = os.getenv("CRON_NOTIFY_USER_ID", "")  # Your Telegram user ID
+CRON_NOTIFY_USER_ID = _env.get("CRON_NOTIFY_USER_ID", "")  # Your Telegram user ID
 
 # Weather Configuration
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
-DEFAULT_CITY = os.getenv("DEFAULT_CITY", "London")
-DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "GB")
+OPENWEATHER_API_KEY = _env.get("OPENWEATHER_API_KEY", "")
+DEFAULT_CITY = _env.get("DEFAULT_CITY", "London")
+DEFAULT_COUNTRY_CODE = _env.get("DEFAULT_COUNTRY_CODE", "GB")
 
 # News Configuration
-NEWSAPI_KEY = os.getenv("NEWSAPI_KEY", "")
+NEWSAPI_KEY = _env.get("NEWSAPI_KEY", "")
 
 # Trello Configuration
-TRELLO_API_KEY = os.getenv("TRELLO_API_KEY", "")
-TRELLO_TOKEN = os.getenv("TRELLO_TOKEN", "")
+TRELLO_API_KEY = _env.get("TRELLO_API_KEY", "")
+TRELLO_TOKEN = _env.get("TRELLO_TOKEN", "")
 
 # Dashboard Security / Live Refresh
-DASHBOARD_JWT_SECRET = os.getenv("DASHBOARD_JWT_SECRET", "")
-DASHBOARD_JWT_ALGORITHM = os.getenv("DASHBOARD_JWT_ALGORITHM", "HS256")
-DASHBOARD_JWT_EXPIRE_HOURS = int(os.getenv("DASHBOARD_JWT_EXPIRE_HOURS", "24"))
-DASHBOARD_AUTO_REFRESH_SECONDS = int(os.getenv("DASHBOARD_AUTO_REFRESH_SECONDS", "3"))
+DASHBOARD_JWT_SECRET = _env.get("DASHBOARD_JWT_SECRET", "")
+DASHBOARD_JWT_ALGORITHM = _env.get("DASHBOARD_JWT_ALGORITHM", "HS256")
+DASHBOARD_JWT_EXPIRE_HOURS = int(_env.get("DASHBOARD_JWT_EXPIRE_HOURS", "24"))
+DASHBOARD_AUTO_REFRESH_SECONDS = int(_env.get("DASHBOARD_AUTO_REFRESH_SECONDS", "3"))
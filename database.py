@@ -1,12 +1,138 @@
 # database.py
+import atexit
+import logging
+import queue
 import sqlite3
 import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
 
 DB_FILE = "MyPyBot.db"
 
+# Applied to every new connection: WAL (set once in init_db) lets readers run alongside the writer,
+# and NORMAL sync makes each WAL commit a single fsync
+CONNECTION_PRAGMAS = '''
+    PRAGMA synchronous = NORMAL;
+    PRAGMA busy_timeout = 5000;
+    PRAGMA cache_size = -20000;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA foreign_keys = ON;
+'''
+
+# Prepared statements kept per connection; room for every distinct SQL text in this module (about 60)
+# plus the dynamically built UPDATE/IN variants, so hot INSERTs are parsed once per thread
+STATEMENT_CACHE_SIZE = 256
+
+class _PooledConnection(sqlite3.Connection):
+    """Plain connection that can be weakly referenced, so a finished thread's connection is freed with it"""
+
+# One long-lived connection per thread keeps SQLite's page cache and parsed schema warm between calls
+_local = threading.local()
+_connections = weakref.WeakSet()
+_connections_lock = threading.Lock()
+# Bumped by close_all so threads holding a closed connection reconnect on their next call
+_pool_generation = 0
+
+def _get_conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.generation != _pool_generation:
+        conn = sqlite3.connect(
+            DB_FILE,
+            check_same_thread=False,
+            factory=_PooledConnection,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.executescript(CONNECTION_PRAGMAS)
+        _local.conn = conn
+        _local.generation = _pool_generation
+        with _connections_lock:
+            _connections.add(conn)
+    elif conn.in_transaction:
+        # Writes roll back on their own error path; this only catches a transaction left open some other way
+        conn.rollback()
+    return conn
+
+def close_all():
+    """Close every pooled connection (called on shutdown)"""
+    global _pool_generation
+    with _connections_lock:
+        _pool_generation += 1
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+# Whole user_context profiles keyed by user_id as (expires_at, {context_key: value}); saves write through
+USER_CONTEXT_CACHE_TTL = 15 * 60
+_user_context_cache = {}
+_user_context_lock = threading.Lock()
+_user_context_generation = 0
+
+def _cache_user_context(user_id, context_key, context_value):
+    global _user_context_generation
+    with _user_context_lock:
+        _user_context_generation += 1
+        cached = _user_context_cache.get(str(user_id))
+        if cached and cached[0] > time.monotonic():
+            cached[1][context_key] = context_value
+
+# Learned patterns per user as {(pattern_type, min_confidence): rows}, least recently used user evicted first
+LEARNED_PATTERNS_CACHE_SIZE = 512
+_learned_patterns_cache = OrderedDict()
+_learned_patterns_lock = threading.Lock()
+_learned_patterns_generation = 0
+
+def _invalidate_learned_patterns(user_id):
+    global _learned_patterns_generation
+    with _learned_patterns_lock:
+        _learned_patterns_generation += 1
+        _learned_patterns_cache.pop(str(user_id), None)
+
+# Time columns stored as INTEGER unix seconds, with the SQL converting each pre-epoch text value
+# (CURRENT_TIMESTAMP defaults are UTC; add_timer used to write local-time ISO strings)
+EPOCH_TIME_COLUMNS = {
+    'sleep_logs': {'timestamp': "strftime('%s', timestamp)"},
+    'tracking_logs': {'timestamp': "strftime('%s', timestamp)"},
+    'timers': {'started_at': "strftime('%s', started_at)", 'ends_at': "strftime('%s', ends_at, 'utc')"},
+}
+
+def _set_aside_text_time_table(c, table):
+    """Rename a table that still has text time columns so init_db recreates it with INTEGER ones"""
+    c.execute(f'PRAGMA table_info({table})')
+    column_types = {row[1]: row[2].upper() for row in c.fetchall()}
+    time_column = next(iter(EPOCH_TIME_COLUMNS[table]))
+    if column_types.get(time_column, 'INTEGER') != 'INTEGER':
+        c.execute(f'ALTER TABLE {table} RENAME TO {table}_text_ts')
+
+def _copy_text_time_table(c, table):
+    """Copy rows from a table set aside by _set_aside_text_time_table, converting its timestamps"""
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{table}_text_ts',))
+    if c.fetchone() is None:
+        return
+    c.execute(f'PRAGMA table_info({table}_text_ts)')
+    columns = [row[1] for row in c.fetchall()]
+    conversions = EPOCH_TIME_COLUMNS[table]
+    values = ', '.join(f'CAST({conversions[column]} AS INTEGER)' if column in conversions else column for column in columns)
+    c.execute(f'INSERT OR IGNORE INTO {table} ({", ".join(columns)}) SELECT {values} FROM {table}_text_ts')
+    c.execute(f'DROP TABLE {table}_text_ts')
+    logger.info(f"Converted {table} timestamps to unix seconds")
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
+    # Only takes effect on a new database file; existing ones need a one-time VACUUM (see README)
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    # WAL is stored in the database file; SQLite keeps MyPyBot.db-wal and MyPyBot.db-shm beside it
+    c.execute('PRAGMA journal_mode = WAL')
+    for table in EPOCH_TIME_COLUMNS:
+        _set_aside_text_time_table(c, table)
     # Table for messages
     c.execute('''
         CREATE TABLE IF NOT EXISTS messages (
@@ -44,7 +170,7 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id TEXT,
             event_type TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
             notes TEXT
         )
     ''')
@@ -58,7 +184,7 @@ def init_db():
             value REAL,
             unit TEXT,
             notes TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
         )
     ''')
     # NOTE: Reminders are now handled by cron_jobs table (one-time scheduled jobs)
@@ -94,8 +220,8 @@ def init_db():
             user_id TEXT,
             name TEXT,
             duration_seconds INTEGER,
-            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ends_at DATETIME,
+            started_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+            ends_at INTEGER,
             is_active INTEGER DEFAULT 1,
             is_completed INTEGER DEFAULT 0
         )
@@ -124,44 +250,216 @@ def init_db():
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # One row per (user_id, context_key) so context saves can UPSERT in place;
+    # older databases may hold duplicates from INSERT OR REPLACE, keep the newest
+    c.execute('''
+        DELETE FROM user_context
+        WHERE id NOT IN (SELECT MAX(id) FROM user_context GROUP BY user_id, context_key)
+    ''')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_user_context_user_key
+        ON user_context (user_id, context_key)
+    ''')
+    for table in EPOCH_TIME_COLUMNS:
+        _copy_text_time_table(c, table)
+    # Composite indexes matching the per-user lookups, so they seek instead of scanning whole tables
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_messages_user_platform_ts
+        ON messages (user_id, platform, timestamp)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sleep_logs_user_ts
+        ON sleep_logs (user_id, timestamp)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tracking_logs_user_category_ts
+        ON tracking_logs (user_id, category, timestamp)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_notes_user_updated
+        ON notes (user_id, updated_at)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_items_user_list
+        ON shopping_items (user_id, list_name, is_purchased, created_at)
+    ''')
+    # Partial index covering only open timers, so finished ones never grow it
+    c.execute('DROP INDEX IF EXISTS idx_timers_user_active')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_timers_open
+        ON timers (user_id, ends_at)
+        WHERE is_active = 1 AND is_completed = 0
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learned_patterns_user_type
+        ON learned_patterns (user_id, pattern_type, success_count DESC)
+    ''')
+    # One row per learned (user, type, input, intent) so saves can UPSERT; keep the oldest of any duplicates
+    c.execute('''
+        DELETE FROM learned_patterns
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM learned_patterns
+            GROUP BY user_id, pattern_type, user_input, detected_intent
+        )
+    ''')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_learned_patterns_unique
+        ON learned_patterns (user_id, pattern_type, user_input, detected_intent)
+    ''')
+    _init_notes_fts(c)
     conn.commit()
-    conn.close()
+    # Refresh planner statistics when the tables have changed enough to matter
+    c.execute('PRAGMA optimize')
+    _load_config_cache()
+
+# Free pages returned to the filesystem per incremental_vacuum() call (about 4 MB at the default page size)
+INCREMENTAL_VACUUM_PAGES = 1000
+
+def incremental_vacuum(pages=INCREMENTAL_VACUUM_PAGES):
+    """Release up to `pages` free pages left by deleted rows; a no-op unless auto_vacuum is INCREMENTAL"""
+    conn = _get_conn()
+    # execute() stops after the first page; executescript() steps the pragma to completion
+    conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+
+# Set by init_db when SQLite supports the FTS5 trigram index used by search_notes
+_notes_fts_enabled = False
+# Trigram matching needs at least three characters; shorter searches use LIKE
+NOTES_FTS_MIN_QUERY_LENGTH = 3
+
+def _init_notes_fts(c):
+    """Create the notes full-text index and its sync triggers (skipped when FTS5 trigram is unavailable)"""
+    global _notes_fts_enabled
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'")
+    exists = c.fetchone() is not None
+    try:
+        # Trigram tokens keep LIKE '%q%' substring semantics while letting the index find candidate rows
+        c.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
+            USING fts5(title, content, content='notes', content_rowid='id', tokenize='trigram')
+        ''')
+    except sqlite3.OperationalError:
+        _notes_fts_enabled = False
+        return
 
-def save_message(platform, user_id, user_name, message, reply):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
     c.execute('''
-        INSERT INTO messages (platform, user_id, user_name, message, reply)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (platform, user_id, user_name, message, reply))
-    conn.commit()
-    conn.close()
+        CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    ''')
+    if not exists:
+        # Index the notes written before the table existed
+        c.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+    _notes_fts_enabled = True
+
+# Conversation rows are committed by a background writer thread; every row queued while it was
+# busy shares the next transaction
+MESSAGE_WRITE_BATCH_SIZE = 64
+_message_write_queue = queue.Queue()
+_message_writer = None
+_message_writer_lock = threading.Lock()
+
+def save_message(platform, user_id, user_name, message, reply):
+    """Queue a conversation row for the background writer (returns without touching the database)"""
+    _ensure_message_writer()
+    _message_write_queue.put((platform, user_id, user_name, message, reply))
+
+def _ensure_message_writer():
+    global _message_writer
+    if _message_writer is not None:
+        return
+    with _message_writer_lock:
+        if _message_writer is None:
+            _message_writer = threading.Thread(target=_message_writer_loop, name='message-writer', daemon=True)
+            _message_writer.start()
+
+def _message_writer_loop():
+    while True:
+        rows = [_message_write_queue.get()]
+        while len(rows) < MESSAGE_WRITE_BATCH_SIZE:
+            try:
+                rows.append(_message_write_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            save_messages_bulk(rows)
+        except Exception as e:
+            # Any failure must leave the writer alive, or flush_messages() would wait forever
+            logger.error(f"Failed to save {len(rows)} queued message(s): {e}")
+        finally:
+            for _ in rows:
+                _message_write_queue.task_done()
+
+def flush_messages():
+    """Block until every queued conversation row has been written"""
+    if _message_writer is not None:
+        _message_write_queue.join()
+
+atexit.register(flush_messages)
+
+def save_messages_bulk(rows):
+    """Save many (platform, user_id, user_name, message, reply) rows in one transaction."""
+    if not rows:
+        return
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.executemany('''
+            INSERT INTO messages (platform, user_id, user_name, message, reply)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
 
 def get_recent_messages(limit=20):
-    conn = sqlite3.connect(DB_FILE)
+    """Get the latest messages as sqlite3.Row objects (indexable, or dict() for the dashboard API)"""
+    conn = _get_conn()
     c = conn.cursor()
+    c.row_factory = sqlite3.Row
     c.execute('''
-        SELECT platform, user_name, message, reply, timestamp
+        SELECT platform, user_name AS user, message, reply, timestamp, id
         FROM messages
-        ORDER BY timestamp DESC
+        ORDER BY id DESC
         LIMIT ?
     ''', (limit,))
     rows = c.fetchall()
-    conn.close()
+    return rows
+
+def get_messages_since(last_id, limit=20):
+    """Get messages with an id greater than last_id, newest first (same row shape as get_recent_messages)"""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row
+    c.execute('''
+        SELECT platform, user_name AS user, message, reply, timestamp, id
+        FROM messages
+        WHERE id > ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (last_id, limit))
+    rows = c.fetchall()
     return rows
 
 def get_message_count():
     """Get total count of messages in database"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
-    c.execute('SELECT COUNT(*) FROM messages')
+    # Messages are never deleted, so the rightmost rowid is the count without a full-table scan
+    c.execute('SELECT MAX(id) FROM messages')
     count = c.fetchone()[0]
-    conn.close()
-    return count
+    return count or 0
 
 def get_user_chat_history(user_id, limit=10):
     """Get recent chat history for a specific user"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT message, reply
@@ -171,56 +469,64 @@ def get_user_chat_history(user_id, limit=10):
         LIMIT ?
     ''', (user_id, limit))
     rows = c.fetchall()
-    conn.close()
     # Return in chronological order (oldest first)
     return list(reversed(rows))
 
-def get_config(key, default=None):
-    conn = sqlite3.connect(DB_FILE)
+# The whole config table, loaded on first use (or by init_db) and kept current by set_config
+_config_cache = None
+_config_cache_lock = threading.Lock()
+
+def _load_config_cache():
+    global _config_cache
+    conn = _get_conn()
     c = conn.cursor()
-    c.execute('SELECT value FROM config WHERE key = ?', (key,))
-    row = c.fetchone()
-    conn.close()
-    if row:
-        return row[0]
-    return default
+    # Held across the read so a concurrent set_config lands in the loaded dict, not a stale one
+    with _config_cache_lock:
+        c.execute('SELECT key, value FROM config')
+        _config_cache = dict(c.fetchall())
+        return _config_cache
+
+def get_config(key, default=None):
+    cache = _config_cache
+    if cache is None:
+        cache = _load_config_cache()
+    return cache.get(key, default)
 
 def set_config(key, value):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO config (key, value)
-        VALUES (?, ?)
-        ON CONFLICT(key) DO UPDATE SET value=excluded.value
-    ''', (key, value))
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO config (key, value)
+            VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value=excluded.value
+        ''', (key, value))
+    with _config_cache_lock:
+        if _config_cache is not None:
+            _config_cache[key] = value
 
 # ---------- Cron Job Functions ----------
 def add_cron_job(name, job_type, schedule, params=None):
     """Add a new cron job"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     params_json = json.dumps(params) if params else "{}"
     try:
-        c.execute('''
-            INSERT INTO cron_jobs (name, job_type, schedule, params)
-            VALUES (?, ?, ?, ?)
-        ''', (name, job_type, schedule, params_json))
-        conn.commit()
-        conn.close()
+        with conn:
+            c.execute('''
+                INSERT INTO cron_jobs (name, job_type, schedule, params)
+                VALUES (?, ?, ?, ?)
+            ''', (name, job_type, schedule, params_json))
         return True, "Job added successfully"
     except sqlite3.IntegrityError:
-        conn.close()
         return False, "Job with this name already exists"
 
 def get_all_cron_jobs():
     """Get all cron jobs"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('SELECT id, name, job_type, schedule, params, enabled FROM cron_jobs')
     rows = c.fetchall()
-    conn.close()
     jobs = []
     for row in rows:
         jobs.append({
@@ -233,54 +539,82 @@ def get_all_cron_jobs():
         })
     return jobs
 
+def get_cron_job_summaries():
+    """Get all cron jobs without their params, for callers that never look at them"""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT id, name, job_type, schedule, enabled FROM cron_jobs')
+    return [
+        {'id': row[0], 'name': row[1], 'job_type': row[2], 'schedule': row[3], 'enabled': bool(row[4])}
+        for row in c.fetchall()
+    ]
+
 def remove_cron_job(name):
     """Remove a cron job by name"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM cron_jobs WHERE name = ?', (name,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM cron_jobs WHERE name = ?', (name,))
+        deleted = c.rowcount
     return deleted > 0
 
+def remove_cron_jobs(names):
+    """Remove several cron jobs by name, returning the number deleted"""
+    names = list(names)
+    if not names:
+        return 0
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        placeholders = ', '.join('?' for _ in names)
+        c.execute(f'DELETE FROM cron_jobs WHERE name IN ({placeholders})', names)
+        deleted = c.rowcount
+    return deleted
+
+def _build_update_statements(table, columns, key, extra_sets=()):
+    """Prebuild UPDATE statements for every non-empty subset of columns, keyed by bitmask (bit i = columns[i])"""
+    statements = {}
+    for mask in range(1, 1 << len(columns)):
+        sets = [f'{column} = ?' for i, column in enumerate(columns) if mask & (1 << i)]
+        sets.extend(extra_sets)
+        statements[mask] = f'UPDATE {table} SET {", ".join(sets)} WHERE {key} = ?'
+    return statements
+
+def _update_mask(values):
+    """Return (bitmask, params) for the values that are not None, in column order"""
+    mask = 0
+    params = []
+    for i, value in enumerate(values):
+        if value is not None:
+            mask |= 1 << i
+            params.append(value)
+    return mask, params
+
+# One fixed SQL text per field combination keeps partial updates in the statement cache
+_CRON_JOB_UPDATES = _build_update_statements('cron_jobs', ('schedule', 'params', 'enabled'), 'name')
+
 def update_cron_job(name, schedule=None, params=None, enabled=None):
     """Update a cron job by name"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    # Build update query dynamically based on what's provided
-    updates = []
-    values = []
-    
-    if schedule is not None:
-        updates.append('schedule = ?')
-        values.append(schedule)
-    
-    if params is not None:
-        updates.append('params = ?')
-        values.append(json.dumps(params))
-    
-    if enabled is not None:
-        updates.append('enabled = ?')
-        values.append(1 if enabled else 0)
-    
-    if not updates:
-        conn.close()
+    mask, values = _update_mask((
+        schedule,
+        None if params is None else json.dumps(params),
+        None if enabled is None else (1 if enabled else 0),
+    ))
+    if not mask:
         return False, "No updates provided"
     
-    values.append(name)
-    query = f"UPDATE cron_jobs SET {', '.join(updates)} WHERE name = ?"
-    
-    c.execute(query, values)
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        values.append(name)
+        c.execute(_CRON_JOB_UPDATES[mask], values)
+        updated = c.rowcount
     
     return updated > 0, "Job updated successfully" if updated > 0 else "Job not found"
 
 def get_cron_job_by_name(name):
     """Get a specific cron job by name"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT id, name, job_type, schedule, params, enabled
@@ -288,7 +622,6 @@ def get_cron_job_by_name(name):
         WHERE name = ?
     ''', (name,))
     row = c.fetchone()
-    conn.close()
     
     if row:
         return {
@@ -303,32 +636,30 @@ def get_cron_job_by_name(name):
 
 def toggle_cron_job(name, enabled):
     """Enable or disable a cron job"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE cron_jobs SET enabled = ? WHERE name = ?', (1 if enabled else 0, name))
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('UPDATE cron_jobs SET enabled = ? WHERE name = ?', (1 if enabled else 0, name))
+        updated = c.rowcount
     return updated > 0
 
 # ---------- Notes Functions ----------
 def add_note(user_id, title, content, tags=None):
     """Add a new note"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    tags_str = json.dumps(tags) if tags else None
-    c.execute('''
-        INSERT INTO notes (user_id, title, content, tags)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, title, content, tags_str))
-    conn.commit()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        tags_str = json.dumps(tags) if tags else None
+        c.execute('''
+            INSERT INTO notes (user_id, title, content, tags)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, title, content, tags_str))
     note_id = c.lastrowid
-    conn.close()
     return note_id
 
 def get_notes(user_id, limit=20):
     """Get notes for a user"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT id, title, content, tags, created_at, updated_at
@@ -338,13 +669,25 @@ def get_notes(user_id, limit=20):
         LIMIT ?
     ''', (user_id, limit))
     rows = c.fetchall()
-    conn.close()
     return rows
 
 def search_notes(user_id, query):
     """Search notes by title or content"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
+    if _notes_fts_enabled and len(query) >= NOTES_FTS_MIN_QUERY_LENGTH:
+        # Quoted as one phrase so the trigram index matches the query as a substring
+        phrase = '"' + query.replace('"', '""') + '"'
+        c.execute('''
+            SELECT n.id, n.title, n.content, n.tags, n.created_at, n.updated_at
+            FROM notes_fts f
+            JOIN notes n ON n.id = f.rowid
+            WHERE notes_fts MATCH ? AND n.user_id = ?
+            ORDER BY n.updated_at DESC
+            LIMIT 20
+        ''', (phrase, user_id))
+        return c.fetchall()
+
     search_pattern = f'%{query}%'
     c.execute('''
         SELECT id, title, content, tags, created_at, updated_at
@@ -355,67 +698,51 @@ def search_notes(user_id, query):
         LIMIT 20
     ''', (user_id, search_pattern, search_pattern))
     rows = c.fetchall()
-    conn.close()
     return rows
 
+_NOTE_UPDATES = _build_update_statements(
+    'notes', ('title', 'content', 'tags'), 'id', extra_sets=('updated_at = CURRENT_TIMESTAMP',)
+)
+
 def update_note(note_id, title=None, content=None, tags=None):
     """Update a note"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    updates = []
-    params = []
+    mask, params = _update_mask((title, content, None if tags is None else json.dumps(tags)))
+    if not mask:
+        return False
     
-    if title is not None:
-        updates.append('title = ?')
-        params.append(title)
-    if content is not None:
-        updates.append('content = ?')
-        params.append(content)
-    if tags is not None:
-        updates.append('tags = ?')
-        params.append(json.dumps(tags))
-    
-    if updates:
-        updates.append('updated_at = CURRENT_TIMESTAMP')
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
         params.append(note_id)
-        query = f'UPDATE notes SET {", ".join(updates)} WHERE id = ?'
-        c.execute(query, params)
+        c.execute(_NOTE_UPDATES[mask], params)
         updated = c.rowcount
-    else:
-        updated = 0
-    
-    conn.commit()
-    conn.close()
     return updated > 0
 
 def delete_note(note_id):
     """Delete a note"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM notes WHERE id = ?', (note_id,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM notes WHERE id = ?', (note_id,))
+        deleted = c.rowcount
     return deleted > 0
 
 # ---------- Shopping List Functions ----------
 def add_shopping_item(user_id, item_name, quantity=None, list_name='default'):
     """Add an item to shopping list"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO shopping_items (user_id, item_name, quantity, list_name)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, item_name, quantity, list_name))
-    conn.commit()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO shopping_items (user_id, item_name, quantity, list_name)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, item_name, quantity, list_name))
     item_id = c.lastrowid
-    conn.close()
     return item_id
 
 def get_shopping_list(user_id, list_name='default', include_purchased=False):
     """Get shopping list items"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     if include_purchased:
         c.execute('''
@@ -432,65 +759,59 @@ def get_shopping_list(user_id, list_name='default', include_purchased=False):
             ORDER BY created_at DESC
         ''', (user_id, list_name))
     rows = c.fetchall()
-    conn.close()
     return rows
 
 def mark_item_purchased(item_id):
     """Mark an item as purchased"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE shopping_items
-        SET is_purchased = 1, purchased_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (item_id,))
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            UPDATE shopping_items
+            SET is_purchased = 1, purchased_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (item_id,))
+        updated = c.rowcount
     return updated > 0
 
 def delete_shopping_item(item_id):
     """Delete a shopping item"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM shopping_items WHERE id = ?', (item_id,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM shopping_items WHERE id = ?', (item_id,))
+        deleted = c.rowcount
     return deleted > 0
 
 def clear_purchased_items(user_id, list_name='default'):
     """Clear all purchased items from a list"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        DELETE FROM shopping_items
-        WHERE user_id = ? AND list_name = ? AND is_purchased = 1
-    ''', (user_id, list_name))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            DELETE FROM shopping_items
+            WHERE user_id = ? AND list_name = ? AND is_purchased = 1
+        ''', (user_id, list_name))
+        deleted = c.rowcount
     return deleted
 
 # ---------- Timer Functions ----------
 def add_timer(user_id, name, duration_seconds):
     """Add a new timer"""
-    from datetime import datetime, timedelta
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    ends_at = datetime.now() + timedelta(seconds=duration_seconds)
-    c.execute('''
-        INSERT INTO timers (user_id, name, duration_seconds, ends_at)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, name, duration_seconds, ends_at.isoformat()))
-    conn.commit()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        ends_at = int(time.time()) + duration_seconds
+        c.execute('''
+            INSERT INTO timers (user_id, name, duration_seconds, ends_at)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, name, duration_seconds, ends_at))
     timer_id = c.lastrowid
-    conn.close()
     return timer_id
 
 def get_active_timers(user_id):
     """Get active timers for a user"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT id, name, duration_seconds, started_at, ends_at
@@ -499,102 +820,118 @@ def get_active_timers(user_id):
         ORDER BY ends_at ASC
     ''', (user_id,))
     rows = c.fetchall()
-    conn.close()
     return rows
 
 def complete_timer(timer_id):
     """Mark a timer as completed"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE timers
-        SET is_completed = 1, is_active = 0
-        WHERE id = ?
-    ''', (timer_id,))
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            UPDATE timers
+            SET is_completed = 1, is_active = 0
+            WHERE id = ?
+        ''', (timer_id,))
+        updated = c.rowcount
     return updated > 0
 
 def cancel_timer(timer_id):
     """Cancel a timer"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE timers
-        SET is_active = 0
-        WHERE id = ?
-    ''', (timer_id,))
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            UPDATE timers
+            SET is_active = 0
+            WHERE id = ?
+        ''', (timer_id,))
+        updated = c.rowcount
     return updated > 0
 
 def log_sleep_event(user_id, event_type, notes=None):
     """Log a sleep event (bedtime or wake)"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO sleep_logs (user_id, event_type, notes)
-        VALUES (?, ?, ?)
-    ''', (user_id, event_type, notes))
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO sleep_logs (user_id, event_type, notes)
+            VALUES (?, ?, ?)
+        ''', (user_id, event_type, notes))
+
+def _days_ago(days):
+    """Unix seconds N days before now, for comparing against epoch time columns"""
+    return int(time.time()) - int(days) * 86400
 
 def get_sleep_data(user_id, days=7):
-    """Get sleep data for a user for the last N days"""
-    conn = sqlite3.connect(DB_FILE)
+    """Get sleep data (event_type, unix timestamp, notes) for a user for the last N days"""
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT event_type, timestamp, notes
         FROM sleep_logs
-        WHERE user_id = ?
-        AND timestamp >= datetime('now', '-' || ? || ' days')
+        WHERE user_id = ? AND timestamp >= ?
         ORDER BY timestamp ASC
-    ''', (user_id, days))
+    ''', (user_id, _days_ago(days)))
+    rows = c.fetchall()
+    return rows
+
+def get_sleep_sessions(user_id, days=7):
+    """Get completed sleep sessions (bedtime, wake, hours) for the last N days, oldest first"""
+    conn = _get_conn()
+    c = conn.cursor()
+    # A session is a wake event directly preceded by a bedtime; pairing and durations are computed in SQLite
+    c.execute('''
+        SELECT bedtime, wake, (wake - bedtime) / 3600.0 AS hours
+        FROM (
+            SELECT event_type,
+                   timestamp AS wake,
+                   LAG(event_type) OVER w AS previous_type,
+                   LAG(timestamp) OVER w AS bedtime
+            FROM sleep_logs
+            WHERE user_id = ? AND timestamp >= ?
+            WINDOW w AS (ORDER BY timestamp)
+        )
+        WHERE event_type = 'wake' AND previous_type = 'bedtime'
+        ORDER BY wake ASC
+    ''', (user_id, _days_ago(days)))
     rows = c.fetchall()
-    conn.close()
     return rows
 
 
 def log_tracking_event(user_id, category, event_type, value=None, unit=None, notes=None):
     """Log a generic tracking event (exercise, study, mood, habits, etc.)"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO tracking_logs (user_id, category, event_type, value, unit, notes)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (user_id, category, event_type, value, unit, notes))
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO tracking_logs (user_id, category, event_type, value, unit, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, category, event_type, value, unit, notes))
 
 def get_tracking_data(user_id, category=None, days=30):
-    """Get tracking data for a user, optionally filtered by category"""
-    conn = sqlite3.connect(DB_FILE)
+    """Yield tracking rows (sqlite3.Row) for a user, optionally filtered by category, oldest first"""
+    conn = _get_conn()
     c = conn.cursor()
+    c.row_factory = sqlite3.Row
     if category:
         c.execute('''
             SELECT category, event_type, value, unit, notes, timestamp
             FROM tracking_logs
-            WHERE user_id = ? AND category = ?
-            AND timestamp >= datetime('now', '-' || ? || ' days')
+            WHERE user_id = ? AND category = ? AND timestamp >= ?
             ORDER BY timestamp ASC
-        ''', (user_id, category, days))
+        ''', (user_id, category, _days_ago(days)))
     else:
         c.execute('''
             SELECT category, event_type, value, unit, notes, timestamp
             FROM tracking_logs
-            WHERE user_id = ?
-            AND timestamp >= datetime('now', '-' || ? || ' days')
+            WHERE user_id = ? AND timestamp >= ?
             ORDER BY timestamp ASC
-        ''', (user_id, days))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+        ''', (user_id, _days_ago(days)))
+    yield from c
 
 def get_tracking_categories(user_id):
     """Get all tracking categories for a user"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _get_conn()
     c = conn.cursor()
     c.execute('''
         SELECT DISTINCT category
@@ -603,68 +940,51 @@ def get_tracking_categories(user_id):
         ORDER BY category
     ''', (user_id,))
     rows = c.fetchall()
-    conn.close()
     return [row[0] for row in rows]
 def get_all_sleep_data(user_id):
-    """Get all sleep data for a user"""
-    conn = sqlite3.connect(DB_FILE)
+    """Yield all sleep rows (sqlite3.Row) for a user, oldest first"""
+    conn = _get_conn()
     c = conn.cursor()
+    c.row_factory = sqlite3.Row
     c.execute('''
         SELECT event_type, timestamp, notes
         FROM sleep_logs
         WHERE user_id = ?
         ORDER BY timestamp ASC
     ''', (user_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-def toggle_cron_job(name, enabled):
-    """Enable or disable a cron job"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE cron_jobs SET enabled = ? WHERE name = ?', (1 if enabled else 0, name))
-    updated = c.rowcount
-    conn.commit()
-    conn.close()
-    return updated > 0
+    yield from c
 
 # ---------- Learning & Pattern Recognition ----------
 def save_learned_pattern(user_id, pattern_type, user_input, detected_intent, confidence=1.0):
     """Save a successful pattern for future learning"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
     
-    # Check if pattern already exists
-    c.execute('''
-        SELECT id, success_count FROM learned_patterns
-        WHERE user_id = ? AND pattern_type = ? AND user_input = ? AND detected_intent = ?
-    ''', (user_id, pattern_type, user_input.lower(), detected_intent))
-    
-    existing = c.fetchone()
-    
-    if existing:
-        # Update success count and last_used
+        # Insert a new pattern, or bump the success count, last_used and confidence of a known one
         c.execute('''
-            UPDATE learned_patterns
+            INSERT INTO learned_patterns (user_id, pattern_type, user_input, detected_intent, confidence)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, pattern_type, user_input, detected_intent) DO UPDATE
             SET success_count = success_count + 1,
                 last_used = CURRENT_TIMESTAMP,
                 confidence = MIN(1.0, confidence + 0.1)
-            WHERE id = ?
-        ''', (existing[0],))
-    else:
-        # Insert new pattern
-        c.execute('''
-            INSERT INTO learned_patterns (user_id, pattern_type, user_input, detected_intent, confidence)
-            VALUES (?, ?, ?, ?, ?)
         ''', (user_id, pattern_type, user_input.lower(), detected_intent, confidence))
     
-    conn.commit()
-    conn.close()
+    _invalidate_learned_patterns(user_id)
 
 def get_learned_patterns(user_id, pattern_type=None, min_confidence=0.5):
-    """Get learned patterns for a user"""
-    conn = sqlite3.connect(DB_FILE)
+    """Get learned patterns for a user (cached until the user's patterns change)"""
+    user_key = str(user_id)
+    query_key = (pattern_type, min_confidence)
+    with _learned_patterns_lock:
+        user_cache = _learned_patterns_cache.get(user_key)
+        if user_cache is not None and query_key in user_cache:
+            _learned_patterns_cache.move_to_end(user_key)
+            return user_cache[query_key]
+        generation = _learned_patterns_generation
+
+    conn = _get_conn()
     c = conn.cursor()
 
     base_query = '''
@@ -686,66 +1006,137 @@ def get_learned_patterns(user_id, pattern_type=None, min_confidence=0.5):
     params.append(limit)
 
     c.execute(base_query, tuple(params))
+    rows = tuple(c.fetchall())
+    with _learned_patterns_lock:
+        # Skip caching if a save or delete landed while the query ran
+        if generation == _learned_patterns_generation:
+            _learned_patterns_cache.setdefault(user_key, {})[query_key] = rows
+            _learned_patterns_cache.move_to_end(user_key)
+            if len(_learned_patterns_cache) > LEARNED_PATTERNS_CACHE_SIZE:
+                _learned_patterns_cache.popitem(last=False)
+    return rows
+
+def has_matching_learned_pattern(user_id, text_lower, pattern_types, min_confidence=0.6):
+    """Check whether any learned pattern of the given types contains, or is contained in, the text"""
+    conn = _get_conn()
+    c = conn.cursor()
+    placeholders = ', '.join('?' for _ in pattern_types)
+    c.execute(f'''
+        SELECT 1 FROM learned_patterns
+        WHERE user_id = ? AND confidence >= ? AND pattern_type IN ({placeholders})
+          AND (instr(?, user_input) > 0 OR instr(user_input, ?) > 0)
+        LIMIT 1
+    ''', (user_id, min_confidence, *pattern_types, text_lower, text_lower))
+    row = c.fetchone()
+    return row is not None
+
+def get_top_learned_patterns_per_type(user_id, per_type_limit=5, min_confidence=0.5):
+    """Get the top learned patterns in each pattern type for a user"""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''
+        SELECT id, pattern_type, user_input, detected_intent, confidence, success_count
+        FROM (
+            SELECT id, COALESCE(NULLIF(pattern_type, ''), 'general') AS pattern_type,
+                   user_input, detected_intent, confidence, success_count,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY COALESCE(NULLIF(pattern_type, ''), 'general')
+                       ORDER BY success_count DESC, confidence DESC, id ASC
+                   ) AS type_rank
+            FROM learned_patterns
+            WHERE user_id = ? AND confidence >= ?
+        )
+        WHERE type_rank <= ?
+        ORDER BY pattern_type ASC, type_rank ASC
+    ''', (user_id, min_confidence, per_type_limit))
     rows = c.fetchall()
-    conn.close()
     return rows
 
 def clear_learned_patterns(user_id, pattern_type=None):
     """Clear learned patterns for a user (optionally by type)"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
     
-    if pattern_type:
-        c.execute('DELETE FROM learned_patterns WHERE user_id = ? AND pattern_type = ?', (user_id, pattern_type))
-    else:
-        c.execute('DELETE FROM learned_patterns WHERE user_id = ?', (user_id,))
+        if pattern_type:
+            c.execute('DELETE FROM learned_patterns WHERE user_id = ? AND pattern_type = ?', (user_id, pattern_type))
+        else:
+            c.execute('DELETE FROM learned_patterns WHERE user_id = ?', (user_id,))
     
-    deleted_count = c.rowcount
-    conn.commit()
-    conn.close()
+        deleted_count = c.rowcount
+    _invalidate_learned_patterns(user_id)
     return deleted_count
 
 def delete_learned_pattern(user_id, pattern_id):
     """Delete a single learned pattern entry"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM learned_patterns WHERE user_id = ? AND id = ?', (user_id, pattern_id))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM learned_patterns WHERE user_id = ? AND id = ?', (user_id, pattern_id))
+        deleted = c.rowcount
+    _invalidate_learned_patterns(user_id)
     return deleted > 0
 
 def save_user_context(user_id, context_key, context_value):
     """Save user-specific context/preferences"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
     
-    c.execute('''
-        INSERT OR REPLACE INTO user_context (user_id, context_key, context_value, updated_at)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (user_id, context_key, context_value))
+        c.execute('''
+            INSERT INTO user_context (user_id, context_key, context_value, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id, context_key) DO UPDATE
+            SET context_value = excluded.context_value, updated_at = CURRENT_TIMESTAMP
+        ''', (user_id, context_key, context_value))
     
-    conn.commit()
-    conn.close()
+    _cache_user_context(user_id, context_key, context_value)
 
-def get_user_context(user_id, context_key=None):
-    """Get user context/preferences"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+def save_user_context_bulk(user_id, context_values):
+    """Save several user context keys in a single transaction"""
+    conn = _get_conn()
+    with conn:
+        c = conn.cursor()
+    
+        c.executemany('''
+            INSERT INTO user_context (user_id, context_key, context_value, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id, context_key) DO UPDATE
+            SET context_value = excluded.context_value, updated_at = CURRENT_TIMESTAMP
+        ''', [(user_id, key, value) for key, value in context_values.items()])
     
+    for key, value in context_values.items():
+        _cache_user_context(user_id, key, value)
+
+def _cached_user_profile(user_id):
+    """Return the cached profile dict itself (callers must not mutate it), loading it on a miss"""
+    user_key = str(user_id)
+    with _user_context_lock:
+        cached = _user_context_cache.get(user_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        generation = _user_context_generation
+
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''
+        SELECT context_key, context_value FROM user_context
+        WHERE user_id = ?
+    ''', (user_id,))
+    profile = dict(c.fetchall())
+    with _user_context_lock:
+        # Skip caching if a save landed while the query ran, so a pre-save read can't overwrite it
+        if generation == _user_context_generation:
+            _user_context_cache[user_key] = (time.monotonic() + USER_CONTEXT_CACHE_TTL, profile)
+    return profile
+
+def get_user_profile(user_id):
+    """Get every context key for a user with one query (served from the write-through cache while fresh)"""
+    return dict(_cached_user_profile(user_id))
+
+def get_user_context(user_id, context_key=None):
+    """Get user context/preferences from the user's cached profile"""
+    profile = _cached_user_profile(user_id)
     if context_key:
-        c.execute('''
-            SELECT context_value FROM user_context
-            WHERE user_id = ? AND context_key = ?
-        ''', (user_id, context_key))
-        row = c.fetchone()
-        conn.close()
-        return row[0] if row else None
-    else:
-        c.execute('''
-            SELECT context_key, context_value FROM user_context
-            WHERE user_id = ?
-        ''', (user_id,))
-        rows = c.fetchall()
-        conn.close()
-        return {row[0]: row[1] for row in rows}
\ No newline at end of file
+        return profile.get(context_key)
+    return dict(profile)
\ No newline at end of file
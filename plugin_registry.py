@@ -1,13 +1,25 @@
+import functools
 import importlib
 import inspect
 import json
 import logging
+import os
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 SKILLS_DIR = Path(__file__).parent / "skills"
+# Upper bound on threads reading skill metadata at once
+METADATA_LOAD_WORKERS = 8
 
 
 @dataclass
@@ -25,6 +37,9 @@ class PluginSkill:
     init_args: List[Any] = field(default_factory=list)
     init_kwargs: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    required_config: Tuple[str, ...] = ()
+    optional_config: Tuple[str, ...] = ()
+    status_label: str = ""
 
 
 def _resolve_list(value: Any) -> List[Any]:
@@ -66,6 +81,96 @@ def _resolve_module_and_class(entry: Path, raw: Dict[str, Any], slug: str) -> tu
     return resolved_module, resolved_class
 
 
+def _skill_dirs(root: Path) -> List[Path]:
+    """Skill directories under root in name order, listed with one scandir pass"""
+    with os.scandir(root) as it:
+        entries = sorted((entry for entry in it if entry.is_dir()), key=lambda entry: entry.name)
+    return [Path(entry.path) for entry in entries]
+
+
+def _read_metadata_bytes(entry: Path) -> Optional[bytes]:
+    try:
+        with open(entry / "metadata.json", "rb") as handle:
+            return handle.read()
+    except FileNotFoundError:
+        return None
+
+
+def _parse_json(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _dump_metadata_json(raw: Dict[str, Any]) -> bytes:
+    """Two-space indented UTF-8 JSON with a trailing newline, the layout metadata.json files use"""
+    if orjson is not None:
+        return orjson.dumps(raw, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(raw, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Readers see either the old file or the new one, never a partial write
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _load_skill(entry: Path) -> Optional[PluginSkill]:
+    data = _read_metadata_bytes(entry)
+    if data is None:
+        logger.debug("Skipping %s because metadata.json is absent", entry)
+        return None
+
+    try:
+        raw = _parse_json(data)
+    except Exception as exc:
+        logger.warning("Could not parse metadata for %s: %s", entry.name, exc)
+        return None
+
+    slug = (raw.get("slug") or entry.name).strip()
+    module_path, class_name = _resolve_module_and_class(entry, raw, slug)
+    if not module_path or not class_name:
+        logger.warning("Skill %s missing module/class definition, skipping", slug)
+        return None
+
+    name = raw.get("name") or slug.replace("_", " ").title()
+    description = (raw.get("description") or "").strip()
+    commands = _resolve_list(raw.get("commands"))
+    exported_methods = _resolve_list(raw.get("exports"))
+    keywords = _resolve_list(raw.get("keywords"))
+    init_args = _resolve_list(raw.get("init_args"))
+    init_kwargs_raw = raw.get("init_kwargs") or {}
+    init_kwargs = init_kwargs_raw if isinstance(init_kwargs_raw, dict) else {}
+    enabled = bool(raw.get("enabled", True))
+    required_config = tuple(str(item) for item in _resolve_list(raw.get("required_config")) if item)
+    optional_config = tuple(str(item) for item in _resolve_list(raw.get("optional_config")) if item)
+    status_label = str(raw.get("status_label") or name or slug).strip()
+
+    instructions_file = raw.get("instructions_file", "instructions.md")
+    instructions_path = entry / instructions_file
+    instructions = ""
+    if instructions_path.exists():
+        instructions = instructions_path.read_text(encoding="utf-8").strip()
+
+    return PluginSkill(
+        slug=slug,
+        name=name,
+        module=module_path,
+        class_name=class_name,
+        description=description,
+        commands=[str(item) for item in commands if item],
+        exported_methods=[str(item) for item in exported_methods if item],
+        keywords=[str(item) for item in keywords if item],
+        enabled=enabled,
+        instructions=instructions,
+        init_args=init_args,
+        init_kwargs=init_kwargs,
+        metadata=raw,
+        required_config=required_config,
+        optional_config=optional_config,
+        status_label=status_label,
+    )
+
+
 def load_skill_definitions(skills_dir: Optional[Path] = None) -> Dict[str, PluginSkill]:
     root = Path(skills_dir or SKILLS_DIR)
     definitions: Dict[str, PluginSkill] = {}
@@ -74,58 +179,15 @@ def load_skill_definitions(skills_dir: Optional[Path] = None) -> Dict[str, Plugi
         logger.debug("Skill directory missing: %s", root)
         return definitions
 
-    for entry in sorted(root.iterdir()):
-        if not entry.is_dir():
-            continue
-
-        metadata_path = entry / "metadata.json"
-        if not metadata_path.exists():
-            logger.debug("Skipping %s because metadata.json is absent", entry)
-            continue
-
-        try:
-            raw = json.loads(metadata_path.read_text(encoding="utf-8"))
-        except Exception as exc:
-            logger.warning("Could not parse metadata for %s: %s", entry.name, exc)
-            continue
-
-        slug = (raw.get("slug") or entry.name).strip()
-        module_path, class_name = _resolve_module_and_class(entry, raw, slug)
-        if not module_path or not class_name:
-            logger.warning("Skill %s missing module/class definition, skipping", slug)
-            continue
+    entries = _skill_dirs(root)
+    if not entries:
+        return definitions
 
-        name = raw.get("name") or slug.replace("_", " ").title()
-        description = (raw.get("description") or "").strip()
-        commands = _resolve_list(raw.get("commands"))
-        exported_methods = _resolve_list(raw.get("exports"))
-        keywords = _resolve_list(raw.get("keywords"))
-        init_args = _resolve_list(raw.get("init_args"))
-        init_kwargs_raw = raw.get("init_kwargs") or {}
-        init_kwargs = init_kwargs_raw if isinstance(init_kwargs_raw, dict) else {}
-        enabled = bool(raw.get("enabled", True))
-
-        instructions_file = raw.get("instructions_file", "instructions.md")
-        instructions_path = entry / instructions_file
-        instructions = ""
-        if instructions_path.exists():
-            instructions = instructions_path.read_text(encoding="utf-8").strip()
-
-        definitions[slug] = PluginSkill(
-            slug=slug,
-            name=name,
-            module=module_path,
-            class_name=class_name,
-            description=description,
-            commands=[str(item) for item in commands if item],
-            exported_methods=[str(item) for item in exported_methods if item],
-            keywords=[str(item) for item in keywords if item],
-            enabled=enabled,
-            instructions=instructions,
-            init_args=init_args,
-            init_kwargs=init_kwargs,
-            metadata=raw,
-        )
+    # Reads and parses overlap across skills; map() keeps the sorted directory order
+    with ThreadPoolExecutor(max_workers=min(METADATA_LOAD_WORKERS, len(entries))) as executor:
+        for skill in executor.map(_load_skill, entries):
+            if skill is not None:
+                definitions[skill.slug] = skill
 
     return definitions
 
@@ -141,13 +203,37 @@ def instantiate_service(skill: PluginSkill) -> Optional[Any]:
 
 
 _skill_cache: Optional[Dict[str, PluginSkill]] = None
-_instance_cache: Optional[Dict[str, Any]] = None
+# slug -> service instance, or None when construction failed; filled on first use of each service
+_instance_cache: Dict[str, Any] = {}
+# Re-entrant: constructing a service loads the skill definitions under the same lock
+_registry_lock = threading.RLock()
+
+
+def _metadata_stamps(root: Path) -> Dict[str, Tuple[int, int]]:
+    """(mtime_ns, size) of each skill's metadata.json, keyed by directory name; stat calls only, no reads"""
+    stamps: Dict[str, Tuple[int, int]] = {}
+    if not root.exists():
+        return stamps
+    for entry in _skill_dirs(root):
+        try:
+            stat = os.stat(entry / "metadata.json")
+        except FileNotFoundError:
+            continue
+        stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+# Metadata stamps taken just before _skill_cache was loaded, compared by reload_if_changed
+_loaded_stamps: Optional[Dict[str, Tuple[int, int]]] = None
 
 
 def get_skill_definitions() -> Dict[str, PluginSkill]:
-    global _skill_cache
+    global _skill_cache, _loaded_stamps
     if _skill_cache is None:
-        _skill_cache = load_skill_definitions()
+        with _registry_lock:
+            if _skill_cache is None:
+                _loaded_stamps = _metadata_stamps(SKILLS_DIR)
+                _skill_cache = load_skill_definitions()
     return _skill_cache
 
 
@@ -155,26 +241,111 @@ def get_skill(slug: str) -> Optional[PluginSkill]:
     return get_skill_definitions().get(slug)
 
 
-def get_service_instances() -> Dict[str, Any]:
-    global _instance_cache
-    if _instance_cache is None:
-        _instance_cache = {}
+def _get_or_create_instance(slug: str) -> Optional[Any]:
+    if slug in _instance_cache:
+        return _instance_cache[slug]
+
+    skill = get_skill_definitions().get(slug)
+    if skill is None or not skill.enabled:
+        return None
+
+    with _registry_lock:
+        if slug not in _instance_cache:
+            _instance_cache[slug] = instantiate_service(skill)
+    return _instance_cache[slug]
+
+
+def _may_provide(slug: str, method_name: str) -> bool:
+    """Whether a skill's metadata allows it to have method_name, judged without importing its module"""
+    skill = get_skill_definitions().get(slug)
+    if skill is None:
+        return False
+    declared = skill.exported_methods or skill.commands
+    return not declared or method_name in declared or method_name.startswith('_')
+
+
+class _LazyServiceInstances(Mapping):
+    """Enabled services by slug; each service is imported and constructed the first time it is looked up"""
+
+    def __getitem__(self, slug: str) -> Any:
+        instance = _get_or_create_instance(slug)
+        if instance is None:
+            raise KeyError(slug)
+        return instance
+
+    def __iter__(self):
         for slug, skill in get_skill_definitions().items():
-            if not skill.enabled:
-                continue
-            instance = instantiate_service(skill)
+            if skill.enabled and _instance_cache.get(slug, True) is not None:
+                yield slug
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def items(self):
+        # Unlike the Mapping default, skip services that fail to construct instead of raising KeyError
+        for slug in self:
+            instance = _get_or_create_instance(slug)
             if instance is not None:
-                _instance_cache[slug] = instance
-    return _instance_cache
+                yield slug, instance
+
+    def values(self):
+        for _, instance in self.items():
+            yield instance
+
+
+_service_instances = _LazyServiceInstances()
+# (slug, include_private) -> result of get_service_method_exports; cleared when skill metadata is synced
+_exports_cache: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+
+
+def get_service_instances() -> Mapping:
+    return _service_instances
+
+
+def initialize_registry() -> None:
+    """Load skill metadata up front, so no request pays for the directory walk; services are built on first use"""
+    skills = get_skill_definitions()
+    enabled = sum(1 for skill in skills.values() if skill.enabled)
+    logger.info("Plugin registry ready: %d skills (%d enabled)", len(skills), enabled)
+
+
+def reload_if_changed() -> bool:
+    """Reload skill metadata if any metadata.json changed since it was loaded; returns whether it reloaded
+
+    Only services whose skill definition actually changed are dropped, to be rebuilt on next use.
+    """
+    global _skill_cache, _loaded_stamps
+    with _registry_lock:
+        if _skill_cache is None:
+            return False
+        stamps = _metadata_stamps(SKILLS_DIR)
+        if stamps == _loaded_stamps:
+            return False
+
+        previous = _skill_cache
+        _loaded_stamps = stamps
+        _skill_cache = load_skill_definitions()
+        for slug in list(_instance_cache):
+            if previous.get(slug) != _skill_cache.get(slug):
+                del _instance_cache[slug]
+        _exports_cache.clear()
+
+    logger.info("Reloaded skill metadata: %d skills", len(_skill_cache))
+    return True
 
 
 def get_service_method_exports(slug: Optional[str] = None, include_private: bool = False) -> Dict[str, Dict[str, Any]]:
+    cache_key = (slug, include_private)
+    cached = _exports_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     exports: Dict[str, Dict[str, Any]] = {}
-    services = get_service_instances()
     skills = get_skill_definitions()
 
-    for service_slug, instance in services.items():
-        if slug and service_slug != slug:
+    for service_slug in ([slug] if slug else get_service_instances()):
+        instance = _get_or_create_instance(service_slug)
+        if instance is None:
             continue
 
         skill = skills.get(service_slug)
@@ -187,11 +358,7 @@ def get_service_method_exports(slug: Optional[str] = None, include_private: bool
             method_names = list((skill.commands if skill else []) or [])
 
         if not method_names:
-            method_names = [
-                name for name in dir(instance)
-                if callable(getattr(instance, name, None))
-                and (include_private or not name.startswith('_'))
-            ]
+            method_names = _discover_instance_methods(type(instance), include_private)
 
         method_map: Dict[str, Any] = {}
         for name in method_names:
@@ -201,9 +368,23 @@ def get_service_method_exports(slug: Optional[str] = None, include_private: bool
 
         exports[service_slug] = method_map
 
+    _exports_cache[cache_key] = exports
     return exports
 
 
+@functools.lru_cache(maxsize=None)
+def _discover_instance_methods(cls: type, include_private: bool) -> tuple:
+    """Method names defined on cls and its bases (excluding object), computed once per class"""
+    names = set()
+    for klass in cls.__mro__[:-1]:
+        for name, attr in klass.__dict__.items():
+            if not include_private and name.startswith('_'):
+                continue
+            if isinstance(attr, (staticmethod, classmethod)) or inspect.isfunction(attr) or inspect.isbuiltin(attr):
+                names.add(name)
+    return tuple(sorted(names))
+
+
 def invoke_service_method(
     service_name: str,
     method_name: str,
@@ -212,16 +393,13 @@ def invoke_service_method(
     include_private: bool = False,
     **kwargs,
 ) -> Any:
-    exports = get_service_method_exports(slug=service_name, include_private=include_private)
-    methods = exports.get(service_name, {})
-    method = methods.get(method_name)
-
-    if not callable(method):
-        instance = get_service_instances().get(service_name)
-        method = getattr(instance, method_name, None) if instance is not None else None
-        if callable(method) and not include_private and method_name.startswith('_'):
-            method = None
-
+    # The exports map only ever narrowed this lookup before falling back to the instance, so go straight there
+    instance = _get_or_create_instance(service_name)
+    if instance is None:
+        return default
+    if not include_private and method_name.startswith('_'):
+        return default
+    method = getattr(instance, method_name, None)
     if not callable(method):
         return default
 
@@ -239,15 +417,18 @@ def invoke_first_available_method(
     include_private: bool = False,
     **kwargs,
 ) -> Any:
-    exports = get_service_method_exports(include_private=include_private)
-    instances = get_service_instances()
-    for service_name, instance in instances.items():
-        methods = exports.get(service_name, {})
-        method = methods.get(method_name)
-        if not callable(method):
-            method = getattr(instance, method_name, None)
-            if callable(method) and not include_private and method_name.startswith('_'):
-                method = None
+    for service_name in get_service_instances():
+        # Unbuilt services are skipped when their metadata rules the method out, so they aren't imported
+        # just to be checked. Already-built ones are always checked on the instance, as stale metadata
+        # (e.g. SKILL_METADATA_SYNC_ONLY_MISSING) may omit a newly added hook.
+        if service_name not in _instance_cache and not _may_provide(service_name, method_name):
+            continue
+        instance = _get_or_create_instance(service_name)
+        if instance is None:
+            continue
+        method = getattr(instance, method_name, None)
+        if callable(method) and not include_private and method_name.startswith('_'):
+            method = None
         if not callable(method):
             continue
         try:
@@ -261,20 +442,25 @@ def invoke_first_available_method(
 
 
 def discover_service_commands(module_path: str, class_name: str) -> List[str]:
+    return list(_discover_service_commands(module_path, class_name))
+
+
+@functools.lru_cache(maxsize=None)
+def _discover_service_commands(module_path: str, class_name: str) -> tuple:
     try:
         module = importlib.import_module(module_path)
         klass = getattr(module, class_name)
     except Exception as exc:
         logger.warning("Could not import %s.%s for command discovery: %s", module_path, class_name, exc)
-        return []
+        return ()
 
     module_registered = _resolve_list(getattr(module, 'SERVICE_SKILL_COMMANDS', None))
     if module_registered:
-        return sorted({str(item) for item in module_registered if item and not str(item).startswith('_')})
+        return tuple(sorted({str(item) for item in module_registered if item and not str(item).startswith('_')}))
 
     class_registered = _resolve_list(getattr(klass, 'SKILL_COMMANDS', None))
     if class_registered:
-        return sorted({str(item) for item in class_registered if item and not str(item).startswith('_')})
+        return tuple(sorted({str(item) for item in class_registered if item and not str(item).startswith('_')}))
 
     commands: List[str] = []
     for name, attr in klass.__dict__.items():
@@ -286,7 +472,7 @@ def discover_service_commands(module_path: str, class_name: str) -> List[str]:
         if inspect.isfunction(attr):
             commands.append(name)
 
-    return sorted(set(commands))
+    return tuple(sorted(set(commands)))
 
 
 def sync_skill_metadata_commands(skills_dir: Optional[Path] = None, only_missing: bool = False, dry_run: bool = False) -> Dict[str, Any]:
@@ -339,10 +525,12 @@ def sync_skill_metadata_commands(skills_dir: Optional[Path] = None, only_missing
 
         raw["commands"] = discovered
         if not dry_run:
-            metadata_path.write_text(json.dumps(raw, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            _write_atomic(metadata_path, _dump_metadata_json(raw))
 
         summary["updated"].append(entry.name)
 
+    if summary["updated"] and root == SKILLS_DIR:
+        reload_if_changed()
     return summary
 
 
@@ -364,62 +552,34 @@ def get_plugin_api_status(config_module: Any, include_disabled: bool = False) ->
         if not include_disabled and not skill.enabled:
             continue
 
-        metadata = skill.metadata or {}
-        required_config = [str(item) for item in _resolve_list(metadata.get("required_config")) if item]
-        if not required_config:
+        if not skill.required_config:
             continue
 
-        status_label = str(metadata.get("status_label") or skill.name or slug).strip()
-        service_ready = all(_is_config_value_set(config_module, key) for key in required_config)
-        statuses.append(f"{status_label} {'✅' if service_ready else '❌'}")
+        service_ready = all(_is_config_value_set(config_module, key) for key in skill.required_config)
+        statuses.append(f"{skill.status_label} {'✅' if service_ready else '❌'}")
 
     return statuses
 
 
 def get_required_config_keys(include_disabled: bool = False) -> List[str]:
-    keys: List[str] = []
-
-    for _, skill in get_skill_definitions().items():
-        if not include_disabled and not skill.enabled:
-            continue
-
-        metadata = skill.metadata or {}
-        required_config = [str(item) for item in _resolve_list(metadata.get("required_config")) if item]
-        keys.extend(required_config)
-
-    seen = set()
-    ordered = []
-    for key in keys:
-        upper_key = key.strip().upper()
-        if not upper_key or upper_key in seen:
-            continue
-        seen.add(upper_key)
-        ordered.append(upper_key)
-
-    return ordered
+    # dict.fromkeys dedupes while keeping first-seen order
+    return list(dict.fromkeys(
+        upper_key
+        for skill in get_skill_definitions().values()
+        if include_disabled or skill.enabled
+        for upper_key in (key.strip().upper() for key in skill.required_config)
+        if upper_key
+    ))
 
 
 def get_optional_config_keys(include_disabled: bool = False) -> List[str]:
-    keys: List[str] = []
-
-    for _, skill in get_skill_definitions().items():
-        if not include_disabled and not skill.enabled:
-            continue
-
-        metadata = skill.metadata or {}
-        optional_config = [str(item) for item in _resolve_list(metadata.get("optional_config")) if item]
-        keys.extend(optional_config)
-
-    seen = set()
-    ordered = []
-    for key in keys:
-        upper_key = key.strip().upper()
-        if not upper_key or upper_key in seen:
-            continue
-        seen.add(upper_key)
-        ordered.append(upper_key)
-
-    return ordered
+    return list(dict.fromkeys(
+        upper_key
+        for skill in get_skill_definitions().values()
+        if include_disabled or skill.enabled
+        for upper_key in (key.strip().upper() for key in skill.optional_config)
+        if upper_key
+    ))
 
 
 __all__ = [
@@ -427,6 +587,8 @@ __all__ = [
     "get_skill_definitions",
     "get_skill",
     "get_service_instances",
+    "initialize_registry",
+    "reload_if_changed",
     "get_service_method_exports",
     "invoke_service_method",
     "invoke_first_available_method",
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Compile .env into config_cache.py so config.py can skip dotenv parsing at startup.
+
+Run from anywhere after editing .env, then start the bot with USE_CONFIG_CACHE=1.
+config.py ignores the cache whenever .env is newer than it.
+"""
+import os
+import sys
+
+from dotenv import dotenv_values
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_PATH = os.path.join(ROOT_DIR, ".env")
+CACHE_PATH = os.path.join(ROOT_DIR, "config_cache.py")
+
+
+def main():
+    if not os.path.exists(ENV_PATH):
+        print(f"❌ No .env found at {ENV_PATH}")
+        return 1
+
+    values = {key: value for key, value in dotenv_values(ENV_PATH).items() if value is not None}
+    lines = ["# Generated by scripts/make_config_cache.py from .env - do not edit, rerun the script", "ENV = {"]
+    lines.extend(f"    {key!r}: {value!r}," for key, value in sorted(values.items()))
+    lines.append("}")
+
+    with open(CACHE_PATH, "w", encoding="utf-8") as cache_file:
+        cache_file.write("\n".join(lines) + "\n")
+
+    print(f"✅ Wrote {len(values)} settings to {CACHE_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
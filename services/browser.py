@@ -1,9 +1,10 @@
+import atexit
 import logging
 import os
 import shutil
-import subprocess
 import tempfile
-import time
+import threading
+from collections import deque
 from urllib.parse import quote_plus
 
 from selenium import webdriver
@@ -18,212 +19,230 @@ from webdriver_manager.chrome import ChromeDriverManager
 
 logger = logging.getLogger(__name__)
 
+BRAVE_PATHS = (
+    '/usr/bin/brave-browser',
+    '/usr/bin/brave',
+    '/snap/bin/brave',
+    '/opt/brave.com/brave/brave-browser',
+)
+
+# Upper bound on waiting for YouTube's skip-ad button; returns as soon as it is clickable
+SKIP_AD_TIMEOUT = 15
+
+# Selector lists are OR-ed into one query so each lookup is a single WebDriver round-trip
+VIDEO_LINK_SELECTOR = ", ".join([
+    "ytd-video-renderer a#video-title",
+    "a#video-title",
+    "ytd-video-renderer .title-and-badge a",
+    "#video-title.yt-simple-endpoint",
+    "ytd-video-renderer h3 a",
+])
+SKIP_AD_SELECTOR = ", ".join([
+    "button.ytp-ad-skip-button",
+    "button.ytp-skip-ad-button",
+    ".ytp-ad-skip-button-container button",
+    "button[aria-label*='Skip']",
+])
+
 
 class BrowserAutomationService:
-    def automate(self, action_type, **kwargs):
-        driver = None
-        temp_dir = None
-        try:
+    def __init__(self):
+        # One browser is launched on first use and shared by every automate() call
+        self._driver = None
+        self._temp_dir = None
+        # Profile dirs left by a closed browser, reused by the next launch instead of a fresh mkdtemp
+        self._profile_pool = deque()
+        self._driver_lock = threading.Lock()
+        self._atexit_registered = False
+        # The install location doesn't change while the bot runs, so probe for Brave once
+        self._brave_binary = next((path for path in BRAVE_PATHS if os.path.exists(path)), None)
+        if self._brave_binary:
+            logger.info(f"Found Brave browser at: {self._brave_binary}")
+
+    def _ensure_driver(self):
+        """Return the shared browser, launching it (or replacing one the user closed); call with _driver_lock held"""
+        if self._driver is not None:
             try:
-                subprocess.run(['pkill', '-f', 'chrome.*--user-data-dir=/tmp/chrome_'], capture_output=True, timeout=3)
-                subprocess.run(['pkill', '-f', 'brave.*--user-data-dir=/tmp/chrome_'], capture_output=True, timeout=3)
-                time.sleep(1)
-                logger.info("Cleaned up previous browser automation instances")
-            except Exception as e:
-                logger.debug(f"Browser cleanup: {e}")
-
-            brave_paths = [
-                '/usr/bin/brave-browser',
-                '/usr/bin/brave',
-                '/snap/bin/brave',
-                '/opt/brave.com/brave/brave-browser',
-            ]
-
-            brave_binary = None
-            for path in brave_paths:
-                if os.path.exists(path):
-                    brave_binary = path
-                    logger.info(f"Found Brave browser at: {path}")
-                    break
-
-            chrome_options = Options()
-            temp_dir = tempfile.mkdtemp(prefix="chrome_")
-            chrome_options.add_argument(f'--user-data-dir={temp_dir}')
-            chrome_options.add_argument('--no-first-run')
-            chrome_options.add_argument('--no-default-browser-check')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-
-            if brave_binary:
-                chrome_options.binary_location = brave_binary
-                logger.info("Using Brave browser with ad blocking")
+                self._driver.window_handles
+                return self._driver
+            except Exception:
+                logger.info("Browser automation window is gone; starting a new one")
+                self._close_driver()
+
+        chrome_options = Options()
+        temp_dir = self._profile_pool.popleft() if self._profile_pool else tempfile.mkdtemp(prefix="chrome_")
+        chrome_options.add_argument(f'--user-data-dir={temp_dir}')
+        chrome_options.add_argument('--no-first-run')
+        chrome_options.add_argument('--no-default-browser-check')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        if self._brave_binary:
+            chrome_options.binary_location = self._brave_binary
+            logger.info("Using Brave browser with ad blocking")
 
+        try:
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=chrome_options)
             driver.set_page_load_timeout(30)
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        self._driver = driver
+        self._temp_dir = temp_dir
+        if not self._atexit_registered:
+            atexit.register(self._shutdown)
+            self._atexit_registered = True
+        return driver
+
+    def _close_driver(self):
+        driver, temp_dir = self._driver, self._temp_dir
+        self._driver = None
+        self._temp_dir = None
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if temp_dir:
+            self._profile_pool.appendleft(temp_dir)
+
+    def _shutdown(self):
+        with self._driver_lock:
+            self._close_driver()
+            while self._profile_pool:
+                shutil.rmtree(self._profile_pool.popleft(), ignore_errors=True)
+
+    def stop_playback(self):
+        """Pause any media playing in the shared browser (e.g. a video started by youtube_play)"""
+        with self._driver_lock:
+            if self._driver is None:
+                return "ℹ️ Nothing is playing in the automation browser."
+            try:
+                self._driver.execute_script("document.querySelectorAll('video, audio').forEach(m => m.pause());")
+            except Exception as e:
+                logger.error(f"Stopping browser playback failed: {e}")
+                self._close_driver()
+            return "⏹️ Playback stopped."
 
-            result = ""
-
-            if action_type == "youtube_play":
-                search_query = kwargs.get("query", "")
-                driver.get("https://www.youtube.com")
-                time.sleep(3)
-
-                try:
-                    reject_button = driver.find_element(By.XPATH, "//button[@aria-label='Reject all']")
-                    reject_button.click()
-                    time.sleep(1)
-                except Exception:
-                    pass
-
-                try:
-                    search_box = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.NAME, "search_query"))
-                    )
-                    search_box.send_keys(search_query)
-                    search_box.send_keys(Keys.RETURN)
-                    time.sleep(5)
-
-                    def try_skip_ad():
-                        try:
-                            skip_selectors = [
-                                "button.ytp-ad-skip-button",
-                                "button.ytp-skip-ad-button",
-                                ".ytp-ad-skip-button-container button",
-                                "button[aria-label*='Skip']",
-                            ]
-                            for selector in skip_selectors:
-                                try:
-                                    skip_btn = driver.find_element(By.CSS_SELECTOR, selector)
-                                    if skip_btn.is_displayed():
-                                        skip_btn.click()
-                                        logger.info("Skipped ad successfully")
-                                        return True
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-                        return False
-
-                    video_clicked = False
-                    selectors = [
-                        "ytd-video-renderer a#video-title",
-                        "a#video-title",
-                        "ytd-video-renderer .title-and-badge a",
-                        "#video-title.yt-simple-endpoint",
-                        "ytd-video-renderer h3 a",
-                    ]
-
-                    for selector in selectors:
-                        try:
-                            videos = driver.find_elements(By.CSS_SELECTOR, selector)
-                            if videos and len(videos) > 0:
-                                first_video = videos[0]
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", first_video)
-                                time.sleep(1)
+    def automate(self, action_type, **kwargs):
+        try:
+            with self._driver_lock:
+                driver = self._ensure_driver()
+                # Each request starts without the previous request's cookies
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+
+                result = ""
+
+                if action_type == "youtube_play":
+                    search_query = kwargs.get("query", "")
+                    driver.get("https://www.youtube.com")
+
+                    try:
+                        reject_button = WebDriverWait(driver, 2).until(
+                            EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Reject all']"))
+                        )
+                        reject_button.click()
+                    except Exception:
+                        pass
+
+                    try:
+                        search_box = WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.NAME, "search_query"))
+                        )
+                        search_box.send_keys(search_query)
+                        search_box.send_keys(Keys.RETURN)
+                        WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "a#video-title"))
+                        )
+
+                        def find_skip_button(d):
+                            return next((b for b in d.find_elements(By.CSS_SELECTOR, SKIP_AD_SELECTOR) if b.is_displayed()), None)
+
+                        def try_skip_ad():
+                            try:
+                                skip_btn = WebDriverWait(driver, SKIP_AD_TIMEOUT, poll_frequency=0.25).until(find_skip_button)
+                                skip_btn.click()
+                                logger.info("Skipped ad successfully")
+                                return True
+                            except Exception:
+                                return False
+
+                        video_clicked = False
+                        for video in driver.find_elements(By.CSS_SELECTOR, VIDEO_LINK_SELECTOR):
+                            try:
+                                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", video)
                                 try:
-                                    first_video.click()
-                                    video_clicked = True
-                                    time.sleep(3)
-                                    for _ in range(3):
-                                        if try_skip_ad():
-                                            break
-                                        time.sleep(1)
-                                    result = f"▶️ Playing: {search_query}"
-                                    break
+                                    WebDriverWait(driver, 5).until(EC.element_to_be_clickable(video)).click()
                                 except Exception:
-                                    driver.execute_script("arguments[0].click();", first_video)
-                                    video_clicked = True
-                                    time.sleep(3)
-                                    for _ in range(3):
-                                        if try_skip_ad():
-                                            break
-                                        time.sleep(1)
-                                    result = f"▶️ Playing: {search_query}"
-                                    break
-                        except Exception as e:
-                            logger.info(f"Selector {selector} failed: {e}")
-                            continue
-
-                    if not video_clicked:
-                        try:
-                            videos = driver.find_elements(By.CSS_SELECTOR, "a#video-title")
-                            if videos and len(videos) > 0:
-                                video_url = videos[0].get_attribute('href')
-                                if video_url:
-                                    driver.get(video_url)
-                                    video_clicked = True
-                                    time.sleep(3)
-                                    for _ in range(5):
-                                        if try_skip_ad():
-                                            break
-                                        time.sleep(1)
-                                    result = f"▶️ Playing: {search_query}"
-                        except Exception as e:
-                            logger.error(f"Direct navigation failed: {e}")
-
-                    if not video_clicked:
-                        result = f"⚠️ Opened YouTube search for: {search_query} (couldn't auto-play, please click manually)"
-
-                except Exception as e:
-                    logger.error(f"YouTube automation error: {e}")
-                    result = "⚠️ YouTube search opened, manual interaction needed"
-
-            elif action_type == "web_search":
-                query = kwargs.get("query", "")
-                search_engine = kwargs.get("engine", "google")
-
-                if search_engine == "google":
-                    driver.get("https://www.google.com")
-                    search_box = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.NAME, "q"))
-                    )
-                    search_box.send_keys(query)
-                    search_box.send_keys(Keys.RETURN)
-                    result = f"🔍 Searched Google for: {query}"
-                elif search_engine in ["duckduckgo", "duck duck go", "ddg"]:
-                    driver.get(f"https://duckduckgo.com/?q={quote_plus(query)}")
-                    result = f"🔍 Searched DuckDuckGo for: {query}"
-                else:
-                    driver.get(f"https://duckduckgo.com/?q={quote_plus(query)}")
-                    result = f"🔍 Searched DuckDuckGo for: {query}"
-
-            elif action_type == "open_url":
-                url = kwargs.get("url", "")
-                driver.get(url)
-                result = f"🌐 Opened: {url}"
-
-            elif action_type == "custom":
-                instructions = kwargs.get("instructions", "")
-                url = kwargs.get("url", "https://google.com")
-                driver.get(url)
-                result = f"🤖 Automated browser: {instructions}"
-
-            if action_type == "youtube_play":
-                try:
-                    while True:
-                        time.sleep(3600)
-                except KeyboardInterrupt:
-                    pass
-                return result
-
-            time.sleep(30)
-            if driver:
-                driver.quit()
-            if temp_dir:
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                                    driver.execute_script("arguments[0].click();", video)
+                                video_clicked = True
+                                try_skip_ad()
+                                result = f"▶️ Playing: {search_query}"
+                                break
+                            except Exception as e:
+                                logger.info(f"Video link click failed: {e}")
+                                continue
+
+                        if not video_clicked:
+                            try:
+                                videos = driver.find_elements(By.CSS_SELECTOR, "a#video-title")
+                                if videos and len(videos) > 0:
+                                    video_url = videos[0].get_attribute('href')
+                                    if video_url:
+                                        driver.get(video_url)
+                                        video_clicked = True
+                                        try_skip_ad()
+                                        result = f"▶️ Playing: {search_query}"
+                            except Exception as e:
+                                logger.error(f"Direct navigation failed: {e}")
+
+                        if not video_clicked:
+                            result = f"⚠️ Opened YouTube search for: {search_query} (couldn't auto-play, please click manually)"
+
+                    except Exception as e:
+                        logger.error(f"YouTube automation error: {e}")
+                        result = "⚠️ YouTube search opened, manual interaction needed"
+
+                elif action_type == "web_search":
+                    query = kwargs.get("query", "")
+                    search_engine = kwargs.get("engine", "google")
+
+                    if search_engine == "google":
+                        driver.get("https://www.google.com")
+                        search_box = WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.NAME, "q"))
+                        )
+                        search_box.send_keys(query)
+                        search_box.send_keys(Keys.RETURN)
+                        result = f"🔍 Searched Google for: {query}"
+                    elif search_engine in ["duckduckgo", "duck duck go", "ddg"]:
+                        driver.get(f"https://duckduckgo.com/?q={quote_plus(query)}")
+                        result = f"🔍 Searched DuckDuckGo for: {query}"
+                    else:
+                        driver.get(f"https://duckduckgo.com/?q={quote_plus(query)}")
+                        result = f"🔍 Searched DuckDuckGo for: {query}"
+
+                elif action_type == "open_url":
+                    url = kwargs.get("url", "")
+                    driver.get(url)
+                    result = f"🌐 Opened: {url}"
+
+                elif action_type == "custom":
+                    instructions = kwargs.get("instructions", "")
+                    url = kwargs.get("url", "https://google.com")
+                    driver.get(url)
+                    result = f"🤖 Automated browser: {instructions}"
+
+            # The page stays open in the shared browser; stop_playback() or the next call takes it over
             return result
 
         except Exception as e:
             logger.error(f"Browser automation error: {e}")
-            if driver:
-                try:
-                    driver.quit()
-                except Exception:
-                    pass
-            if temp_dir:
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            with self._driver_lock:
+                self._close_driver()
             return f"❌ Browser automation failed: {str(e)}"
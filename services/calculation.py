@@ -1,32 +1,32 @@
 import re
 
 
+CALCULATION_EXCLUDE_PATTERNS = (
+    re.compile(r'what is (?:my|your|the) (?:id|user|name|telegram|chat)'),
+    re.compile(r'what is (?:this|that|it)'),
+    re.compile(r"what(?:\'s| is) (?:my|your)"),
+    re.compile(r'who (?:am i|are you|is)'),
+    re.compile(r'what (?:can you|are you)'),
+)
+CALCULATION_PATTERNS = (
+    re.compile(r'(?:calculate|compute) (.+?)(?:\?|$)'),
+    re.compile(r'what is (\d+[\+\-\*/\^%].+?)(?:\?|$)'),
+    re.compile(r'(?<!\d)(\d+(?:\.\d+)?) (?:\+|\-|\*|\/|plus|minus|times|divided by) (.+)'),
+    re.compile(r'convert (.+?) (?:to|into) (.+)'),
+    re.compile(r'how many (.+?) (?:in|are in) (.+?)(?:\?|$)'),
+)
+
+
 class CalculationService:
     def detect_request(self, text):
         text_lower = text.lower().strip()
 
-        exclude_patterns = [
-            r'what is (?:my|your|the) (?:id|user|name|telegram|chat)',
-            r'what is (?:this|that|it)',
-            r"what(?:\'s| is) (?:my|your)",
-            r'who (?:am i|are you|is)',
-            r'what (?:can you|are you)',
-        ]
-
-        for pattern in exclude_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in CALCULATION_EXCLUDE_PATTERNS:
+            if pattern.search(text_lower):
                 return None
 
-        calc_patterns = [
-            r'(?:calculate|compute) (.+?)(?:\?|$)',
-            r'what is (\d+[\+\-\*/\^%].+?)(?:\?|$)',
-            r'(\d+(?:\.\d+)?) (?:\+|\-|\*|\/|plus|minus|times|divided by) (.+)',
-            r'convert (.+?) (?:to|into) (.+)',
-            r'how many (.+?) (?:in|are in) (.+?)(?:\?|$)',
-        ]
-
-        for pattern in calc_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in CALCULATION_PATTERNS:
+            if pattern.search(text_lower):
                 return {'action': 'calculate', 'expression': text}
 
         return None
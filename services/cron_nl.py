@@ -9,6 +9,18 @@ import database
 
 logger = logging.getLogger(__name__)
 
+# Substring keyword checks compiled into one alternation each (same matches as `keyword in text`)
+MANAGEMENT_KEYWORDS_RE = re.compile('|'.join(map(re.escape, [
+    "delete job", "remove job", "disable job", "enable job", "pause job",
+    "edit job", "change job", "update job", "modify job", "list jobs",
+    "show jobs", "my jobs", "stop job", "start job", "resume job",
+])))
+CRON_KEYWORDS_RE = re.compile('|'.join(map(re.escape, [
+    "remind me", "schedule", "every hour", "every day", "every morning",
+    "daily at", "everyday", "send me a message", "notify me", "alert me",
+])))
+LIST_JOBS_PATTERN = re.compile(r'(?:list|show|view|display)\s+(?:all\s+)?(?:my\s+)?(?:cron\s+)?jobs?')
+
 
 class CronNLService:
     def looks_like_management_request(self, text):
@@ -16,23 +28,14 @@ class CronNLService:
         if not text_lower:
             return False
 
-        management_keywords = [
-            "delete job", "remove job", "disable job", "enable job", "pause job",
-            "edit job", "change job", "update job", "modify job", "list jobs",
-            "show jobs", "my jobs", "stop job", "start job", "resume job",
-        ]
-        return any(keyword in text_lower for keyword in management_keywords)
+        return MANAGEMENT_KEYWORDS_RE.search(text_lower) is not None
 
     def looks_like_cron_request(self, text):
         text_lower = (text or '').lower().strip()
         if not text_lower:
             return False
 
-        cron_keywords = [
-            "remind me", "schedule", "every hour", "every day", "every morning",
-            "daily at", "everyday", "send me a message", "notify me", "alert me",
-        ]
-        return any(keyword in text_lower for keyword in cron_keywords)
+        return CRON_KEYWORDS_RE.search(text_lower) is not None
 
     def _extract_daily_time(self, text):
         match = re.search(r'\bat\s+(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b', text, re.IGNORECASE)
@@ -172,7 +175,7 @@ Only return the JSON, nothing else.'''
     def manage_cron_job_nl(self, text, user_id, get_ai_response, schedule_job, scheduler):
         text_lower = text.lower().strip()
 
-        if re.search(r'(?:list|show|view|display)\s+(?:all\s+)?(?:my\s+)?(?:cron\s+)?jobs?', text_lower):
+        if LIST_JOBS_PATTERN.search(text_lower):
             jobs = database.get_all_cron_jobs()
             if not jobs:
                 return "📋 No cron jobs configured. Say something like 'remind me to check email every morning' to create one."
@@ -239,7 +242,7 @@ Only return the JSON, nothing else.'''
         return None
 
     def interpret_cron_management(self, text, user_id, get_ai_response):
-        jobs = database.get_all_cron_jobs()
+        jobs = database.get_cron_job_summaries()
         job_names = [job['name'] for job in jobs]
 
         prompt = f'''Analyze this cron job management request.
@@ -424,6 +424,28 @@ HELP_TEXT = (
     "/email search <query> - search your inbox\n"
     "/email read <number> - read a numbered email from the latest list"
 )
+RECENT_EMAIL_PATTERNS = (
+    re.compile(r"(?:read|show|check|get|fetch|see|display)\s+(?:my\s+)?(?:last|recent|latest)\s+(\d+)\s+emails?"),
+    re.compile(r"last\s+(\d+)\s+emails?"),
+    re.compile(r"recent\s+(\d+)\s+emails?"),
+    re.compile(r"show\s+(?:me\s+)?(\d+)\s+emails?"),
+    re.compile(r"(?<!\d)(\d+)\s+recent\s+emails?"),
+    re.compile(r"(?<!\d)(\d+)\s+last\s+emails?"),
+    re.compile(r"latest\s+(\d+)\s+emails?"),
+    re.compile(r"(?<!\d)(\d+)\s+emails?\s+(?:from|in)\s+(?:my\s+)?inbox"),
+)
+SEARCH_EMAIL_PATTERNS = (
+    re.compile(r"search (?:for |my )?email(?:s)? (?:about |for |with )?(.+)"),
+    re.compile(r"find email(?:s)? (?:about |with |from )?(.+)"),
+    re.compile(r"email(?:s)? (?:about |containing |with )(.+)"),
+    re.compile(r"look for email(?:s)? (.+)"),
+)
+READ_EMAIL_PATTERNS = (
+    re.compile(r"(?:read|show|open|view|display|get)\s+email\s+(?:number\s+)?(\d+)"),
+    re.compile(r"email\s+(\d+)"),
+    re.compile(r"(?:number\s+)?(\d+)(?:\s+email)?$"),
+)
+TRAILING_PLEASE_PATTERN = re.compile(r"(?<!\s)\s+(please|plz|pls)$")
 
 
 def _parse_limit_arg(args, default=DEFAULT_EMAIL_LIMIT):
@@ -523,18 +545,8 @@ def interpret_email_request(text: str):
     if any(keyword in text_lower for keyword in unread_keywords):
         return {"action": "unread", "params": {}}
 
-    recent_patterns = [
-        r"(?:read|show|check|get|fetch|see|display)\s+(?:my\s+)?(?:last|recent|latest)\s+(\d+)\s+emails?",
-        r"last\s+(\d+)\s+emails?",
-        r"recent\s+(\d+)\s+emails?",
-        r"show\s+(?:me\s+)?(\d+)\s+emails?",
-        r"(\d+)\s+recent\s+emails?",
-        r"(\d+)\s+last\s+emails?",
-        r"latest\s+(\d+)\s+emails?",
-        r"(\d+)\s+emails?\s+(?:from|in)\s+(?:my\s+)?inbox"
-    ]
-    for pattern in recent_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern in RECENT_EMAIL_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             count = int(match.group(1))
             return {"action": "recent", "params": {"limit": min(count, MAX_EMAIL_LIMIT)}}
@@ -545,17 +557,11 @@ def interpret_email_request(text: str):
     if any(keyword in text_lower for keyword in recent_keywords):
         return {"action": "recent", "params": {"limit": DEFAULT_EMAIL_LIMIT}}
 
-    search_patterns = [
-        r"search (?:for |my )?email(?:s)? (?:about |for |with )?(.+)",
-        r"find email(?:s)? (?:about |with |from )?(.+)",
-        r"email(?:s)? (?:about |containing |with )(.+)",
-        r"look for email(?:s)? (.+)"
-    ]
-    for pattern in search_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern in SEARCH_EMAIL_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             query = match.group(1).strip()
-            query = re.sub(r"\s+(please|plz|pls)$", "", query)
+            query = TRAILING_PLEASE_PATTERN.sub("", query)
             return {"action": "search", "params": {"query": query}}
 
     return None
@@ -563,13 +569,8 @@ def interpret_email_request(text: str):
 
 def interpret_read_email_request(text: str):
     text_lower = text.lower()
-    read_patterns = [
-        r"(?:read|show|open|view|display|get)\s+email\s+(?:number\s+)?(\d+)",
-        r"email\s+(\d+)",
-        r"(?:number\s+)?(\d+)(?:\s+email)?$"
-    ]
-    for pattern in read_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern in READ_EMAIL_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             return int(match.group(1))
     return None
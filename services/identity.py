@@ -17,6 +17,15 @@ def _sync_current_datetime(identity_text):
     return re.sub(pattern, rf'\1{now_str}', identity_text, flags=re.IGNORECASE)
 
 
+IDENTITY_PATTERNS = (
+    re.compile(r'(?:change|update|edit|set|modify)\s+(?:your\s+)?(?:identity|personality|name|traits?|style)'),
+    re.compile(r'(?:be|act)\s+(?:more\s+)?(?:professional|casual|friendly|formal|funny|serious)'),
+    re.compile(r'(?:your\s+)?name\s+(?:is|should be)\s+(.+)'),
+    re.compile(r'call\s+yourself\s+(.+)'),
+    re.compile(r'identity\s*:\s*(.+)'),
+)
+
+
 class IdentityService:
     def process_identity_update(self, user_request, user_id, read_identity, ask_ollama):
         current_identity = read_identity()
@@ -55,16 +64,8 @@ Return the FULL updated identity.md content:'''
     def interpret_identity_request(self, text):
         text_lower = text.lower()
 
-        identity_patterns = [
-            r'(?:change|update|edit|set|modify)\s+(?:your\s+)?(?:identity|personality|name|traits?|style)',
-            r'(?:be|act)\s+(?:more\s+)?(?:professional|casual|friendly|formal|funny|serious)',
-            r'(?:your\s+)?name\s+(?:is|should be)\s+(.+)',
-            r'call\s+yourself\s+(.+)',
-            r'identity\s*:\s*(.+)'
-        ]
-
-        for pattern in identity_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in IDENTITY_PATTERNS:
+            if pattern.search(text_lower):
                 return {"action": "update_identity", "text": text}
 
         if any(keyword in text_lower for keyword in [
@@ -8,6 +8,22 @@ from duckduckgo_search import DDGS
 logger = logging.getLogger(__name__)
 
 
+SEARCH_PATTERNS = (
+    re.compile(r'(?:search|google|look up|find) (?:for |about )?(.+)'),
+    re.compile(r'what (?:is|are) (.+?)(?:\?|$)'),
+    re.compile(r'who (?:is|are|was|were) (.+?)(?:\?|$)'),
+    re.compile(r'where (?:is|are) (.+?)(?:\?|$)'),
+    re.compile(r'when (?:is|was|did) (.+?)(?:\?|$)'),
+    re.compile(r'how (?:to|do|does|did) (.+?)(?:\?|$)'),
+    re.compile(r'why (?:is|are|do|does|did) (.+?)(?:\?|$)'),
+)
+WIKIPEDIA_PATTERNS = (
+    re.compile(r'wikipedia (?:for |about )?(.+)'),
+    re.compile(r'tell me about (.+)'),
+    re.compile(r'(?:what|who) (?:is|are|was|were) (.+?)(?:\?|$)'),
+)
+
+
 class InfoSearchService:
     def detect_search_request(self, text, user_id=None, check_learned_patterns=None, learn_from_interaction=None):
         text_lower = text.lower().strip()
@@ -47,18 +63,8 @@ class InfoSearchService:
                 query = learned.split(':', 1)[1]
                 return {'action': 'search', 'query': query}
 
-        search_patterns = [
-            r'(?:search|google|look up|find) (?:for |about )?(.+)',
-            r'what (?:is|are) (.+?)(?:\?|$)',
-            r'who (?:is|are|was|were) (.+?)(?:\?|$)',
-            r'where (?:is|are) (.+?)(?:\?|$)',
-            r'when (?:is|was|did) (.+?)(?:\?|$)',
-            r'how (?:to|do|does|did) (.+?)(?:\?|$)',
-            r'why (?:is|are|do|does|did) (.+?)(?:\?|$)',
-        ]
-
-        for pattern in search_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in SEARCH_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 query = match.group(1).strip()
                 if query in time_date_exclusions:
@@ -110,14 +116,8 @@ class InfoSearchService:
                 query = learned.split(':', 1)[1]
                 return {'action': 'wiki', 'query': query}
 
-        wiki_patterns = [
-            r'wikipedia (?:for |about )?(.+)',
-            r'tell me about (.+)',
-            r'(?:what|who) (?:is|are|was|were) (.+?)(?:\?|$)',
-        ]
-
-        for pattern in wiki_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in WIKIPEDIA_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 query = match.group(1).strip()
                 if any(excl in query for excl in identity_exclusions):
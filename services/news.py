@@ -7,6 +7,16 @@ from newsapi import NewsApiClient
 logger = logging.getLogger(__name__)
 
 
+NEWS_PATTERNS = (
+    re.compile(r'(?:get|show|tell me|read|fetch)(?: me)?(?: the)? news'),
+    re.compile(r"(?:what\'s|what is|whats)(?: the)? (?:latest )?news"),
+    re.compile(r'news (?:about|on|for) (.+)'),
+    re.compile(r'headlines'),
+    re.compile(r'(?:top |latest )?news (?:today|now)?'),
+)
+NEWS_TOPIC_PATTERN = re.compile(r'news (?:about|on|for) (.+)')
+
+
 class NewsService:
     def detect_request(self, text, user_id=None, check_learned_patterns=None, learn_from_interaction=None):
         text_lower = text.lower().strip()
@@ -21,18 +31,10 @@ class NewsService:
                 if intent == 'news':
                     return {'action': 'news', 'topic': None}
 
-        news_patterns = [
-            r'(?:get|show|tell me|read|fetch)(?: me)?(?: the)? news',
-            r"(?:what\'s|what is|whats)(?: the)? (?:latest )?news",
-            r'news (?:about|on|for) (.+)',
-            r'headlines',
-            r'(?:top |latest )?news (?:today|now)?',
-        ]
-
-        for pattern in news_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in NEWS_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
-                topic_match = re.search(r'news (?:about|on|for) (.+)', text_lower)
+                topic_match = NEWS_TOPIC_PATTERN.search(text_lower)
                 if topic_match:
                     topic = topic_match.group(1).strip()
                     result = {'action': 'news', 'topic': topic}
@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import config
 
@@ -104,31 +104,53 @@ class UniversalNLUService:
             self._util = None
             self._intent_vectors = {}
 
-    def detect_intent(self, text: str) -> Optional[Dict[str, float]]:
-        if not text or not self.enabled or self._model is None or self._util is None:
-            return None
-
+    def _is_greeting(self, text: str) -> bool:
         normalized_text = re.sub(r'[^a-z0-9\s]', ' ', text.lower()).strip()
         normalized_text = re.sub(r'\s+', ' ', normalized_text)
-        if normalized_text in self._greeting_patterns:
-            return None
+        return normalized_text in self._greeting_patterns
+
+    def detect_intent(self, text: str) -> Optional[Dict[str, float]]:
+        return self.detect_intents([text])[0]
+
+    def detect_intents(self, texts: List[str]) -> List[Optional[Dict[str, float]]]:
+        return [hint for hint, _ in self.analyze(texts)]
+
+    def analyze(self, texts: List[str]) -> List[Tuple[Optional[Dict[str, float]], object]]:
+        """Embed several messages with one batched encode; returns (intent hint, vector) pairs lined up with texts."""
+        results: List[Tuple[Optional[Dict[str, float]], object]] = [(None, None)] * len(texts)
+        if not self.enabled or self._model is None or self._util is None:
+            return results
+
+        pending = [index for index, text in enumerate(texts) if text]
+        if not pending:
+            return results
 
         try:
-            query_vector = self._model.encode(text, convert_to_tensor=True, normalize_embeddings=True)
-            best_intent = None
-            best_score = -1.0
+            query_vectors = self._model.encode(
+                [texts[index] for index in pending],
+                batch_size=len(pending),
+                convert_to_tensor=True,
+                normalize_embeddings=True,
+            )
+            best = [(None, -1.0)] * len(pending)
 
             for intent, vectors in self._intent_vectors.items():
-                similarity_scores = self._util.cos_sim(query_vector, vectors)
-                score = float(similarity_scores.max().item())
-                if score > best_score:
-                    best_score = score
-                    best_intent = intent
+                similarity_scores = self._util.cos_sim(query_vectors, vectors)
+                for position, score in enumerate(similarity_scores.max(dim=1).values.tolist()):
+                    if score > best[position][1]:
+                        best[position] = (intent, score)
+
+            for position, index in enumerate(pending):
+                best_intent, best_score = best[position]
+                hint = None
+                # Greetings are still embedded (for the response cache) but never get an intent
+                if best_intent is not None and best_score >= self.min_confidence and not self._is_greeting(texts[index]):
+                    hint = {'intent': best_intent, 'confidence': best_score}
+                results[index] = (hint, query_vectors[position])
+        except Exception as exc:
+            logger.debug(f'Universal NLU analyze failed: {exc}')
 
-            if best_intent is None or best_score < self.min_confidence:
-                return None
+        return results
 
-            return {'intent': best_intent, 'confidence': best_score}
-        except Exception as exc:
-            logger.debug(f'Universal NLU detect_intent failed: {exc}')
-            return None
+    def similarity(self, first_vector, second_vector) -> float:
+        return float(self._util.cos_sim(first_vector, second_vector).item())
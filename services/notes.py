@@ -8,6 +8,15 @@ import database
 logger = logging.getLogger(__name__)
 
 
+NOTE_CREATE_PATTERNS = (
+    re.compile(r'(?:create|make|add|write|save|take)(?: a| new)? note'),
+    re.compile(r'note (?:this|that)'),
+    re.compile(r'remember (?:this|that)'),
+)
+NOTE_LIST_PATTERN = re.compile(r'(?:show|list|get|see|view)(?: my)? notes?')
+NOTE_SEARCH_PATTERN = re.compile(r'(?:search|find)(?: my)? notes? (?:for|about) (.+)')
+
+
 class NotesService:
     def detect_request(self, text, user_id=None, check_learned_patterns=None, learn_from_interaction=None):
         text_lower = text.lower().strip()
@@ -24,26 +33,20 @@ class NotesService:
                     query = intent.split(':', 1)[1]
                     return {'action': 'search', 'query': query}
 
-        create_patterns = [
-            r'(?:create|make|add|write|save|take)(?: a| new)? note',
-            r'note (?:this|that)',
-            r'remember (?:this|that)',
-        ]
-
-        for pattern in create_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in NOTE_CREATE_PATTERNS:
+            if pattern.search(text_lower):
                 result = {'action': 'create', 'text': text}
                 if user_id and learn_from_interaction:
                     learn_from_interaction(user_id, text_lower, 'notes', 'notes_create')
                 return result
 
-        if re.search(r'(?:show|list|get|see|view)(?: my)? notes?', text_lower):
+        if NOTE_LIST_PATTERN.search(text_lower):
             result = {'action': 'list'}
             if user_id and learn_from_interaction:
                 learn_from_interaction(user_id, text_lower, 'notes', 'notes_list')
             return result
 
-        search_match = re.search(r'(?:search|find)(?: my)? notes? (?:for|about) (.+)', text_lower)
+        search_match = NOTE_SEARCH_PATTERN.search(text_lower)
         if search_match:
             query = search_match.group(1).strip()
             result = {'action': 'search', 'query': query}
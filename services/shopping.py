@@ -3,6 +3,17 @@ import re
 import database
 
 
+# The add patterns lock onto the first add/put per line so long messages are not rescanned from every offset
+SHOPPING_ADD_PATTERNS = (
+    re.compile(r'^(?>.*?add )(.+) to (?:my )?shopping list', re.MULTILINE),
+    re.compile(r'^(?>.*?(?:put|add) )(.+) (?:on|in) (?:the |my )?(?:shopping )?list', re.MULTILINE),
+    re.compile(r'shopping list:? (.+)'),
+    re.compile(r'buy (.+)'),
+)
+SHOPPING_LIST_PATTERN = re.compile(r"(?:show|list|view|get|see|what\\'s (?:on|in))(?: my)? shopping list")
+SHOPPING_CLEAR_PATTERN = re.compile(r'clear(?: my)? shopping list')
+
+
 class ShoppingService:
     def detect_request(self, text, user_id=None, check_learned_patterns=None, learn_from_interaction=None):
         text_lower = text.lower().strip()
@@ -19,15 +30,8 @@ class ShoppingService:
                 if intent == 'shopping_clear':
                     return {'action': 'clear'}
 
-        add_patterns = [
-            r'add (.+) to (?:my )?shopping list',
-            r'(?:put|add) (.+) (?:on|in) (?:the |my )?(?:shopping )?list',
-            r'shopping list:? (.+)',
-            r'buy (.+)',
-        ]
-
-        for pattern in add_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in SHOPPING_ADD_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 items_text = match.group(1).strip()
                 result = {'action': 'add', 'items': items_text}
@@ -35,13 +39,13 @@ class ShoppingService:
                     learn_from_interaction(user_id, text_lower, 'shopping', f'shopping_add:{items_text}')
                 return result
 
-        if re.search(r"(?:show|list|view|get|see|what\\'s (?:on|in))(?: my)? shopping list", text_lower):
+        if SHOPPING_LIST_PATTERN.search(text_lower):
             result = {'action': 'list'}
             if user_id and learn_from_interaction:
                 learn_from_interaction(user_id, text_lower, 'shopping', 'shopping_list')
             return result
 
-        if re.search(r'clear(?: my)? shopping list', text_lower):
+        if SHOPPING_CLEAR_PATTERN.search(text_lower):
             result = {'action': 'clear'}
             if user_id and learn_from_interaction:
                 learn_from_interaction(user_id, text_lower, 'shopping', 'shopping_clear')
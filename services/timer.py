@@ -4,6 +4,14 @@ from datetime import datetime
 import database
 
 
+TIMER_CREATE_PATTERNS = (
+    re.compile(r'(?:set|start)(?: a)? timer (?:for )?(.+)'),
+    re.compile(r'timer (?:for )?(.+)'),
+    re.compile(r'countdown (?:for )?(.+)'),
+)
+TIMER_LIST_PATTERN = re.compile(r'(?:show|list|my)(?: my)? timers?')
+
+
 class TimerService:
     def detect_request(self, text, user_id=None, check_learned_patterns=None, learn_from_interaction=None):
         text_lower = text.lower().strip()
@@ -18,14 +26,8 @@ class TimerService:
                 if intent == 'timer_list':
                     return {'action': 'list'}
 
-        timer_patterns = [
-            r'(?:set|start)(?: a)? timer (?:for )?(.+)',
-            r'timer (?:for )?(.+)',
-            r'countdown (?:for )?(.+)',
-        ]
-
-        for pattern in timer_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in TIMER_CREATE_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 duration_text = match.group(1).strip()
                 result = {'action': 'create', 'duration': duration_text}
@@ -33,7 +35,7 @@ class TimerService:
                     learn_from_interaction(user_id, text_lower, 'timer', f'timer_create:{duration_text}')
                 return result
 
-        if re.search(r'(?:show|list|my)(?: my)? timers?', text_lower):
+        if TIMER_LIST_PATTERN.search(text_lower):
             result = {'action': 'list'}
             if user_id and learn_from_interaction:
                 learn_from_interaction(user_id, text_lower, 'timer', 'timer_list')
@@ -90,7 +92,7 @@ class TimerService:
 
         result = "⏱️ **Active Timers:**\n\n"
         for timer_id, name, duration_seconds, started_at, ends_at in timers:
-            ends_dt = datetime.fromisoformat(ends_at)
+            ends_dt = datetime.fromtimestamp(ends_at)
             now = datetime.now()
             remaining = (ends_dt - now).total_seconds()
 
@@ -8,6 +8,36 @@ import database
 logger = logging.getLogger(__name__)
 
 
+TRACKING_REPORT_PATTERNS = (
+    re.compile(r'(?:give me|show me|generate|create)\s+(?:a\s+)?(.+?)\s+report'),
+    re.compile(r'report\s+(?:on|about|for)\s+(?:my\s+)?(.+)'),
+    re.compile(r'how\s+(?:much|many|often)\s+(?:did i|have i)\s+(.+)'),
+    re.compile(r'\S\s+(?:statistics|stats|summary|analysis)'),
+)
+BEDTIME_PATTERNS = (
+    re.compile(r'good night'),
+    re.compile(r'going to (sleep|bed)'),
+    re.compile(r'signing off'),
+    re.compile(r'hitting the (sack|hay)'),
+    re.compile(r'time to sleep'),
+    re.compile(r'off to bed'),
+)
+WAKEUP_PATTERNS = (
+    re.compile(r'good morning'),
+    re.compile(r'just woke up'),
+    re.compile(r'waking up'),
+    re.compile(r'rise and shine'),
+    re.compile(r'wakey wakey'),
+)
+SLEEP_REPORT_SCHEDULE_PATTERNS = (
+    re.compile(r'after (a|1) week.*report'),
+    re.compile(r'report.*week'),
+    re.compile(r'weekly.*report'),
+    re.compile(r'track.*sleep'),
+)
+SLEEP_REPORT_DAYS_PATTERN = re.compile(r'(?<!\d)(\d+)\s*days?')
+
+
 class TrackingService:
     def detect_tracking_request(self, text, user_id, get_ai_response):
         text_lower = text.lower().strip()
@@ -23,14 +53,8 @@ class TrackingService:
         if sleep_result:
             return sleep_result
 
-        report_patterns = [
-            r'(?:give me|show me|generate|create)\s+(?:a\s+)?(.+?)\s+report',
-            r'report\s+(?:on|about|for)\s+(?:my\s+)?(.+)',
-            r'how\s+(?:much|many|often)\s+(?:did i|have i)\s+(.+)',
-            r'(.+)\s+(?:statistics|stats|summary|analysis)',
-        ]
-        for pattern in report_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in TRACKING_REPORT_PATTERNS:
+            if pattern.search(text_lower):
                 report_info = self.interpret_report_request(text, user_id, get_ai_response)
                 if report_info:
                     return self.generate_tracking_report(
@@ -148,23 +172,22 @@ Only return the JSON, nothing else.'''
     def generate_tracking_report(self, user_id, category, days=7):
         from datetime import datetime as dt
 
-        tracking_data = database.get_tracking_data(user_id, category, days)
-        if not tracking_data:
+        events = [
+            {
+                'event_type': row['event_type'],
+                'value': row['value'],
+                'unit': row['unit'],
+                'notes': row['notes'],
+                'timestamp': dt.fromtimestamp(row['timestamp'])
+            }
+            for row in database.get_tracking_data(user_id, category, days)
+        ]
+        if not events:
             categories = database.get_tracking_categories(user_id)
             if categories:
                 return f"📊 No {category} data found for the last {days} days.\n\nAvailable categories: {', '.join(categories)}"
             return "📊 No tracking data found. Start tracking by telling me what you're doing!"
 
-        events = []
-        for cat, event_type, value, unit, notes, timestamp in tracking_data:
-            events.append({
-                'event_type': event_type,
-                'value': value,
-                'unit': unit,
-                'notes': notes,
-                'timestamp': dt.fromisoformat(timestamp)
-            })
-
         report = f"📊 **{category.title()} Report - Last {days} Days**\n\n"
         report += f"📝 **Total Entries:** {len(events)}\n"
 
@@ -199,16 +222,11 @@ Only return the JSON, nothing else.'''
     def detect_sleep_tracking(self, text, user_id):
         text_lower = text.lower().strip()
 
-        bedtime_patterns = [
-            r'good night', r'going to (sleep|bed)', r'signing off',
-            r'hitting the (sack|hay)', r'time to sleep', r'off to bed',
-        ]
-        for pattern in bedtime_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in BEDTIME_PATTERNS:
+            if pattern.search(text_lower):
                 database.log_sleep_event(user_id, 'bedtime')
                 current_time = datetime.now().strftime("%I:%M %p")
-                report_patterns = [r'after (a|1) week.*report', r'report.*week', r'weekly.*report', r'track.*sleep']
-                should_schedule_report = any(re.search(p, text_lower) for p in report_patterns)
+                should_schedule_report = any(p.search(text_lower) for p in SLEEP_REPORT_SCHEDULE_PATTERNS)
                 if should_schedule_report:
                     job_name = f"sleep_report_{user_id}_{int(datetime.now().timestamp())}"
                     database.add_cron_job(
@@ -220,9 +238,8 @@ Only return the JSON, nothing else.'''
                     return f"🌙 Good night! The time is {current_time}. I'll track your sleep and send you a report in 7 days. Sweet dreams! 😴"
                 return f"🌙 Good night! The time is {current_time}. Sleep tight! 😴"
 
-        wakeup_patterns = [r'good morning', r'just woke up', r'waking up', r'rise and shine', r'wakey wakey']
-        for pattern in wakeup_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in WAKEUP_PATTERNS:
+            if pattern.search(text_lower):
                 database.log_sleep_event(user_id, 'wake')
                 current_time = datetime.now().strftime("%I:%M %p")
                 sleep_data = database.get_sleep_data(user_id, days=1)
@@ -233,50 +250,43 @@ Only return the JSON, nothing else.'''
                             bedtime_entry = timestamp
                             break
                     if bedtime_entry:
-                        bedtime_dt = datetime.fromisoformat(bedtime_entry)
+                        bedtime_dt = datetime.fromtimestamp(bedtime_entry)
                         wake_dt = datetime.now()
                         hours = (wake_dt - bedtime_dt).total_seconds() / 3600
                         return f"☀️ Good morning! The time is {current_time}. You got about {hours:.1f} hours of sleep. Have a great day! 🌟"
                 return f"☀️ Good morning! The time is {current_time}. Rise and shine! 🌟"
 
         if 'sleep report' in text_lower or 'how did i sleep' in text_lower or 'sleep analysis' in text_lower:
-            days_match = re.search(r'(\d+)\s*days?', text_lower)
+            days_match = SLEEP_REPORT_DAYS_PATTERN.search(text_lower)
             days = int(days_match.group(1)) if days_match else 7
             return self.generate_sleep_report(user_id, days)
 
         return None
 
     def generate_sleep_report(self, user_id, days=7):
-        sleep_data = database.get_sleep_data(user_id, days=days)
-        if not sleep_data:
-            return f"📊 No sleep data found for the last {days} days. Start tracking by saying 'good night' when you go to bed!"
-
-        sessions = []
-        current_bedtime = None
-        for event_type, timestamp, notes in sleep_data:
-            if event_type == 'bedtime':
-                current_bedtime = datetime.fromisoformat(timestamp)
-            elif event_type == 'wake' and current_bedtime:
-                wake_time = datetime.fromisoformat(timestamp)
-                duration = (wake_time - current_bedtime).total_seconds() / 3600
-                sessions.append({'bedtime': current_bedtime, 'wake': wake_time, 'duration': duration})
-                current_bedtime = None
-
-        if not sessions:
+        session_rows = database.get_sleep_sessions(user_id, days=days)
+        if not session_rows:
+            if not database.get_sleep_data(user_id, days=days):
+                return f"📊 No sleep data found for the last {days} days. Start tracking by saying 'good night' when you go to bed!"
             return "📊 No complete sleep sessions found. Make sure to log both 'good night' and 'good morning'!"
 
-        total_nights = len(sessions)
-        total_hours = sum(s['duration'] for s in sessions)
+        total_nights = len(session_rows)
+        total_hours = sum(hours for _, _, hours in session_rows)
         avg_hours = total_hours / total_nights
-        min_sleep = min(sessions, key=lambda x: x['duration'])
-        max_sleep = max(sessions, key=lambda x: x['duration'])
+        min_bedtime, _, min_hours = min(session_rows, key=lambda row: row[2])
+        max_bedtime, _, max_hours = max(session_rows, key=lambda row: row[2])
+        # Only the sessions listed below need their timestamps parsed
+        sessions = [
+            {'bedtime': datetime.fromtimestamp(bedtime), 'wake': datetime.fromtimestamp(wake), 'duration': hours}
+            for bedtime, wake, hours in session_rows[-5:]
+        ]
 
         report = f"📊 **Sleep Report - Last {days} Days**\n\n"
         report += f"🛌 **Total Nights Tracked:** {total_nights}\n"
         report += f"⏱️ **Average Sleep:** {avg_hours:.1f} hours/night\n"
         report += f"📈 **Total Sleep Time:** {total_hours:.1f} hours\n"
-        report += f"🌟 **Best Night:** {max_sleep['duration']:.1f} hours ({max_sleep['bedtime'].strftime('%b %d')})\n"
-        report += f"⚠️ **Shortest Night:** {min_sleep['duration']:.1f} hours ({min_sleep['bedtime'].strftime('%b %d')})\n\n"
+        report += f"🌟 **Best Night:** {max_hours:.1f} hours ({datetime.fromtimestamp(max_bedtime).strftime('%b %d')})\n"
+        report += f"⚠️ **Shortest Night:** {min_hours:.1f} hours ({datetime.fromtimestamp(min_bedtime).strftime('%b %d')})\n\n"
 
         if avg_hours >= 7:
             report += "✅ **Sleep Quality:** Good! You're getting recommended sleep.\n"
@@ -286,7 +296,7 @@ Only return the JSON, nothing else.'''
             report += "❌ **Sleep Quality:** Poor. You need more rest!\n"
 
         report += "\n📅 **Recent Sessions:**\n"
-        for i, session in enumerate(reversed(sessions[-5:]), 1):
+        for i, session in enumerate(reversed(sessions), 1):
             date_str = session['bedtime'].strftime('%b %d')
             bed_time = session['bedtime'].strftime('%I:%M %p')
             wake_time = session['wake'].strftime('%I:%M %p')
@@ -25,6 +25,30 @@ SERVICE_SKILL_COMMANDS = [
 ]
 
 
+WEATHER_PATTERNS = (
+    re.compile(r'(?:what(?:\'s| is)|how(?:\'s| is))? (?:the )?weather'),
+    re.compile(r'weather (?:in|for|at)'),
+    re.compile(r'(?:check|show|get|tell me)(?: the)? weather'),
+    re.compile(r'temperature (?:in|at|for)'),
+    re.compile(r'(?:is it|will it) (?:rain|snow|sunny|cold|hot)'),
+    re.compile(r'forecast (?:for|in)?'),
+)
+WEATHER_STYLE_ONLY_PATTERNS = (
+    re.compile(r'^(?:brief|short|detailed|detail|default|standard)\s+mode$', re.IGNORECASE),
+    re.compile(r'^(?:brief|short|detailed|detail|default|standard)$', re.IGNORECASE),
+    re.compile(r'^(?:news\s*like|news-like)\s+(?:brief|mode)$', re.IGNORECASE),
+)
+LOCATION_LEARNING_PATTERNS = (
+    re.compile(r'^(?:learn|remember|save) my location\s*[:\-]?\s*(.+)$', re.IGNORECASE),
+    re.compile(r'^(?:my location is|set my location to)\s+(.+)$', re.IGNORECASE),
+    re.compile(r'^(?:use|set) (.+) as my default location$', re.IGNORECASE),
+)
+WEATHER_CITY_PATTERN = re.compile(r'(?:in|for|at) ([a-zA-Z\s,]+)(?:\?|$)')
+WEATHER_STYLE_MODE_PATTERN = re.compile(r'\b(?:brief|short|detailed|detail|default|standard)\s+mode\b', re.IGNORECASE)
+WEATHER_STYLE_SUFFIX_PATTERN = re.compile(r'\b(?:in\s+)?(?:brief|short|detailed|detail|default|standard)\b$', re.IGNORECASE)
+WEATHER_TIME_WORDS_PATTERN = re.compile(r'\b(today|tonight|tomorrow|now|currently|right now)\b', re.IGNORECASE)
+
+
 class WeatherService:
     def __init__(self):
         pass
@@ -158,6 +182,7 @@ class WeatherService:
         user_id=None,
         get_user_context: Optional[Callable] = None,
         save_user_context: Optional[Callable] = None,
+        save_user_context_bulk: Optional[Callable] = None,
         check_learned_patterns: Optional[Callable] = None,
         learn_from_interaction: Optional[Callable] = None,
         ask_ollama: Optional[Callable] = None,
@@ -171,37 +196,23 @@ class WeatherService:
                 if last_city:
                     return {'is_weather': True, 'city': last_city, 'country_code': last_country}
 
-        weather_patterns = [
-            r'(?:what(?:\'s| is)|how(?:\'s| is))? (?:the )?weather',
-            r'weather (?:in|for|at)',
-            r'(?:check|show|get|tell me)(?: the)? weather',
-            r'temperature (?:in|at|for)',
-            r'(?:is it|will it) (?:rain|snow|sunny|cold|hot)',
-            r'forecast (?:for|in)?',
-        ]
-
-        for pattern in weather_patterns:
-            if re.search(pattern, text_lower):
-                city_match = re.search(r'(?:in|for|at) ([a-zA-Z\s,]+)(?:\?|$)', text_lower)
+        for pattern in WEATHER_PATTERNS:
+            if pattern.search(text_lower):
+                city_match = WEATHER_CITY_PATTERN.search(text_lower)
                 if city_match:
                     location = city_match.group(1).strip()
 
-                    style_only_patterns = [
-                        r'^(?:brief|short|detailed|detail|default|standard)\s+mode$',
-                        r'^(?:brief|short|detailed|detail|default|standard)$',
-                        r'^(?:news\s*like|news-like)\s+(?:brief|mode)$'
-                    ]
-                    if any(re.search(style_pattern, location, re.IGNORECASE) for style_pattern in style_only_patterns):
+                    if any(style_pattern.search(location) for style_pattern in WEATHER_STYLE_ONLY_PATTERNS):
                         city_match = None
                     else:
-                        location = re.sub(r'\b(?:brief|short|detailed|detail|default|standard)\s+mode\b', '', location, flags=re.IGNORECASE).strip(' ,')
-                        location = re.sub(r'\b(?:in\s+)?(?:brief|short|detailed|detail|default|standard)\b$', '', location, flags=re.IGNORECASE).strip(' ,')
+                        location = WEATHER_STYLE_MODE_PATTERN.sub('', location).strip(' ,')
+                        location = WEATHER_STYLE_SUFFIX_PATTERN.sub('', location).strip(' ,')
 
                     if not city_match:
                         location = None
 
                     if location:
-                        location = re.sub(r'\b(today|tonight|tomorrow|now|currently|right now)\b', '', location, flags=re.IGNORECASE).strip(' ,')
+                        location = WEATHER_TIME_WORDS_PATTERN.sub('', location).strip(' ,')
                         if self._is_invalid_location_phrase(location):
                             location = None
 
@@ -241,10 +252,10 @@ class WeatherService:
                                 last_city = normalized.get('city')
                                 if not last_country:
                                     last_country = normalized.get('country_code')
-                                if save_user_context:
-                                    save_user_context(user_id, 'last_weather_city', last_city)
-                                    if last_country:
-                                        save_user_context(user_id, 'last_weather_country', last_country)
+                                self._save_last_location(
+                                    user_id, last_city, last_country,
+                                    save_user_context, save_user_context_bulk,
+                                )
                         return {'is_weather': True, 'city': last_city, 'country_code': last_country}
 
                 return {'is_weather': True, 'city': 'ASK_USER', 'country_code': None}
@@ -258,6 +269,7 @@ class WeatherService:
         nlu_intent=None,
         get_user_context: Optional[Callable] = None,
         save_user_context: Optional[Callable] = None,
+        save_user_context_bulk: Optional[Callable] = None,
         check_learned_patterns: Optional[Callable] = None,
         learn_from_interaction: Optional[Callable] = None,
         ask_ollama: Optional[Callable] = None,
@@ -270,10 +282,11 @@ class WeatherService:
             country_code = learned_location.get('country_code')
             raw_location = learned_location.get('raw_location')
 
-            if save_user_context and city:
-                save_user_context(user_id, 'last_weather_city', city)
-            if save_user_context and country_code:
-                save_user_context(user_id, 'last_weather_country', country_code)
+            if city:
+                self._save_last_location(
+                    user_id, city, country_code,
+                    save_user_context, save_user_context_bulk,
+                )
 
             if learn_from_interaction and city:
                 learned_intent = self._encode_weather_intent(city, country_code)
@@ -288,6 +301,18 @@ class WeatherService:
 
             return {'handled': True, 'reply': reply, 'parse_mode': 'MARKDOWN'}
 
+        weather_kwargs = {
+            'user_id': user_id,
+            'get_user_context': get_user_context,
+            'save_user_context': save_user_context,
+            'save_user_context_bulk': save_user_context_bulk,
+            'check_learned_patterns': check_learned_patterns,
+            'learn_from_interaction': learn_from_interaction,
+            'ask_ollama': ask_ollama,
+        }
+        # Detection for the message text, computed at most once and shared by the checks below
+        text_weather_detection = None
+
         weather_style = self.detect_weather_style_learning_request(text)
         if weather_style:
             selected_style = weather_style.get('style')
@@ -298,40 +323,20 @@ class WeatherService:
             if learn_from_interaction:
                 learn_from_interaction(user_id, text_lower, 'weather', f'weather_style:{selected_style}')
 
-            if explicit_learning and not self.detect_weather_request(
-                text,
-                user_id=user_id,
-                get_user_context=get_user_context,
-                save_user_context=save_user_context,
-                check_learned_patterns=check_learned_patterns,
-                learn_from_interaction=learn_from_interaction,
-                ask_ollama=ask_ollama,
-            ):
-                style_text = "news-like brief" if selected_style == 'brief' else "detailed/default"
-                reply = f"✅ Learned! I'll use *{style_text}* format for your weather replies from now on."
-                return {'handled': True, 'reply': reply, 'parse_mode': 'MARKDOWN'}
+            if explicit_learning:
+                text_weather_detection = self.detect_weather_request(text, **weather_kwargs)
+                if not text_weather_detection:
+                    style_text = "news-like brief" if selected_style == 'brief' else "detailed/default"
+                    reply = f"✅ Learned! I'll use *{style_text}* format for your weather replies from now on."
+                    return {'handled': True, 'reply': reply, 'parse_mode': 'MARKDOWN'}
 
         weather_detection = None
         if nlu_intent == 'weather':
-            weather_detection = self.detect_weather_request(
-                'weather',
-                user_id=user_id,
-                get_user_context=get_user_context,
-                save_user_context=save_user_context,
-                check_learned_patterns=check_learned_patterns,
-                learn_from_interaction=learn_from_interaction,
-                ask_ollama=ask_ollama,
-            )
+            weather_detection = self.detect_weather_request('weather', **weather_kwargs)
         if not weather_detection:
-            weather_detection = self.detect_weather_request(
-                text,
-                user_id=user_id,
-                get_user_context=get_user_context,
-                save_user_context=save_user_context,
-                check_learned_patterns=check_learned_patterns,
-                learn_from_interaction=learn_from_interaction,
-                ask_ollama=ask_ollama,
-            )
+            if text_weather_detection is None:
+                text_weather_detection = self.detect_weather_request(text, **weather_kwargs)
+            weather_detection = text_weather_detection
 
         if not (weather_detection and weather_detection.get('is_weather')):
             return None
@@ -364,10 +369,10 @@ _Or just reply with the city name if it's unique_"""
         weather_result = self.get_weather_response(city, country_code, preferred_style)
 
         if city and city != 'ASK_USER' and '❌' not in weather_result:
-            if save_user_context:
-                save_user_context(user_id, 'last_weather_city', city)
-                if country_code:
-                    save_user_context(user_id, 'last_weather_country', country_code)
+            self._save_last_location(
+                user_id, city, country_code,
+                save_user_context, save_user_context_bulk,
+            )
 
             if learn_from_interaction:
                 intent = self._encode_weather_intent(city, country_code)
@@ -394,6 +399,7 @@ _Or just reply with the city name if it's unique_"""
         nlu_intent=None,
         get_user_context: Optional[Callable] = None,
         save_user_context: Optional[Callable] = None,
+        save_user_context_bulk: Optional[Callable] = None,
         check_learned_patterns: Optional[Callable] = None,
         learn_from_interaction: Optional[Callable] = None,
         ask_ollama: Optional[Callable] = None,
@@ -404,11 +410,25 @@ _Or just reply with the city name if it's unique_"""
             nlu_intent=nlu_intent,
             get_user_context=get_user_context,
             save_user_context=save_user_context,
+            save_user_context_bulk=save_user_context_bulk,
             check_learned_patterns=check_learned_patterns,
             learn_from_interaction=learn_from_interaction,
             ask_ollama=ask_ollama,
         )
 
+    @staticmethod
+    def _save_last_location(user_id, city, country_code, save_user_context=None, save_user_context_bulk=None):
+        context_values = {'last_weather_city': city}
+        if country_code:
+            context_values['last_weather_country'] = country_code
+
+        # City and country land in one transaction when the host offers a bulk writer
+        if save_user_context_bulk:
+            save_user_context_bulk(user_id, context_values)
+        elif save_user_context:
+            for key, value in context_values.items():
+                save_user_context(user_id, key, value)
+
     @staticmethod
     def _encode_weather_intent(city, country_code=None):
         safe_city = (city or '').strip()
@@ -541,14 +561,8 @@ Rules:
     def detect_location_learning_request(self, text, ask_ollama: Optional[Callable] = None):
         text_normalized = text.strip()
 
-        patterns = [
-            r'^(?:learn|remember|save) my location\s*[:\-]?\s*(.+)$',
-            r'^(?:my location is|set my location to)\s+(.+)$',
-            r'^(?:use|set) (.+) as my default location$'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text_normalized, re.IGNORECASE)
+        for pattern in LOCATION_LEARNING_PATTERNS:
+            match = pattern.search(text_normalized)
             if match:
                 raw_location = match.group(1).strip().strip('.')
                 if not raw_location: